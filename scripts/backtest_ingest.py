@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Backtest Result Ingest for Freqtrade Pair Selection
+Stream-parses Freqtrade backtest result files (.json or .zip) into a compact,
+cached per-pair table of profit, win rate and drawdown
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+TABLE_FORMAT = "backtest-pair-table"
+TABLE_FORMAT_VERSION = 1
+
+# Freqtrade writes each strategy block as {"trades": [...], ...}, trades first
+_TRADES_RE = re.compile(r'(?:"(?P<strategy>[^"\\]+)"\s*:\s*\{\s*)?"trades"\s*:\s*\[')
+_SKIP_RE = re.compile(r'[\s,]*')
+# Longest text a _TRADES_RE match can span; kept across chunk boundaries
+_OVERLAP = 512
+
+
+@dataclass
+class PairBacktestStats:
+    """Aggregated backtest results of one pair"""
+    pair: str
+    trades: int = 0
+    wins: int = 0
+    profit_abs: float = 0.0
+    profit_ratio_sum: float = 0.0
+    max_drawdown: float = 0.0
+    runs: int = 0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades if self.trades else 0.0
+
+    @property
+    def profit_mean(self) -> float:
+        """Mean profit ratio per trade"""
+        return self.profit_ratio_sum / self.trades if self.trades else 0.0
+
+    def merge(self, other: 'PairBacktestStats') -> None:
+        """Add another run; drawdown keeps the worst run"""
+        self.trades += other.trades
+        self.wins += other.wins
+        self.profit_abs += other.profit_abs
+        self.profit_ratio_sum += other.profit_ratio_sum
+        self.max_drawdown = max(self.max_drawdown, other.max_drawdown)
+        self.runs += other.runs
+
+
+class _PairAccumulator:
+    """Running per-pair totals, including peak-to-trough of cumulative profit ratio"""
+    __slots__ = ('stats', 'cumulative', 'peak')
+
+    def __init__(self, pair: str):
+        self.stats = PairBacktestStats(pair, runs=1)
+        self.cumulative = 0.0
+        self.peak = 0.0
+
+    def add(self, profit_abs: float, profit_ratio: float) -> None:
+        stats = self.stats
+        stats.trades += 1
+        stats.wins += profit_abs > 0
+        stats.profit_abs += profit_abs
+        stats.profit_ratio_sum += profit_ratio
+        self.cumulative += profit_ratio
+        self.peak = max(self.peak, self.cumulative)
+        stats.max_drawdown = max(stats.max_drawdown, self.peak - self.cumulative)
+
+
+def iter_backtest_trades(stream: TextIO, chunk_size: int = 1 << 20) -> Iterator[Tuple[Optional[str], Dict]]:
+    """
+    Yield (strategy, trade) from a backtest result document without loading it
+
+    Only the current chunk and the trade being decoded are held in memory.
+    Trades of every strategy block are yielded in file order.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    strategy = None
+    in_trades = False
+
+    def fill() -> bool:
+        # Drop consumed text, then append the next chunk
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        if not in_trades:
+            match = _TRADES_RE.search(buffer, pos)
+            if match is None:
+                pos = max(pos, len(buffer) - _OVERLAP)
+                if not fill():
+                    return
+                continue
+            strategy = match.group('strategy')
+            pos = match.end()
+            in_trades = True
+
+        pos = _SKIP_RE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if not fill():
+                return
+            continue
+        if buffer[pos] == ']':
+            pos += 1
+            in_trades = False
+            continue
+        try:
+            trade, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not fill():
+                raise ValueError("Truncated backtest result file")
+            continue
+        yield strategy, trade
+
+
+@contextmanager
+def open_backtest_file(path: Union[str, Path]) -> Iterator[TextIO]:
+    """Open a backtest result, reading the result document inside .zip archives"""
+    path = Path(path)
+    if path.suffix != '.zip':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield f
+        return
+    with zipfile.ZipFile(path) as archive:
+        names = [n for n in archive.namelist() if n.endswith('.json')]
+        preferred = f"{path.stem}.json"
+        member = preferred if preferred in names else next(
+            (n for n in names if n.startswith('backtest-result') and not n.endswith('_config.json')), None)
+        if member is None:
+            raise ValueError(f"No backtest result document in {path}")
+        with archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding='utf-8')
+
+
+@metrics.timed('backtest_parse')
+def ingest_file(path: Union[str, Path], strategy: Optional[str] = None) -> Dict[str, PairBacktestStats]:
+    """Aggregate per-pair stats of one backtest result file (optionally one strategy)"""
+    accumulators: Dict[str, _PairAccumulator] = {}
+    with open_backtest_file(path) as stream:
+        for trade_strategy, trade in iter_backtest_trades(stream):
+            if strategy and trade_strategy and trade_strategy != strategy:
+                continue
+            pair = trade.get('pair')
+            if not pair:
+                continue
+            accumulator = accumulators.get(pair)
+            if accumulator is None:
+                accumulator = accumulators[pair] = _PairAccumulator(pair)
+            accumulator.add(float(trade.get('profit_abs') or 0.0), float(trade.get('profit_ratio') or 0.0))
+    return {pair: acc.stats for pair, acc in accumulators.items()}
+
+
+def discover_backtest_files(results_dir: Union[str, Path]) -> List[Path]:
+    """Find backtest result files (skipping .meta.json and .last_result.json)"""
+    results_dir = Path(results_dir)
+    if not results_dir.is_dir():
+        return []
+    files = []
+    for path in results_dir.iterdir():
+        name = path.name
+        if name.startswith('.') or name.endswith('.meta.json') or name.endswith('_config.json'):
+            continue
+        if path.suffix in ('.json', '.zip'):
+            files.append(path)
+    return sorted(files)
+
+
+@dataclass
+class BacktestTable:
+    """Per-pair backtest statistics aggregated over all ingested runs"""
+    pairs: Dict[str, PairBacktestStats]
+    digest: str
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def get(self, pair: str) -> Optional[PairBacktestStats]:
+        return self.pairs.get(pair)
+
+    def arrays(self, pairs: Iterable[str]) -> Dict[str, 'np.ndarray']:
+        """Columnar stats aligned with pairs (zeros for pairs without trades)"""
+        rows = [self.pairs.get(pair) for pair in pairs]
+        return {
+            'trades': np.array([r.trades if r else 0 for r in rows], dtype=np.int64),
+            'profit_mean': np.array([r.profit_mean if r else 0.0 for r in rows]),
+            'win_rate': np.array([r.win_rate if r else 0.0 for r in rows]),
+            'max_drawdown': np.array([r.max_drawdown if r else 0.0 for r in rows])
+        }
+
+
+class BacktestIngest:
+    """
+    Incremental ingest of a Freqtrade backtest results directory
+
+    Per-file aggregates are cached by path, size and mtime, so only new or
+    changed result files are parsed again.
+    """
+
+    def __init__(self, results_dir: Union[str, Path] = "user_data/backtest_results",
+                 cache_file: Union[str, Path] = "user_data/cache/backtest_pairs.json",
+                 strategy: Optional[str] = "PivotCamarillaStrategy"):
+        self.results_dir = Path(results_dir)
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.strategy = strategy
+
+    def _read_cache(self) -> Dict:
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable backtest cache: {e}")
+            return {}
+        if (document.get('format') != TABLE_FORMAT or document.get('version') != TABLE_FORMAT_VERSION
+                or document.get('strategy') != self.strategy):
+            return {}
+        return document.get('files', {})
+
+    def _write_cache(self, files: Dict) -> None:
+        if self.cache_file is None:
+            return
+        document = {'format': TABLE_FORMAT, 'version': TABLE_FORMAT_VERSION,
+                    'strategy': self.strategy, 'files': files}
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(document, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @metrics.timed('backtest_ingest')
+    def load(self) -> BacktestTable:
+        """Build the per-pair table, parsing only files not already cached"""
+        cached = self._read_cache()
+        files = {}
+        parsed = 0
+        for path in discover_backtest_files(self.results_dir):
+            st = path.stat()
+            key = str(path.resolve())
+            entry = cached.get(key)
+            if entry is None or entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+                try:
+                    stats = ingest_file(path, self.strategy)
+                except (OSError, ValueError, zipfile.BadZipFile) as e:
+                    logger.warning(f"Skipping backtest result {path.name}: {e}")
+                    continue
+                entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                         'pairs': {pair: asdict(s) for pair, s in stats.items()}}
+                parsed += 1
+            files[key] = entry
+        if parsed or files.keys() != cached.keys():
+            self._write_cache(files)
+        metrics.count('backtest_files_parsed', parsed)
+
+        pairs: Dict[str, PairBacktestStats] = {}
+        for key in sorted(files):
+            for pair, row in files[key]['pairs'].items():
+                stats = PairBacktestStats(**row)
+                if pair in pairs:
+                    pairs[pair].merge(stats)
+                else:
+                    pairs[pair] = stats
+        digest = hashlib.sha256(json.dumps(
+            [[k, files[k]['size'], files[k]['mtime_ns']] for k in sorted(files)]
+        ).encode('utf-8')).hexdigest()
+        logger.info(f"Backtest table: {len(pairs)} pairs from {len(files)} files ({parsed} parsed)")
+        return BacktestTable(pairs=pairs, digest=digest)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Ingest backtest results and print the per-pair table"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Aggregate Freqtrade backtest results per pair")
+    parser.add_argument('--results-dir', default="user_data/backtest_results")
+    parser.add_argument('--cache-file', default="user_data/cache/backtest_pairs.json")
+    parser.add_argument('--strategy', default="PivotCamarillaStrategy",
+                        help="Strategy to aggregate ('' for all strategies)")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    table = BacktestIngest(args.results_dir, args.cache_file, args.strategy or None).load()
+    rows = sorted(table.pairs.values(), key=lambda s: s.profit_abs, reverse=True)
+    print(f"\n📊 BACKTEST RESULTS PER PAIR ({len(rows)} pairs)")
+    print(f"{'Pair':<20} {'Trades':>7} {'Win %':>7} {'Mean %':>8} {'Profit':>12} {'Max DD %':>9}")
+    print("-" * 68)
+    for s in rows[:args.top]:
+        print(f"{s.pair:<20} {s.trades:>7} {s.win_rate*100:>6.1f}% {s.profit_mean*100:>7.2f}% "
+              f"{s.profit_abs:>12.2f} {s.max_drawdown*100:>8.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Batch Pair Selector for Freqtrade
+Evaluates many selection specs against one shared config and market snapshot
+in a single process, e.g. to produce whitelists for several bots from cron
+
+Spec file (JSON list, or one JSON object per line):
+    [
+        {"name": "bot-a", "method": "performance", "max_pairs": 10,
+         "filters": {"min_volume": 20000000, "max_volatility": 0.1}},
+        {"name": "bot-b", "method": "category_weights", "max_pairs": 8,
+         "custom_weights": {"blue_chips": 0.5, "defi_tokens": 0.5}}
+    ]
+
+Usage:
+    python scripts/batch_selector.py specs.json -o user_data/whitelists.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from incremental_ranking import IncrementalRanking
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from market_data_provider import make_provider
+from optimized_pair_selector import SELECTION_METHODS, OptimizedPairSelector
+from pair_scoring import top_n_indices
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SelectionSpec:
+    """One selection request"""
+    name: str
+    method: str = 'category_weights'
+    max_pairs: int = 10
+    custom_weights: Optional[Dict[str, float]] = None
+    filters: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict, index: int) -> 'SelectionSpec':
+        spec = cls(
+            name=data.get('name') or f"spec-{index + 1}",
+            method=data.get('method', 'category_weights'),
+            max_pairs=int(data.get('max_pairs', 10)),
+            custom_weights=data.get('custom_weights'),
+            filters=dict(data.get('filters') or {})
+        )
+        if spec.method not in SELECTION_METHODS:
+            raise ValueError(f"{spec.name}: unknown method {spec.method!r}")
+        return spec
+
+
+def load_specs(path: Path) -> List[SelectionSpec]:
+    """Load specs from a JSON list or a JSON-lines file"""
+    text = path.read_text(encoding='utf-8').strip()
+    if text.startswith('['):
+        raw = json.loads(text)
+    else:
+        raw = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [SelectionSpec.from_dict(data, i) for i, data in enumerate(raw)]
+
+
+class BatchSelector:
+    """
+    Evaluate selection specs against shared selector state
+
+    Every market-driven method ranks the same snapshot, taken once per batch,
+    with the spec's filters (min_volume, max_volatility, and max_correlation
+    for 'decorrelated') and the selector's backtest score terms. Each
+    'incremental' spec ranks through its own in-memory IncrementalRanking
+    (keyed by spec name), so specs neither share hysteresis state with each
+    other nor touch the selector's persisted one.
+    """
+
+    def __init__(self, selector: OptimizedPairSelector):
+        self.selector = selector
+        # One market snapshot and one set of backtest terms for every spec in the batch
+        self.market = selector.get_market_snapshot()
+        self.extra_score = selector.backtest_score_terms()
+        # Candle snapshots carry no market cap; market cap ranking reads the provider
+        self.market_cap = self.market['market_cap']
+        if selector.market_cap_provider is not None and selector.ohlcv is not None:
+            self.market_cap = selector.get_provider_snapshot(selector.market_cap_provider)['market_cap']
+        # Spec name -> (ranking, lock); specs repeating a name take turns on its ranking
+        self._rankings: Dict[str, Tuple[IncrementalRanking, threading.Lock]] = {}
+        self._rankings_lock = threading.Lock()
+
+    def _ranking(self, spec: SelectionSpec) -> Tuple[IncrementalRanking, threading.Lock]:
+        with self._rankings_lock:
+            if spec.name not in self._rankings:
+                self._rankings[spec.name] = (IncrementalRanking(state_file=None), threading.Lock())
+            return self._rankings[spec.name]
+
+    def _market_cap_ranking(self, spec: SelectionSpec) -> List[str]:
+        if self.selector.market_cap_provider is None:
+            # Curated order, independent of market data
+            return self.selector.select_by_market_cap_ranking(spec.max_pairs)
+        eligible = np.isfinite(self.market_cap)
+        if 'min_volume' in spec.filters:
+            eligible &= self.market['volume_24h'] >= spec.filters['min_volume']
+        if 'max_volatility' in spec.filters:
+            eligible &= self.market['volatility'] <= spec.filters['max_volatility']
+        known = np.flatnonzero(eligible)
+        all_pairs = self.selector.get_all_pairs()
+        return [all_pairs[i] for i in known[top_n_indices(self.market_cap[known], spec.max_pairs)].tolist()]
+
+    @metrics.timed('batch_evaluate')
+    def evaluate(self, spec: SelectionSpec) -> Dict:
+        """Evaluate one spec"""
+        start = time.perf_counter()
+        scores = None
+        filters = {
+            'min_volume': spec.filters.get('min_volume', 10_000_000),
+            'max_volatility': spec.filters.get('max_volatility', 0.15)
+        }
+        if spec.method == 'performance':
+            _, category_ids = self.selector.get_category_ids()
+            top = self.selector.select_by_performance_score_batch(
+                self.market['volume_24h'], self.market['market_cap'], self.market['volatility'],
+                category_ids, max_pairs=spec.max_pairs, extra_score=self.extra_score, **filters
+            )
+            all_pairs = self.selector.get_all_pairs()
+            pairs = [all_pairs[i] for i in top.index.tolist()]
+            scores = np.round(top.score, 6).tolist()
+        elif spec.method == 'incremental':
+            ranking, lock = self._ranking(spec)
+            with lock:
+                ranked = self.selector.select_by_performance_score_incremental(
+                    spec.max_pairs, market=self.market, ranking=ranking, **filters)
+            pairs = [pm.pair for pm in ranked]
+            scores = [round(pm.score, 6) for pm in ranked]
+        elif spec.method == 'decorrelated':
+            if 'max_correlation' in spec.filters:
+                filters['max_correlation'] = spec.filters['max_correlation']
+            pairs = self.selector.select_decorrelated(spec.max_pairs, market=self.market, **filters)
+        elif spec.method == 'market_cap':
+            pairs = self._market_cap_ranking(spec)
+        elif spec.method == 'category_weights':
+            pairs = self.selector.select_by_category_weights(spec.max_pairs, spec.custom_weights)
+        else:
+            pairs = self.selector.select(spec.method, spec.max_pairs)
+
+        result = {
+            'name': spec.name,
+            'method': spec.method,
+            'max_pairs': spec.max_pairs,
+            'pairs': pairs,
+            'categories': self.selector.universe.category_counts(pairs),
+            'elapsed_ms': (time.perf_counter() - start) * 1000
+        }
+        if scores is not None:
+            result['scores'] = scores
+        return result
+
+    def run(self, specs: List[SelectionSpec], workers: int = 1) -> List[Dict]:
+        """Evaluate all specs, optionally on a thread pool (results keep spec order)"""
+        if workers <= 1:
+            return [self.evaluate(spec) for spec in specs]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.evaluate, specs))
+
+
+@metrics.timed('file_write')
+def write_results(results: List[Dict], output: Path, fmt: str) -> None:
+    """Write results as one JSON document or as CSV rows (one per selected pair)"""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'csv':
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'method', 'rank', 'pair', 'score'])
+            for result in results:
+                scores = result.get('scores') or [''] * len(result['pairs'])
+                for rank, (pair, score) in enumerate(zip(result['pairs'], scores), 1):
+                    writer.writerow([result['name'], result['method'], rank, pair, score])
+        return
+
+    document = {
+        'timestamp': datetime.now().isoformat(),
+        'results': results
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+
+
+def main():
+    """Run a batch of selection specs"""
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Evaluate many pair selection specs in one process")
+    parser.add_argument('specs', type=Path, help="JSON or JSON-lines spec file")
+    parser.add_argument('-o', '--output', type=Path, default=Path("user_data/batch_selection.json"))
+    parser.add_argument('--format', choices=['json', 'csv'], default=None,
+                        help="Output format (default: from the output file extension)")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('--workers', type=int, default=1, help="Evaluate specs in parallel")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the selection cache")
+    parser.add_argument('--market-data', default='simulated',
+                        help="simulated[:seed], coingecko[:url], file:<path> or replay:<history dir>")
+    parser.add_argument('--seed', type=int, help="Seed of the simulated market data")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    specs = load_specs(args.specs)
+    selector = OptimizedPairSelector(config_file=args.config, use_cache=not args.no_cache,
+                                     provider=make_provider(args.market_data, args.seed))
+    results = BatchSelector(selector).run(specs, workers=args.workers)
+
+    fmt = args.format or ('csv' if args.output.suffix.lower() == '.csv' else 'json')
+    write_results(results, args.output, fmt)
+    print(f"✅ {len(results)} selections written to {args.output} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
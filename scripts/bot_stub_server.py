@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Freqtrade Bot Stub Server for offline tests
+Local stand-in for the parts of the Freqtrade REST API the whitelist publisher
+uses: ping, whitelist and reload_config, with HTTP basic auth
+"""
+
+import argparse
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BotStubServer:
+    """
+    Threaded HTTP server acting as a running bot
+
+    The whitelist is read from config_path at start and again on every
+    reload_config, like the real bot, so tests can check what a reload would
+    have picked up. reload_count and reloaded (the whitelists loaded by each
+    reload) record the calls.
+
+    Usage:
+        with BotStubServer('config.json', username='u', password='p') as bot:
+            publisher = WhitelistPublisher('config.json', bot=BotAPI(bot.url, 'u', 'p'))
+    """
+
+    def __init__(self, config_path: Union[str, Path], username: Optional[str] = None,
+                 password: Optional[str] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config_path = Path(config_path)
+        self.username = username
+        self.password = password
+        self.reload_count = 0
+        self.reloaded: List[List[str]] = []
+        self.whitelist = self._load_whitelist()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'BotStubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'BotStubServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _load_whitelist(self) -> List[str]:
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return list((config.get('exchange') or {}).get('pair_whitelist') or [])
+
+    def reload_config(self) -> Dict:
+        """Re-read the config, as the bot does on /reload_config"""
+        whitelist = self._load_whitelist()
+        with self._lock:
+            self.whitelist = whitelist
+            self.reload_count += 1
+            self.reloaded.append(whitelist)
+        return {'status': 'Reloading config ...'}
+
+    def authorized(self, header: Optional[str]) -> bool:
+        if not self.username:
+            return True
+        expected = base64.b64encode(f"{self.username}:{self.password or ''}".encode('utf-8')).decode('ascii')
+        return header == f"Basic {expected}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, status: int, payload) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method: str) -> None:
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                path = self.path.split('?', 1)[0].rstrip('/')
+                if path == '/api/v1/ping':
+                    self._send_json(200, {'status': 'pong'})
+                    return
+                if not stub.authorized(self.headers.get('Authorization')):
+                    self._send_json(401, {'detail': 'Unauthorized'})
+                    return
+                if method == 'GET' and path == '/api/v1/whitelist':
+                    whitelist = stub.whitelist
+                    self._send_json(200, {'whitelist': whitelist, 'length': len(whitelist),
+                                          'method': ['StaticPairList']})
+                elif method == 'POST' and path == '/api/v1/reload_config':
+                    self._send_json(200, stub.reload_config())
+                else:
+                    self._send_json(404, {'detail': 'Not Found'})
+
+            def do_GET(self):
+                self._route('GET')
+
+            def do_POST(self):
+                self._route('POST')
+
+        return Handler
+
+
+def main():
+    """Run the bot stub in the foreground"""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Local Freqtrade REST API stub")
+    parser.add_argument('config', help="Bot config.json to serve the whitelist of")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    stub = BotStubServer(args.config, username=args.username, password=args.password, port=args.port)
+    print(f"🚀 Bot stub server listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n👋 Goodbye!")
+    finally:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Camarilla Pivot Levels for the Pair Universe
+Vectorized daily, weekly and session Camarilla levels for every pair at once,
+cached per period boundary for the selectors and PivotCamarillaStrategy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from ohlcv_provider import OHLCVProvider, timeframe_minutes
+from selection_cache import SelectionCache, make_cache_key
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+# Period length and offset (ms); the epoch is a Thursday, so weeks are shifted to start on Monday
+PERIODS = {
+    'daily': (DAY_MS, 0),
+    'weekly': (7 * DAY_MS, 3 * DAY_MS),
+    'session': (8 * HOUR_MS, 0),     # 00-08 Asia, 08-16 Europe, 16-24 US (UTC)
+}
+
+LEVEL_NAMES = ('pivot', 'h1', 'h2', 'h3', 'h4', 'l1', 'l2', 'l3', 'l4', 'range', 'width')
+
+# Camarilla multipliers of the previous period's range, for levels 1-4
+_MULTIPLIERS = (1.1 / 12, 1.1 / 6, 1.1 / 4, 1.1 / 2)
+
+
+def camarilla_levels(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Camarilla levels from the previous period's high, low and close
+
+    Works element-wise on arrays of any shape. width is the H4-L4 band
+    relative to the close.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    price_range = high - low
+    levels = {'pivot': (high + low + close) / 3, 'range': price_range}
+    for i, multiplier in enumerate(_MULTIPLIERS, 1):
+        levels[f'h{i}'] = close + price_range * multiplier
+        levels[f'l{i}'] = close - price_range * multiplier
+    with np.errstate(invalid='ignore', divide='ignore'):
+        levels['width'] = (levels['h4'] - levels['l4']) / close
+    return levels
+
+
+def period_index(timestamp_ms, period: str):
+    """Index of the period containing a timestamp (scalar or array, epoch ms)"""
+    length, offset = PERIODS[period]
+    return (timestamp_ms + offset) // length
+
+
+def previous_period_hlc(candles: Sequence[Dict[str, np.ndarray]], period: str,
+                        current_period: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    High, low and close of each pair's last completed period before current_period
+
+    All pairs are concatenated into flat arrays, cut into (pair, period)
+    segments and reduced with maximum/minimum.reduceat in one pass.
+
+    Returns:
+        high, low, close and the period index per pair (NaN / -1 without data)
+    """
+    n_pairs = len(candles)
+    high = np.full(n_pairs, np.nan)
+    low = np.full(n_pairs, np.nan)
+    close = np.full(n_pairs, np.nan)
+    source_period = np.full(n_pairs, -1, dtype=np.int64)
+
+    lengths = [len(c['close']) for c in candles]
+    if not sum(lengths):
+        return high, low, close, source_period
+    pair = np.repeat(np.arange(n_pairs), lengths)
+    dates = np.concatenate([c['date'] for c in candles if len(c['close'])])
+    periods = period_index(dates, period)
+    completed = periods < current_period
+    if not completed.any():
+        return high, low, close, source_period
+
+    pair, periods = pair[completed], periods[completed]
+    highs = np.concatenate([c['high'] for c in candles if len(c['close'])])[completed]
+    lows = np.concatenate([c['low'] for c in candles if len(c['close'])])[completed]
+    closes = np.concatenate([c['close'] for c in candles if len(c['close'])])[completed]
+
+    change = np.empty(len(pair), dtype=bool)
+    change[0] = True
+    change[1:] = (pair[1:] != pair[:-1]) | (periods[1:] != periods[:-1])
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], len(pair)) - 1
+
+    group_pair = pair[starts]
+    # Last segment of each pair is its most recent completed period
+    last = np.flatnonzero(np.append(group_pair[1:] != group_pair[:-1], True))
+    rows = group_pair[last]
+    high[rows] = np.maximum.reduceat(highs, starts)[last]
+    low[rows] = np.minimum.reduceat(lows, starts)[last]
+    close[rows] = closes[ends[last]]
+    source_period[rows] = periods[starts[last]]
+    return high, low, close, source_period
+
+
+@dataclass
+class CamarillaLevels:
+    """Levels of one period for a list of pairs (arrays aligned with pairs)"""
+    period: str
+    period_index: int
+    pairs: Tuple[str, ...]
+    levels: Dict[str, np.ndarray]
+    last_close: np.ndarray
+    stale: np.ndarray
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.levels[name]
+
+    def for_pair(self, pair: str) -> Dict[str, float]:
+        """Levels of one pair"""
+        i = self.pairs.index(pair)
+        return {name: float(values[i]) for name, values in self.levels.items()}
+
+    def h3_l3_distance(self, last_close: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Distance of the close to the nearer of H3/L3, relative to the close
+
+        Args:
+            last_close: Current close per pair (default: the close when the levels were computed)
+        """
+        close = self.last_close if last_close is None else np.asarray(last_close, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.minimum(np.abs(close - self.levels['h3']), np.abs(close - self.levels['l3'])) / close
+
+    def rank(self, by: str = 'width', max_pairs: int = 10,
+             last_close: Optional[np.ndarray] = None) -> List[str]:
+        """
+        Rank pairs by pivot range width (widest first) or by distance to H3/L3
+        (nearest first); pairs without levels are never selected
+        """
+        if by == 'width':
+            key = -self.levels['width']
+        elif by == 'h3_l3_distance':
+            key = self.h3_l3_distance(last_close)
+        else:
+            raise ValueError(f"Unknown ranking: {by}")
+        valid = np.flatnonzero(~np.isnan(key) & ~self.stale)
+        order = valid[np.argsort(key[valid], kind='stable')]
+        return [self.pairs[i] for i in order[:max_pairs]]
+
+    def to_arrays(self) -> Dict:
+        """JSON-serializable form that from_arrays restores (used by the cache)"""
+        return {
+            'period': self.period,
+            'period_index': self.period_index,
+            'pairs': list(self.pairs),
+            'levels': {name: values.tolist() for name, values in self.levels.items()},
+            'last_close': self.last_close.tolist(),
+            'stale': self.stale.tolist()
+        }
+
+    @classmethod
+    def from_arrays(cls, data: Dict) -> 'CamarillaLevels':
+        return cls(
+            period=data['period'],
+            period_index=data['period_index'],
+            pairs=tuple(data['pairs']),
+            levels={name: np.asarray(values, dtype=np.float64) for name, values in data['levels'].items()},
+            last_close=np.asarray(data['last_close'], dtype=np.float64),
+            stale=np.asarray(data['stale'], dtype=bool)
+        )
+
+    def to_dict(self) -> Dict:
+        """Per-pair levels for export (e.g. to the strategy)"""
+        return {
+            'period': self.period,
+            'period_start': datetime.fromtimestamp(
+                (self.period_index * PERIODS[self.period][0] - PERIODS[self.period][1]) / 1000,
+                tz=timezone.utc).isoformat(),
+            'pairs': {
+                pair: {name: (None if np.isnan(values[i]) else float(values[i]))
+                       for name, values in self.levels.items()}
+                for i, pair in enumerate(self.pairs) if not np.isnan(self.levels['pivot'][i])
+            }
+        }
+
+
+class CamarillaEngine:
+    """
+    Camarilla levels for a pair universe, computed once per period
+
+    Levels only change when a period boundary passes, so results are cached
+    under (period, period index, pairs, data settings) in memory and, when a
+    SelectionCache is given, on disk until the next boundary.
+    """
+
+    def __init__(self, provider: OHLCVProvider, cache: Optional[SelectionCache] = None):
+        self.provider = provider
+        self.cache = cache
+        self._memo: Dict[str, CamarillaLevels] = {}
+
+    def _depth(self, period: str) -> int:
+        # Enough candles for the current and the whole previous period
+        length, _ = PERIODS[period]
+        return 2 * length // (timeframe_minutes(self.provider.timeframe) * 60_000) + 2
+
+    def levels(self, pairs: Sequence[str], period: str = 'daily',
+               now: Optional[datetime] = None) -> CamarillaLevels:
+        """Levels of the current period for pairs (derived from the last completed one)"""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        now_ms = int((now or datetime.now(timezone.utc)).timestamp() * 1000)
+        current = int(period_index(now_ms, period))
+        pairs = tuple(pairs)
+        key = make_cache_key('camarilla', period, current, pairs, self.provider.settings_key)
+
+        result = self._memo.get(key)
+        if result is not None:
+            return result
+        if self.cache is not None:
+            length, offset = PERIODS[period]
+            remaining = timedelta(milliseconds=(current + 1) * length - offset - now_ms)
+            stored = self.cache.get_or_compute(key, lambda: self._compute(pairs, period, current).to_arrays(),
+                                               ttl=remaining)
+            result = CamarillaLevels.from_arrays(stored)
+        else:
+            result = self._compute(pairs, period, current)
+        if len(self._memo) >= 16:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    @metrics.timed('camarilla_levels')
+    def _compute(self, pairs: Tuple[str, ...], period: str, current: int) -> CamarillaLevels:
+        candles = self.provider.load_candles(pairs, self._depth(period))
+        high, low, close, source = previous_period_hlc(candles, period, current)
+        last_close = np.array([c['close'][-1] if len(c['close']) else np.nan for c in candles])
+        return CamarillaLevels(
+            period=period,
+            period_index=current,
+            pairs=pairs,
+            levels=camarilla_levels(high, low, close),
+            last_close=last_close,
+            # Levels from an older period than the previous one (data gap)
+            stale=(source >= 0) & (source != current - 1)
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    """Compute Camarilla levels for the configured universe"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compute Camarilla pivot levels for the pair universe")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('--datadir', default="user_data/data")
+    parser.add_argument('--exchange', default="binance")
+    parser.add_argument('--timeframe', default="30m")
+    parser.add_argument('--period', choices=list(PERIODS), default='daily')
+    parser.add_argument('--rank-by', choices=['width', 'h3_l3_distance'], default='width')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('-o', '--output', type=Path, help="Write levels as JSON for the strategy")
+    args = parser.parse_args(argv)
+
+    from config_service import config_service
+    pairs = config_service.get(args.config).universe.pairs
+    provider = OHLCVProvider(args.datadir, args.exchange, args.timeframe)
+    engine = CamarillaEngine(provider, SelectionCache(Path("user_data/cache") / "camarilla"))
+
+    start = time.perf_counter()
+    levels = engine.levels(pairs, args.period)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n📐 CAMARILLA {args.period.upper()} LEVELS ({elapsed_ms:.1f} ms, ranked by {args.rank_by})")
+    print(f"{'Pair':<20} {'Close':>12} {'L3':>12} {'H3':>12} {'Width %':>8}")
+    print("-" * 68)
+    for pair in levels.rank(args.rank_by, args.top):
+        i = levels.pairs.index(pair)
+        print(f"{pair:<20} {levels.last_close[i]:>12.4f} {levels['l3'][i]:>12.4f} "
+              f"{levels['h3'][i]:>12.4f} {levels['width'][i]*100:>7.2f}%")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(levels.to_dict(), f, indent=2)
+        print(f"\n✅ Levels written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Candle Prefetch for Freqtrade Pair Selection
+Downloads or tops up the startup candles of pairs entering the whitelist into
+the bot's data directory, in parallel, before the whitelist is published
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from ohlcv_provider import OHLCVProvider, OHLCV_COLUMNS, pair_to_filename, read_candles, timeframe_minutes
+
+futures = lazy_import('concurrent.futures')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Read whole files when merging (read_candles keeps the last n rows)
+_ALL_ROWS = 1 << 40
+
+
+class SimulatedExchange:
+    """
+    Offline stand-in for a ccxt exchange's fetch_ohlcv
+
+    Candles are a deterministic function of (seed, pair, open time), so
+    repeated or overlapping requests agree. Only closed and currently open
+    candles exist; latency is added to every call.
+
+    Args:
+        seed: Seed of the generated prices
+        latency: Seconds slept per call
+        max_limit: Candles returned per call at most (exchange page size)
+    """
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, max_limit: int = 1000):
+        self.seed = seed
+        self.latency = latency
+        self.max_limit = max_limit
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _candle(self, pair: str, ts: int) -> List[float]:
+        rng = random.Random(f"{self.seed}:{pair}:{ts}")
+        base = random.Random(f"{self.seed}:{pair}").uniform(0.1, 50_000)
+        open_ = base * (1 + 0.05 * rng.uniform(-1, 1))
+        close = open_ * (1 + 0.01 * rng.uniform(-1, 1))
+        high = max(open_, close) * (1 + 0.005 * rng.random())
+        low = min(open_, close) * (1 - 0.005 * rng.random())
+        return [ts, open_, high, low, close, rng.uniform(1_000, 100_000)]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', since: Optional[int] = None,
+                    limit: Optional[int] = None) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        tf_ms = timeframe_minutes(timeframe) * 60_000
+        limit = min(limit or self.max_limit, self.max_limit)
+        current = int(time.time() * 1000) // tf_ms * tf_ms
+        start = current - (limit - 1) * tf_ms if since is None else -(-since // tf_ms) * tf_ms
+        return [self._candle(symbol, ts) for ts in range(start, min(current, start + (limit - 1) * tf_ms) + 1, tf_ms)]
+
+
+def make_exchange(spec: str, exchange: str = 'binance', trading_mode: str = 'futures'):
+    """
+    Build the exchange client from a CLI spec
+
+    'simulated' or 'simulated:<seed>' for the offline stand-in, 'ccxt' for
+    the real exchange through ccxt (optional dependency).
+    """
+    kind, _, arg = spec.partition(':')
+    if kind == 'simulated':
+        return SimulatedExchange(seed=int(arg) if arg else 0)
+    if kind == 'ccxt':
+        try:
+            import ccxt
+        except ImportError as e:
+            raise RuntimeError("ccxt is required for --exchange-source ccxt") from e
+        options = {'defaultType': 'swap'} if trading_mode == 'futures' else {}
+        return getattr(ccxt, exchange)({'enableRateLimit': True, 'options': options})
+    raise ValueError(f"Unknown exchange source: {spec!r}")
+
+
+def write_candles(path: Union[str, Path], rows: Sequence[Sequence[float]]) -> None:
+    """Atomically write [[date ms, o, h, l, c, v], ...] in the format given by the file suffix"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-', suffix=path.suffix)
+    os.close(fd)
+    try:
+        if path.name.endswith('.json.gz'):
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(rows, f, separators=(',', ':'))
+        elif path.suffix == '.json':
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, separators=(',', ':'))
+        else:
+            _write_arrow(Path(tmp_path), path.suffix, rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def _write_arrow(tmp_path: Path, suffix: str, rows: Sequence[Sequence[float]]) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as parquet
+    except ImportError as e:
+        raise RuntimeError(f"pyarrow is required to write {suffix} files") from e
+    values = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+    columns = {'date': pa.array(values[:, 0].astype('datetime64[ms]'), type=pa.timestamp('ms', tz='UTC'))}
+    columns.update({name: values[:, i + 1] for i, name in enumerate(OHLCV_COLUMNS)})
+    table = pa.table(columns)
+    if suffix == '.feather':
+        feather.write_feather(table, str(tmp_path), compression='lz4')
+    else:
+        parquet.write_table(table, str(tmp_path))
+
+
+class CandlePrefetcher:
+    """
+    Fetches the startup candles a bot needs before it can trade a pair
+
+    For each pair the existing data file is topped up from its last candle
+    (refetching that one, it may have been written while still open) and
+    backfilled when it starts too late, or `startup_candles` closed candles
+    are downloaded when there is none. Pairs whose file already covers the
+    startup window up to the last closed candle cost no request. Pairs
+    run in parallel on `concurrency` threads; each pages through
+    fetch_ohlcv and writes its file atomically, in the existing file's format
+    or `data_format` for new files.
+
+    Args:
+        exchange: Object with a ccxt-style fetch_ohlcv(symbol, timeframe, since, limit)
+        datadir: Freqtrade data directory (user_data/data)
+        exchange_name: Exchange sub-directory
+        timeframe: Timeframe the bot trades
+        trading_mode: 'futures' or 'spot'
+        startup_candles: Closed candles required before the bot can trade a pair
+        concurrency: Pairs fetched at the same time
+        data_format: 'json', 'jsongz' or 'feather' (needs pyarrow) for new files
+        page_limit: Candles requested per call
+    """
+
+    def __init__(self, exchange, datadir: Union[str, Path] = "user_data/data",
+                 exchange_name: str = "binance", timeframe: str = "30m",
+                 trading_mode: str = "futures", startup_candles: int = 210,
+                 concurrency: int = 4, data_format: str = "json", page_limit: int = 500):
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.trading_mode = trading_mode
+        self.startup_candles = startup_candles
+        self.concurrency = max(1, concurrency)
+        self.data_format = data_format
+        self.page_limit = page_limit
+        self.tf_ms = timeframe_minutes(timeframe) * 60_000
+        # Used for Freqtrade's file naming and format lookup only
+        self._files = OHLCVProvider(datadir, exchange_name, timeframe, trading_mode, cache_file=None)
+
+    def data_file(self, pair: str) -> Path:
+        """Existing data file of a pair, or the one a download creates"""
+        existing = self._files.pair_file(pair)
+        if existing is not None:
+            return existing
+        stem = f"{pair_to_filename(pair)}-{self.timeframe}"
+        if self.trading_mode == 'futures':
+            stem += '-futures'
+        suffix = {'json': '.json', 'jsongz': '.json.gz', 'feather': '.feather'}[self.data_format]
+        return self._files.data_dir / f"{stem}{suffix}"
+
+    def _last_closed(self) -> int:
+        """Open time (ms) of the last closed candle"""
+        return int(time.time() * 1000) // self.tf_ms * self.tf_ms - self.tf_ms
+
+    def _fetch_range(self, pair: str, since: int, until: int) -> List[List[float]]:
+        """Candles opening in [since, until], paging through fetch_ohlcv"""
+        fetched = []
+        while since <= until:
+            rows = self.exchange.fetch_ohlcv(pair, self.timeframe, since=since, limit=self.page_limit)
+            rows = [row for row in rows if since <= row[0] <= until]
+            if not rows:
+                break
+            fetched.extend(rows)
+            since = int(rows[-1][0]) + self.tf_ms
+        return fetched
+
+    def prefetch_pair(self, pair: str) -> int:
+        """
+        Bring one pair's data file up to the last closed candle
+
+        A file starting after the first of the `startup_candles` last closed
+        candles is backfilled as well, so a short file counts as done only
+        once it holds the whole startup window.
+
+        Returns:
+            Number of candles added
+        """
+        path = self.data_file(pair)
+        last_closed = self._last_closed()
+        first_needed = last_closed - (self.startup_candles - 1) * self.tf_ms
+        existing = []
+        if path.exists():
+            candles = read_candles(path, _ALL_ROWS)
+            existing = np.column_stack([candles['date'].astype(np.float64)]
+                                       + [candles[name] for name in OHLCV_COLUMNS]).tolist()
+        if not existing:
+            fetched = self._fetch_range(pair, first_needed, last_closed)
+        else:
+            fetched = []
+            if int(existing[0][0]) > first_needed:
+                fetched += self._fetch_range(pair, first_needed, int(existing[0][0]) - self.tf_ms)
+            if int(existing[-1][0]) < last_closed:
+                fetched += self._fetch_range(pair, int(existing[-1][0]), last_closed)
+        metrics.count('prefetch_candles', len(fetched))
+        if not fetched:
+            return 0
+
+        # Fetched candles replace stored ones with the same open time
+        by_time = {int(row[0]): row for row in existing}
+        by_time.update((int(row[0]), row) for row in fetched)
+        merged = [by_time[ts] for ts in sorted(by_time)]
+        write_candles(path, merged)
+        return len(merged) - len(existing)
+
+    @metrics.timed('candle_prefetch')
+    def prefetch(self, pairs: Sequence[str]) -> Dict[str, Optional[int]]:
+        """
+        Prefetch several pairs in parallel
+
+        Returns:
+            Candles added per pair (None when the pair failed; the bot then
+            downloads it itself)
+        """
+        results: Dict[str, Optional[int]] = {}
+        if not pairs:
+            return results
+        with futures.ThreadPoolExecutor(max_workers=min(self.concurrency, len(pairs)),
+                                        thread_name_prefix='candle-prefetch') as executor:
+            tasks = {executor.submit(self.prefetch_pair, pair): pair for pair in dict.fromkeys(pairs)}
+            for task in futures.as_completed(tasks):
+                pair = tasks[task]
+                try:
+                    results[pair] = task.result()
+                except Exception as e:
+                    logger.error(f"Candle prefetch failed for {pair}: {e}")
+                    metrics.count('prefetch_errors')
+                    results[pair] = None
+        fetched = sum(1 for added in results.values() if added)
+        logger.info(f"Prefetched candles for {fetched}/{len(results)} pairs")
+        return results
+
+    def before_publish(self, change) -> None:
+        """WhitelistPublisher hook: prefetch the pairs a whitelist change adds"""
+        self.prefetch(change.added)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Prefetch startup candles for pairs"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Download startup candles into a Freqtrade data directory")
+    parser.add_argument('pairs', nargs='+', help="Pairs to prefetch, e.g. BTC/USDT:USDT")
+    parser.add_argument('--datadir', default="user_data/data")
+    parser.add_argument('--exchange', default="binance")
+    parser.add_argument('--exchange-source', default="ccxt", help="'ccxt' or 'simulated[:seed]'")
+    parser.add_argument('--timeframe', default="30m")
+    parser.add_argument('--trading-mode', choices=['futures', 'spot'], default='futures')
+    parser.add_argument('--startup-candles', type=int, default=210)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--data-format', choices=['json', 'jsongz', 'feather'], default='json')
+    args = parser.parse_args(argv)
+
+    prefetcher = CandlePrefetcher(make_exchange(args.exchange_source, args.exchange, args.trading_mode),
+                                  args.datadir, args.exchange, args.timeframe, args.trading_mode,
+                                  args.startup_candles, args.concurrency, args.data_format)
+    start = time.perf_counter()
+    results = prefetcher.prefetch(args.pairs)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📥 CANDLE PREFETCH ({args.timeframe}, {elapsed:.2f}s)")
+    for pair, added in results.items():
+        status = "❌ failed" if added is None else f"+{added} candles"
+        print(f"   {pair:<20} {status}")
+
+
+if __name__ == "__main__":
+    main()
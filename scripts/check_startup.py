@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Startup Time Check for the Pair Scripts
+Measures import cost with `python -X importtime` and fails when a script
+exceeds its budget or eagerly imports a heavy dependency
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Cumulative import budget per module, in milliseconds
+DEFAULT_BUDGETS_MS = {
+    'manage_pairs': 60,
+    'simple_pair_selector': 40,
+    'optimized_pair_selector': 60,
+    'performance_monitor': 40,
+    'market_data_fetcher': 40,
+    'market_history': 40,
+    'pairlist_daemon': 80,
+    'batch_selector': 60,
+}
+
+# Dependencies that must not be loaded just by importing a script
+HEAVY_MODULES = ('numpy', 'pandas', 'requests')
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def measure_import(module: str, python: str = sys.executable) -> Tuple[float, Dict[str, float]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        Cumulative import time of the module in ms, and the cumulative time
+        of every top-level module imported along the way
+    """
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+
+    imported = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        name = match.group(4)
+        imported[name] = cumulative_ms
+        if name == module:
+            total_ms = cumulative_ms
+    return total_ms, imported
+
+
+def check_module(module: str, budget_ms: float, repeats: int = 3) -> List[str]:
+    """Check one module against its budget; returns the list of failures"""
+    failures = []
+    timings = []
+    imported = {}
+    for _ in range(repeats):
+        total_ms, imported = measure_import(module)
+        timings.append(total_ms)
+    best_ms = min(timings)
+
+    heavy = sorted(name for name in imported if name.split('.')[0] in HEAVY_MODULES and '.' not in name)
+    status = '✅'
+    if best_ms > budget_ms:
+        failures.append(f"{module}: {best_ms:.1f}ms exceeds budget of {budget_ms:.0f}ms")
+        status = '❌'
+    if heavy:
+        failures.append(f"{module}: eagerly imports {', '.join(heavy)}")
+        status = '❌'
+    print(f"{status} {module:<26} {best_ms:7.1f}ms / {budget_ms:.0f}ms"
+          + (f"  (loads {', '.join(heavy)})" if heavy else ''))
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Check import time of the pair scripts"""
+    parser = argparse.ArgumentParser(description="Check import time of the pair scripts")
+    parser.add_argument('modules', nargs='*', help="Modules to check (default: all budgeted scripts)")
+    parser.add_argument('--budget', type=float, help="Override the budget (ms) for every module")
+    parser.add_argument('--repeats', type=int, default=3, help="Imports per module; the fastest counts")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or list(DEFAULT_BUDGETS_MS)
+    print(f"⏱️  Import time check ({args.repeats} runs each, best counts)")
+    failures = []
+    for module in modules:
+        budget_ms = args.budget if args.budget is not None else DEFAULT_BUDGETS_MS.get(module, 60)
+        try:
+            failures.extend(check_module(module, budget_ms, args.repeats))
+        except RuntimeError as e:
+            failures.append(str(e))
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+    print("\n✅ All scripts within their startup budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
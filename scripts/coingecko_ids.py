@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+CoinGecko Id Index for Freqtrade Pair Selection
+Locally cached symbol -> CoinGecko id lookup built from the bulk /coins/list
+dump, with market cap disambiguation of shared symbols
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import logging
+
+from instrumentation import metrics
+from market_data_fetcher import COINGECKO_API_URL
+from pair_universe import split_pair
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the cache file layout changes
+INDEX_FORMAT = 1
+
+DEFAULT_CACHE_FILE = "user_data/cache/coingecko_ids.json"
+
+
+def default_cache_file(base_url: str,
+                       cache_file: Optional[Union[str, Path]] = DEFAULT_CACHE_FILE) -> Optional[Union[str, Path]]:
+    """
+    Where to keep the index of an API endpoint
+
+    Only the public CoinGecko API gets a file; other endpoints (local stub
+    servers, test doubles) keep their index in memory so they never leave
+    stub ids on disk.
+    """
+    return cache_file if base_url == COINGECKO_API_URL else None
+
+
+class CoinIdIndex:
+    """
+    Symbol -> CoinGecko id lookup
+
+    CoinGecko ids are slugs ('bitcoin', 'ethereum'), not symbols, and many
+    symbols are shared by several coins (bridged, wrapped and copycat tokens).
+    The index holds the candidate ids of every symbol from one /coins/list
+    dump, so a lookup is a dict hit. A symbol with several candidates resolves
+    to, in order: an override, the candidate with the highest market cap
+    (fetched once for all newly ambiguous symbols in a single /coins/markets
+    pass and remembered), or the shortest id.
+
+    The dump is fetched again after max_age; choices are kept for every symbol
+    whose candidates did not change, so a refresh re-resolves only the
+    difference.
+
+    Args:
+        fetcher: MarketDataFetcher used for /coins/list and disambiguation
+        cache_file: JSON file holding the dump and the resolved choices (None
+            keeps them in memory, see default_cache_file)
+        max_age: Seconds before the dump is fetched again
+        overrides: Symbol -> id choices that win over every other rule
+    """
+
+    def __init__(self, fetcher, cache_file: Optional[Union[str, Path]] = DEFAULT_CACHE_FILE,
+                 max_age: float = 86400.0, overrides: Optional[Dict[str, str]] = None):
+        self.fetcher = fetcher
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.max_age = max_age
+        self.overrides = overrides
+        self.fetched_at = 0.0
+        self._candidates: Dict[str, List[str]] = {}
+        self._choices: Dict[str, str] = {}
+        self._loaded = False
+        self._warned = False
+
+    def __len__(self) -> int:
+        self._ensure()
+        return len(self._candidates)
+
+    def __contains__(self, symbol: str) -> bool:
+        self._ensure()
+        return symbol.upper() in self._candidates
+
+    @property
+    def overrides(self) -> Dict[str, str]:
+        return self._overrides
+
+    @overrides.setter
+    def overrides(self, overrides: Optional[Dict[str, str]]) -> None:
+        self._overrides = {symbol.upper(): coin_id for symbol, coin_id in (overrides or {}).items()}
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at >= self.max_age
+
+    def candidates(self, symbol: str) -> List[str]:
+        """Every id listed under a symbol"""
+        self._ensure()
+        return list(self._candidates.get(symbol.upper(), ()))
+
+    def _ensure(self) -> None:
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+        if self.stale:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous dump; retry after another max_age
+                self.fetched_at = time.time()
+                logger.error(f"Error refreshing the CoinGecko id index: {e}")
+
+    def _load(self) -> None:
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable id index {self.cache_file}: {e}")
+            return
+        # A dump from another API (e.g. a local stub server) is not reused
+        if document.get('format') != INDEX_FORMAT or document.get('base_url') != self.fetcher.base_url:
+            return
+        self.fetched_at = float(document.get('fetched_at', 0.0))
+        self._candidates = document.get('candidates', {})
+        self._choices = document.get('choices', {})
+
+    def _save(self) -> None:
+        if self.cache_file is None:
+            return
+        document = {
+            'format': INDEX_FORMAT,
+            'base_url': self.fetcher.base_url,
+            'fetched_at': self.fetched_at,
+            'candidates': self._candidates,
+            'choices': self._choices
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix='.tmp-', suffix='.json')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(document, f, separators=(',', ':'))
+                os.replace(tmp_path, self.cache_file)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write id index {self.cache_file}: {e}")
+
+    @metrics.timed('id_index_refresh')
+    def refresh(self) -> int:
+        """
+        Fetch /coins/list and merge it into the index
+
+        Returns:
+            Number of symbols whose candidates changed
+        """
+        candidates: Dict[str, List[str]] = {}
+        for coin in self.fetcher.fetch_coin_list():
+            symbol = str(coin.get('symbol') or '').upper()
+            if symbol and coin.get('id'):
+                candidates.setdefault(symbol, []).append(coin['id'])
+        for ids in candidates.values():
+            ids.sort()
+
+        changed = {symbol for symbol in candidates.keys() | self._candidates.keys()
+                   if candidates.get(symbol) != self._candidates.get(symbol)}
+        self._choices = {symbol: choice for symbol, choice in self._choices.items()
+                         if symbol not in changed}
+        self._candidates = candidates
+        self.fetched_at = time.time()
+        self._save()
+        logger.info(f"CoinGecko id index refreshed: {len(candidates)} symbols, {len(changed)} changed")
+        return len(changed)
+
+    def _disambiguate(self, symbols: Sequence[str]) -> Dict[str, str]:
+        """
+        Choose the highest market cap candidate of every symbol (one market fetch for all)
+
+        Choices are remembered only when the market caps could be fetched.
+        """
+        ids = [coin_id for symbol in symbols for coin_id in self._candidates[symbol]]
+        try:
+            coins = self.fetcher.fetch_markets_sync(ids)
+        except Exception as e:
+            logger.error(f"Error fetching market caps for id disambiguation: {e}")
+            coins = None
+        market_cap = {coin.get('id'): coin.get('market_cap') or 0.0 for coin in coins or ()}
+        choices = {symbol: max(self._candidates[symbol], key=lambda i: (market_cap.get(i, -1.0), -len(i)))
+                   for symbol in symbols}
+        metrics.count('id_disambiguations', len(symbols))
+        if coins is not None:
+            self._choices.update(choices)
+            self._save()
+        return choices
+
+    def resolve(self, symbols: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        CoinGecko id of each symbol (None when not listed)
+
+        Symbols that are ambiguous and not chosen yet are disambiguated together.
+        """
+        self._ensure()
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        if not self._candidates:
+            # No dump at all (first run while the API is unreachable): guess the lower-case symbol
+            if not self._warned:
+                logger.warning("CoinGecko id index is empty, using lower-case symbols as ids")
+                self._warned = True
+            return {symbol: self.overrides.get(symbol, symbol.lower()) for symbol in symbols}
+
+        pending = [symbol for symbol in symbols
+                   if symbol not in self.overrides and symbol not in self._choices
+                   and len(self._candidates.get(symbol, ())) > 1]
+        choices = self._choices
+        if pending:
+            choices = {**self._choices, **self._disambiguate(pending)}
+
+        resolved = {}
+        for symbol in symbols:
+            ids = self._candidates.get(symbol)
+            if symbol in self.overrides:
+                resolved[symbol] = self.overrides[symbol]
+            elif not ids:
+                resolved[symbol] = None
+            else:
+                resolved[symbol] = ids[0] if len(ids) == 1 else choices[symbol]
+        return resolved
+
+    def coin_id(self, symbol: str) -> Optional[str]:
+        """CoinGecko id of one symbol"""
+        return self.resolve([symbol])[symbol.upper()]
+
+    def ids_for_pairs(self, pairs: Sequence[str]) -> Dict[str, str]:
+        """CoinGecko id of every pair whose base symbol is listed"""
+        bases = [split_pair(pair)[0] for pair in pairs]
+        resolved = self.resolve(bases)
+        ids = {pair: resolved[base.upper()] for pair, base in zip(pairs, bases)
+               if resolved[base.upper()] is not None}
+        metrics.count('id_index_misses', len(pairs) - len(ids))
+        return ids
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Shared Pairlist Config Service
+Parses each pairlist config once per process and reloads it only when the
+file changes on disk (mtime/inode/size), so long-running processes pick up
+edited pairlists without re-parsing on every call
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+import logging
+
+from instrumentation import metrics
+from pair_universe import PairUniverse
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigError(ValueError):
+    """Raised when a pairlist config is missing or invalid"""
+
+
+@dataclass(frozen=True)
+class LoadedConfig:
+    """One parsed and validated version of a pairlist config"""
+    path: str
+    data: Dict
+    digest: str
+    universe: PairUniverse
+    version: int
+    stat_key: Tuple[int, int, int, int]
+    loaded_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class _Entry:
+    config: LoadedConfig
+    checked_at: float
+    failed_key: Optional[Tuple[int, int, int, int]] = None
+
+
+def validate_pairs_config(config: Dict) -> None:
+    """Check the structure the selectors rely on; raises ConfigError"""
+    if not isinstance(config, dict) or not isinstance(config.get('top_50_pairs'), dict):
+        raise ConfigError("missing 'top_50_pairs' section")
+    section = config['top_50_pairs']
+    categories = section.get('categories')
+    if not isinstance(categories, dict):
+        raise ConfigError("'top_50_pairs.categories' must be a mapping of category -> pairs")
+    for category, pairs in categories.items():
+        if not isinstance(pairs, list) or not all(isinstance(p, str) for p in pairs):
+            raise ConfigError(f"category '{category}' must be a list of pair strings")
+    for key in ('selection_criteria', 'selection_strategy'):
+        values = section.get(key, {})
+        if not isinstance(values, dict):
+            raise ConfigError(f"'top_50_pairs.{key}' must be a mapping")
+        for name, value in values.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ConfigError(f"'top_50_pairs.{key}.{name}' must be a number")
+    overrides = section.get('coingecko_ids', {})
+    if not isinstance(overrides, dict) or not all(isinstance(v, str) for v in overrides.values()):
+        raise ConfigError("'top_50_pairs.coingecko_ids' must be a mapping of symbol -> CoinGecko id")
+
+
+class ConfigService:
+    """
+    Memoizing loader for pairlist configs
+
+    Args:
+        check_interval: Seconds between stat() checks of the same file; calls
+            within the interval return the memoized config without a syscall
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def get(self, path: Union[str, Path]) -> LoadedConfig:
+        """
+        Get the current config for a path, reloading it if the file changed
+
+        A reload that fails (file mid-write, invalid JSON, failed validation)
+        keeps serving the last good version. Raises ConfigError only when no
+        version was ever loaded.
+        """
+        key = os.path.abspath(path)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry.config
+
+        with self._lock:
+            entry = self._entries.get(key)
+            stat_key = None
+            try:
+                st = os.stat(key)
+                stat_key = (st.st_mtime_ns, st.st_ino, st.st_size, st.st_dev)
+                if entry is not None and stat_key in (entry.config.stat_key, entry.failed_key):
+                    entry.checked_at = now
+                    return entry.config
+                config = self._load(key, stat_key)
+            except (OSError, ValueError) as e:
+                if entry is None:
+                    if isinstance(e, FileNotFoundError):
+                        raise ConfigError(f"Config file {path} not found") from e
+                    raise ConfigError(f"Failed to load config {path}: {e}") from e
+                logger.warning(f"Keeping version {entry.config.version} of {path}; reload failed: {e}")
+                entry.checked_at = now
+                # Do not retry until the file changes again
+                entry.failed_key = stat_key
+                return entry.config
+
+            if entry is not None:
+                logger.info(f"Configuration {path} changed on disk, reloaded as version {config.version}")
+                metrics.count('config_reloads')
+            self._entries[key] = _Entry(config, now)
+            return config
+
+    @metrics.timed('config_load')
+    def _load(self, path: str, stat_key: Tuple[int, int, int, int]) -> LoadedConfig:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        validate_pairs_config(data)
+        self._version += 1
+        return LoadedConfig(
+            path=path,
+            data=data,
+            digest=hashlib.sha256(raw).hexdigest(),
+            universe=PairUniverse.from_config(data),
+            version=self._version,
+            stat_key=stat_key
+        )
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Force the next get() to stat the file again (all files if path is None)"""
+        with self._lock:
+            entries = self._entries.values() if path is None else \
+                [e for k, e in self._entries.items() if k == os.path.abspath(path)]
+            for entry in entries:
+                entry.checked_at = float('-inf')
+
+
+class ConfigView:
+    """
+    One consumer's handle on a config file
+
+    Calls on_reload(config) the first time it sees a new version, so the
+    consumer can drop caches derived from the previous one.
+    """
+
+    def __init__(self, path: Union[str, Path], service: Optional[ConfigService] = None,
+                 on_reload: Optional[Callable[[LoadedConfig], None]] = None):
+        self.path = path
+        self.service = service or config_service
+        self.on_reload = on_reload
+        self._config: Optional[LoadedConfig] = None
+
+    def load(self) -> LoadedConfig:
+        """Load the config, raising ConfigError if it is unavailable"""
+        config = self.service.get(self.path)
+        self._swap(config)
+        return config
+
+    def current(self) -> Optional[LoadedConfig]:
+        """Get the latest config, or the last one seen if it cannot be loaded"""
+        try:
+            config = self.service.get(self.path)
+        except ConfigError:
+            return self._config
+        self._swap(config)
+        return config
+
+    def _swap(self, config: LoadedConfig) -> None:
+        previous = self._config
+        self._config = config
+        if previous is not None and previous.version != config.version and self.on_reload:
+            self.on_reload(config)
+
+
+# Process-wide service shared by the selectors
+config_service = ConfigService()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Rolling Correlation for Portfolio Selection
+Incrementally updated return covariance/correlation of a pair universe and a
+greedy selector that caps the correlation between selected pairs
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+import logging
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+class RollingCorrelation:
+    """
+    Covariance and correlation of the last `window` return rows
+
+    Keeps running pairwise sums over a ring buffer of returns, so adding a row
+    (and evicting the oldest) costs O(N^2) instead of a full O(window * N^2)
+    recomputation. Missing returns (NaN) are excluded pairwise. The sums are
+    rebuilt from the ring buffer every `window` updates to stop rounding drift.
+
+    Args:
+        n_assets: Number of pairs (columns)
+        window: Number of return rows kept
+        min_samples: Pairwise samples needed before a correlation is reported
+    """
+
+    def __init__(self, n_assets: int, window: int = 168, min_samples: int = 20):
+        self.n_assets = n_assets
+        self.window = window
+        self.min_samples = min_samples
+        self._returns = np.full((window, n_assets), np.nan)
+        self._head = 0
+        self.count = 0
+        self._updates_since_rebuild = 0
+        self._last_prices = None
+        self._reset_sums()
+
+    def _reset_sums(self) -> None:
+        n = self.n_assets
+        self._n = np.zeros((n, n))       # samples where both i and j are known
+        self._sx = np.zeros((n, n))      # sum of x_i where both are known
+        self._sxx = np.zeros((n, n))     # sum of x_i^2 where both are known
+        self._sxy = np.zeros((n, n))     # sum of x_i * x_j
+        self._cached = None
+
+    def _accumulate(self, rows: np.ndarray, weights: np.ndarray) -> None:
+        # Rows enter (+1) or leave (-1) the sums in one matrix product per sum
+        known = ~np.isnan(rows)
+        values = np.where(known, rows, 0.0)
+        mask = known.astype(np.float64)
+        weighted_mask = mask * weights[:, None]
+        self._n += mask.T @ weighted_mask
+        self._sx += values.T @ weighted_mask
+        self._sxx += (values * values).T @ weighted_mask
+        self._sxy += values.T @ (values * weights[:, None])
+        self._cached = None
+
+    def push(self, returns: np.ndarray) -> None:
+        """Add one row of returns (one value per pair, NaN if unknown)"""
+        self.extend(np.asarray(returns, dtype=np.float64).reshape(1, -1))
+
+    def extend(self, returns: np.ndarray) -> None:
+        """Add several rows of returns, oldest first"""
+        returns = np.asarray(returns, dtype=np.float64).reshape(-1, self.n_assets)
+        if len(returns) >= self.window:
+            self._returns[:] = returns[-self.window:]
+            self._head = 0
+            self.count = self.window
+            self.rebuild()
+            return
+
+        k = len(returns)
+        slots = (self._head + np.arange(k)) % self.window
+        evicted = self._returns[slots]
+        # Empty slots (all NaN) contribute nothing, so evicting them is a no-op
+        self._accumulate(np.concatenate([evicted, returns]),
+                         np.concatenate([np.full(k, -1.0), np.ones(k)]))
+        self._returns[slots] = returns
+        self._head = (self._head + k) % self.window
+        self.count = min(self.window, self.count + k)
+
+        self._updates_since_rebuild += k
+        if self._updates_since_rebuild >= self.window:
+            self.rebuild()
+
+    def update_prices(self, prices: np.ndarray) -> None:
+        """Add the log returns since the previous price snapshot"""
+        prices = np.asarray(prices, dtype=np.float64)
+        if self._last_prices is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.push(np.log(prices / self._last_prices))
+        self._last_prices = prices
+
+    def rebuild(self) -> None:
+        """Recompute the running sums from the ring buffer"""
+        self._reset_sums()
+        self._accumulate(self._returns, np.ones(self.window))
+        self._updates_since_rebuild = 0
+
+    def covariance(self) -> np.ndarray:
+        """Pairwise sample covariance (NaN below min_samples)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (self._sxy - self._sx * self._sx.T / self._n) / (self._n - 1)
+        return np.where(self._n >= self.min_samples, cov, np.nan)
+
+    def correlation(self) -> np.ndarray:
+        """Pairwise correlation over commonly known samples (NaN below min_samples, shared; do not modify)"""
+        if self._cached is not None:
+            return self._cached
+        n = self._n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self._sx * self._sx.T
+            corr /= n
+            np.subtract(self._sxy, corr, out=corr)
+            var = self._sx * self._sx
+            var /= n
+            np.subtract(self._sxx, var, out=var)
+            np.sqrt(var, out=var)
+            corr /= var
+            corr /= var.T
+        np.clip(corr, -1.0, 1.0, out=corr)
+        corr[n < self.min_samples] = np.nan
+        self._cached = corr
+        return corr
+
+def greedy_decorrelated(scores: np.ndarray, correlation: np.ndarray, max_pairs: int,
+                        max_correlation: float = 0.7) -> List[int]:
+    """
+    Pick the highest scores such that no two picks are more correlated than max_correlation
+
+    Rows with a non-finite score are never picked; unknown (NaN) correlations
+    do not block a pick. Runs in O(N * max_pairs).
+
+    Returns:
+        Indices of the picked rows, best score first
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    order = order[np.isfinite(scores[order])]
+    worst = np.zeros(len(scores))
+    picked = []
+    for i in order.tolist():
+        if len(picked) >= max_pairs:
+            break
+        if worst[i] > max_correlation:
+            continue
+        picked.append(i)
+        worst = np.fmax(worst, np.abs(correlation[i]))
+    return picked
+
+
+def aligned_log_returns(candles: List[Dict[str, np.ndarray]], end: int, periods: int,
+                        timeframe_ms: int) -> np.ndarray:
+    """
+    Log returns of the `periods` candles ending at `end`, one column per pair
+
+    Closes are placed on a shared time grid by candle date, so pairs with gaps
+    or lagging files get NaN instead of shifting against the others.
+
+    Args:
+        candles: Per-pair candle columns with 'date' (ms) and 'close'
+        end: Open time (ms) of the last candle on the grid
+        periods: Number of return rows
+        timeframe_ms: Candle length in milliseconds
+    """
+    closes = np.full((periods + 1, len(candles)), np.nan)
+    for j, columns in enumerate(candles):
+        date = np.asarray(columns['date'], dtype=np.int64)
+        slot = periods - (end - date) // timeframe_ms
+        inside = (slot >= 0) & (slot <= periods) & ((end - date) % timeframe_ms == 0)
+        closes[slot[inside], j] = columns['close'][inside]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.diff(np.log(closes), axis=0)
+
+
+def max_pairwise_correlation(correlation: np.ndarray, picked: List[int]) -> Optional[float]:
+    """Highest absolute correlation between picked rows (None if unknown)"""
+    if len(picked) < 2:
+        return None
+    sub = np.abs(correlation[np.ix_(picked, picked)])
+    np.fill_diagonal(sub, np.nan)
+    if np.isnan(sub).all():
+        return None
+    return float(np.nanmax(sub))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Incremental Ranking for Freqtrade Pair Selection
+Hysteresis re-ranking that keeps the previous selection unless a challenger is
+clearly better, re-scoring only the pairs whose inputs changed
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+RANKING_FORMAT = "incremental-ranking"
+RANKING_FORMAT_VERSION = 1
+
+
+class IncrementalRanking:
+    """
+    Stateful top-k selection with hysteresis
+
+    Each rank() call receives the inputs of every pair as one matrix row.
+    Rows equal to the stored ones (within `tolerance`) keep their stored
+    score; only new or changed rows go through score_fn, and everything is
+    re-scored when the scoring_key (filters, weights, extra inputs) changes.
+
+    Selection starts from the previous one. Incumbents that disappear or stop
+    passing the filters (non-finite score) leave at once and free slots go to
+    the best challengers. After that a challenger replaces the weakest
+    incumbent only if it beats it by `margin`; once an incumbent has been held
+    for `min_hold` seconds any better challenger may replace it. Scores,
+    inputs and entry times are persisted to state_file, so the hysteresis
+    survives restarts.
+
+    Args:
+        margin: Score lead a challenger needs over an incumbent
+        min_hold: Seconds after which an incumbent no longer has the margin's
+            protection (None: always protected)
+        tolerance: Relative input change below which a row counts as
+            unchanged (0: any change is re-scored)
+        state_file: JSON file persisting the state (None keeps it in memory)
+    """
+
+    def __init__(self, margin: float = 0.05, min_hold: Optional[float] = 86400.0,
+                 tolerance: float = 0.0, state_file: Optional[Union[str, Path]] = None):
+        self.margin = margin
+        self.min_hold = min_hold
+        self.tolerance = tolerance
+        self.state_file = Path(state_file) if state_file else None
+        self.scoring_key: Optional[str] = None
+        self._index: Dict[str, int] = {}
+        self._inputs = np.empty((0, 0))
+        self._scores = np.empty(0)
+        # Selected keys -> time they entered the selection
+        self.selected: Dict[str, float] = {}
+        self.rescored = 0
+        self.eligible = 0
+        self.swaps = 0
+        self._loaded = False
+
+    def reset(self) -> None:
+        """Forget the stored scores and selection"""
+        self.scoring_key = None
+        self._index = {}
+        self._inputs = np.empty((0, 0))
+        self._scores = np.empty(0)
+        self.selected = {}
+        self._loaded = True
+
+    def _load(self) -> None:
+        self._loaded = True
+        if self.state_file is None or not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable ranking state: {e}")
+            return
+        if document.get('format') != RANKING_FORMAT or document.get('version') != RANKING_FORMAT_VERSION:
+            return
+        keys = document.get('keys', [])
+        self.scoring_key = document.get('scoring_key')
+        self._index = {key: i for i, key in enumerate(keys)}
+        inputs = np.array(document.get('inputs', []), dtype=np.float64)
+        self._inputs = inputs.reshape(len(keys), -1) if len(keys) else np.empty((0, 0))
+        self._scores = np.array(document.get('scores', []), dtype=np.float64)
+        self.selected = {key: float(since) for key, since in document.get('selected', {}).items()}
+
+    def _save(self, keys: Sequence[str]) -> None:
+        if self.state_file is None:
+            return
+        document = {
+            'format': RANKING_FORMAT,
+            'version': RANKING_FORMAT_VERSION,
+            'scoring_key': self.scoring_key,
+            'keys': list(keys),
+            # NaN and +-inf are not JSON; null round-trips to NaN
+            'inputs': [[v if np.isfinite(v) else None for v in row] for row in self._inputs.tolist()],
+            'scores': [v if np.isfinite(v) else None for v in self._scores.tolist()],
+            'selected': self.selected
+        }
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_file.parent, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(document, f, separators=(',', ':'))
+            os.replace(tmp_path, self.state_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _score(self, keys: Sequence[str], inputs: np.ndarray,
+               score_fn: Callable[[np.ndarray], np.ndarray], scoring_key: str) -> np.ndarray:
+        """Scores of all rows, calling score_fn on the new and changed rows only"""
+        previous = np.array([self._index.get(key, -1) for key in keys], dtype=np.int64)
+        known = previous >= 0
+        if scoring_key != self.scoring_key or self._inputs.shape[1:] != inputs.shape[1:]:
+            known[:] = False
+        same = np.zeros(len(keys), dtype=bool)
+        if known.any():
+            same[known] = np.isclose(self._inputs[previous[known]], inputs[known], rtol=self.tolerance,
+                                     atol=0.0, equal_nan=True).all(axis=1)
+
+        scores = np.empty(len(keys))
+        kept_inputs = inputs.copy()
+        if same.any():
+            # Unchanged rows keep their stored inputs, so drift below tolerance cannot pile up unseen
+            kept_inputs[same] = self._inputs[previous[same]]
+            scores[same] = self._scores[previous[same]]
+        changed = np.flatnonzero(~same)
+        if changed.size:
+            scores[changed] = np.asarray(score_fn(inputs[changed]), dtype=np.float64)
+
+        self.rescored = int(changed.size)
+        metrics.count('ranking_rescored', self.rescored)
+        self.scoring_key = scoring_key
+        self._index = {key: i for i, key in enumerate(keys)}
+        self._inputs = kept_inputs
+        self._scores = scores
+        return scores
+
+    @metrics.timed('incremental_rank')
+    def rank(self, keys: Sequence[str], inputs: np.ndarray, score_fn: Callable[[np.ndarray], np.ndarray],
+             max_items: int, scoring_key: str = '', now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Update the selection from the current inputs
+
+        Args:
+            keys: Unique pair (or other) keys, one per input row
+            inputs: (N, F) matrix of scoring inputs; NaN allowed
+            score_fn: Maps an (M, F) block of rows to M scores (non-finite: not eligible)
+            max_items: Selection size
+            scoring_key: Identity of score_fn's settings (a change re-scores everything)
+            now: Current time in epoch seconds (defaults to time.time())
+
+        Returns:
+            (key, score) of the selection, best score first
+        """
+        if not self._loaded:
+            self._load()
+        now = time.time() if now is None else now
+        keys = list(keys)
+        inputs = np.asarray(inputs, dtype=np.float64).reshape(len(keys), -1)
+        scores = self._score(keys, inputs, score_fn, scoring_key)
+        score_of = dict(zip(keys, scores.tolist()))
+        self.eligible = int(np.isfinite(scores).sum())
+
+        # Incumbents that left the universe or the filters go first
+        incumbents = {key: since for key, since in self.selected.items()
+                      if np.isfinite(score_of.get(key, np.nan))}
+        if len(incumbents) > max_items:
+            keep = sorted(incumbents, key=lambda key: score_of[key], reverse=True)[:max_items]
+            incumbents = {key: incumbents[key] for key in keep}
+
+        eligible = np.flatnonzero(np.isfinite(scores))
+        order = eligible[np.lexsort((eligible, -scores[eligible]))]
+        challengers = [keys[i] for i in order.tolist() if keys[i] not in incumbents]
+
+        # Free slots are filled without any margin
+        free = max(0, max_items - len(incumbents))
+        for key in challengers[:free]:
+            incumbents[key] = now
+        challengers = challengers[free:]
+
+        def defence(key: str) -> float:
+            protected = self.min_hold is None or now - incumbents[key] < self.min_hold
+            return score_of[key] + (self.margin if protected else 0.0)
+
+        swaps = 0
+        for challenger in challengers:
+            if not incumbents:
+                break
+            weakest = min(incumbents, key=defence)
+            if score_of[challenger] <= defence(weakest):
+                # Challengers come best first, so no later one can win either
+                break
+            del incumbents[weakest]
+            incumbents[challenger] = now
+            swaps += 1
+
+        self.swaps = swaps
+        metrics.count('ranking_swaps', swaps)
+        self.selected = incumbents
+        self._save(keys)
+        return sorted(((key, score_of[key]) for key in incumbents), key=lambda item: item[1], reverse=True)
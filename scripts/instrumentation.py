@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Hot-path Instrumentation for the Pair Scripts
+Per-stage timers and counters with JSON and Prometheus text export
+
+Disabled by default; a disabled stage costs one attribute check. Enable from
+the environment without touching the scripts:
+    PAIR_METRICS=1                     collect metrics in-process
+    PAIR_METRICS_FILE=metrics.prom     write at exit (.json for JSON, else Prometheus text)
+    PAIR_METRICS_PORT=9109             serve /metrics and /metrics.json on localhost
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _NullStage:
+    """Shared no-op context manager used while instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics: 'Instrumentation', name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.record(self._name, (time.perf_counter_ns() - self._start) / 1e9)
+        return False
+
+
+class Instrumentation:
+    """Registry of stage timers and counters"""
+
+    def __init__(self, enabled: bool = False, prefix: str = 'pair_selection'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, float] = {}
+        self._server = None
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def stage(self, name: str):
+        """Context manager timing one execution of a stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record one stage duration"""
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                self._stages[name] = {'count': 1, 'total_seconds': seconds,
+                                      'min_seconds': seconds, 'max_seconds': seconds,
+                                      'last_seconds': seconds}
+                return
+            stage['count'] += 1
+            stage['total_seconds'] += seconds
+            stage['min_seconds'] = min(stage['min_seconds'], seconds)
+            stage['max_seconds'] = max(stage['max_seconds'], seconds)
+            stage['last_seconds'] = seconds
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increment a counter (api_calls, bytes_fetched, cache_hits, ...)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        """Get a copy of all metrics"""
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'stages': {name: dict(stage) for name, stage in self._stages.items()},
+                'counters': dict(self._counters)
+            }
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        data = self.snapshot()
+        p = self.prefix
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{p}_{name}{labels} {value:.9g}")
+
+        stages = sorted(data['stages'].items())
+        if stages:
+            metric('stage_seconds_total', 'counter', "Total time spent per stage",
+                   [(f'{{stage="{n}"}}', s['total_seconds']) for n, s in stages])
+            metric('stage_calls_total', 'counter', "Number of executions per stage",
+                   [(f'{{stage="{n}"}}', s['count']) for n, s in stages])
+            metric('stage_max_seconds', 'gauge', "Slowest execution per stage",
+                   [(f'{{stage="{n}"}}', s['max_seconds']) for n, s in stages])
+            metric('stage_last_seconds', 'gauge', "Most recent execution per stage",
+                   [(f'{{stage="{n}"}}', s['last_seconds']) for n, s in stages])
+        for name, value in sorted(data['counters'].items()):
+            metric(f"{name}_total", 'counter', f"Counter {name}", [('', value)])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """Atomically write metrics (JSON for .json files, Prometheus text otherwise)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.to_json() if path.suffix == '.json' else self.to_prometheus()
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics (Prometheus) and /metrics.json from a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, content_type = registry.to_json().encode('utf-8'), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, content_type = registry.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+
+# Process-wide registry used by the pair scripts
+metrics = Instrumentation()
+
+
+def _configure_from_env() -> None:
+    metrics_file: Optional[str] = os.environ.get('PAIR_METRICS_FILE')
+    metrics_port: Optional[str] = os.environ.get('PAIR_METRICS_PORT')
+    if os.environ.get('PAIR_METRICS') or metrics_file or metrics_port:
+        metrics.enable()
+    if metrics_file:
+        atexit.register(metrics.write, metrics_file)
+    if metrics_port:
+        metrics.serve(int(metrics_port))
+
+
+_configure_from_env()
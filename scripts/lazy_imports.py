@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports for the Pair Scripts
+Defers heavy dependencies (numpy, pandas, requests, asyncio) until first use,
+so launching a script from cron or a shell hook only pays for what it runs
+"""
+
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return the module if already imported, otherwise a lazy placeholder for it"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -5,176 +5,383 @@ Manages dynamic pair selection from a pool of 50 top cryptocurrencies
 """
 
 import json
-import requests
-import pandas as pd
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from coingecko_ids import CoinIdIndex, default_cache_file
+from config_service import ConfigError, ConfigView
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from market_data_fetcher import COINGECKO_API_URL, MarketDataFetcher
+from market_data_provider import CoinGeckoMarketData
+from market_history import MarketHistoryStore
+from ohlcv_provider import OHLCVProvider
+from pair_scoring import MARKET_CAP_CAP, VOLUME_CAP
+from request_scheduler import RequestScheduler
+from streaming_selection import StreamingTopK
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
+# CoinGecko market fields kept for analysis, and their analysis column names
+ANALYSIS_COLUMNS = {
+    'pair': 'pair',
+    'symbol': 'symbol',
+    'name': 'name',
+    'current_price': 'current_price',
+    'market_cap': 'market_cap',
+    'total_volume': 'volume_24h',
+    'price_change_percentage_24h': 'price_change_24h',
+    'market_cap_rank': 'market_cap_rank'
+}
+ANALYSIS_FIELDS = list(ANALYSIS_COLUMNS)
+
 class PairManager:
-    def __init__(self, config_file="user_data/pairlists/top_50_pairs.json"):
+    def __init__(self, config_file="user_data/pairlists/top_50_pairs.json",
+                 api_base_url=COINGECKO_API_URL, fetcher=None,
+                 history_dir="user_data/market_history", history_window=timedelta(days=7),
+                 ohlcv=None, provider=None, http_state_dir="user_data/cache/http",
+                 id_cache_file="user_data/cache/coingecko_ids.json", ranking=None):
         """Initialize the pair manager"""
         self.config_file = config_file
-        self.pairs_config = self.load_config()
+        self.api_base_url = api_base_url
+        self._fetcher = fetcher
+        # Symbol -> CoinGecko id index, cached on disk for the public API only
+        self.id_cache_file = id_cache_file
+        self._id_index = None
+        # Rate limiter and HTTP cache shared with other processes (None disables them)
+        self.http_state_dir = http_state_dir
+        # Market data source (a MarketDataProvider; CoinGecko via the fetcher by default)
+        self._provider = provider
+        # Snapshot history (set history_dir=None to disable)
+        self.history = MarketHistoryStore(history_dir) if history_dir else None
+        self.history_window = history_window
+        # Candle metrics from Freqtrade's data directory (an OHLCVProvider, optional)
+        self.ohlcv = ohlcv
+        # Hysteresis ranking for select_top_pairs (an IncrementalRanking; None ranks from scratch)
+        self.ranking = ranking
+        self._config_view = ConfigView(config_file)
+        self.load_config()
         
+    @property
+    def fetcher(self):
+        """Market data fetcher, created on first use"""
+        if self._fetcher is None:
+            scheduler = RequestScheduler.shared(self.http_state_dir) if self.http_state_dir else None
+            self._fetcher = MarketDataFetcher(base_url=self.api_base_url, scheduler=scheduler)
+        return self._fetcher
+    
+    @property
+    def id_index(self):
+        """CoinGecko id index, with the config's 'coingecko_ids' overrides"""
+        if self._id_index is None:
+            self._id_index = CoinIdIndex(self.fetcher,
+                                         cache_file=default_cache_file(self.fetcher.base_url, self.id_cache_file))
+        config = self.pairs_config
+        self._id_index.overrides = config['top_50_pairs'].get('coingecko_ids') if config else None
+        return self._id_index
+    
+    @property
+    def provider(self):
+        """Market data provider, CoinGecko through the fetcher unless one was given"""
+        if self._provider is None:
+            self._provider = CoinGeckoMarketData(fetcher=self.fetcher, id_index=self.id_index)
+        return self._provider
+    
     def load_config(self):
-        """Load pair configuration from JSON file"""
+        """Load pair configuration from JSON file (parsed once, reloaded when it changes)"""
         try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.error(f"Config file {self.config_file} not found")
+            return self._config_view.load().data
+        except ConfigError as e:
+            logger.error(str(e))
             return None
     
+    @property
+    def pairs_config(self):
+        """Current pair configuration, or None if it could not be loaded"""
+        config = self._config_view.current()
+        return config.data if config else None
+    
+    @property
+    def universe(self):
+        """Compiled universe of the current configuration"""
+        config = self._config_view.current()
+        return config.universe if config else None
+    
     def get_all_pairs(self):
         """Get all pairs from all categories"""
-        all_pairs = []
-        for category, pairs in self.pairs_config['top_50_pairs']['categories'].items():
-            all_pairs.extend(pairs)
-        return all_pairs
+        return list(self.universe.pairs)
     
     def get_pairs_by_category(self, category):
         """Get pairs for a specific category"""
-        return self.pairs_config['top_50_pairs']['categories'].get(category, [])
+        return list(self.universe.get_pairs(category))
     
-    def get_market_data(self, pairs, limit=50):
-        """Get market data for pairs from CoinGecko API"""
+    @metrics.timed('market_fetch')
+    def get_market_data(self, pairs, limit=None):
+        """Get market data for pairs (the first `limit` only, if given) from the market data provider"""
         try:
-            # Convert pair format from BTC/USDT:USDT to btc
-            symbols = []
-            for pair in pairs[:limit]:
-                symbol = pair.split('/')[0].lower()
-                symbols.append(symbol)
+            # CoinGecko chunks are fetched concurrently; a failed chunk only drops its own coins
+            market_data = self.provider.get_markets(list(pairs if limit is None else pairs[:limit]))
             
-            # Get market data from CoinGecko
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'ids': ','.join(symbols),
-                'order': 'market_cap_desc',
-                'per_page': limit,
-                'page': 1,
-                'sparkline': False
-            }
+            if self.history is not None and market_data:
+                with metrics.stage('history_append'):
+                    self.history.append(market_data)
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            return response.json()
+            return market_data
             
         except Exception as e:
             logger.error(f"Error fetching market data: {e}")
             return []
     
+    @metrics.timed('analyze_pairs')
     def analyze_pairs(self, market_data):
         """Analyze pairs based on market data"""
         if not market_data:
             return pd.DataFrame()
         
-        analysis = []
-        for coin in market_data:
-            # Calculate volatility (price change percentage)
-            price_change_24h = abs(coin.get('price_change_percentage_24h', 0)) / 100
-            
-            analysis.append({
-                'symbol': coin['symbol'].upper(),
-                'name': coin['name'],
-                'current_price': coin['current_price'],
-                'market_cap': coin['market_cap'],
-                'volume_24h': coin['total_volume'],
-                'price_change_24h': coin['price_change_percentage_24h'],
-                'volatility': price_change_24h,
-                'market_cap_rank': coin['market_cap_rank']
-            })
-        
-        return pd.DataFrame(analysis)
+        df = pd.DataFrame.from_records(market_data, columns=ANALYSIS_FIELDS).rename(columns=ANALYSIS_COLUMNS)
+        df['symbol'] = df['symbol'].str.upper()
+        # Pair each coin was requested for; whole-market pages only carry a symbol
+        df['pair'] = df['pair'].fillna(df['symbol'] + '/USDT:USDT')
+        df['price_change_24h'] = df['price_change_24h'].fillna(0)
+        # Volatility proxy: absolute 24h price change
+        df['volatility'] = df['price_change_24h'].abs() / 100
+        
+        # Prefer multi-day realized volatility from the snapshot history
+        if self.history is not None:
+            stats = self.history.symbol_statistics(df['symbol'].tolist(), self.history_window)
+            stats_df = pd.DataFrame.from_dict(stats, orient='index',
+                                              columns=['samples', 'realized_volatility', 'volume_trend'])
+            stats_df = stats_df.reindex(df['symbol'].to_numpy())
+            realized = pd.Series(stats_df['realized_volatility'].to_numpy(), index=df.index)
+            df['volume_trend'] = stats_df['volume_trend'].to_numpy()
+            use_realized = (stats_df['samples'].fillna(0).to_numpy() >= 3) & realized.notna()
+            df.loc[use_realized, 'volatility'] = realized[use_realized]
+        
+        # Best source: realized volatility and ATR from downloaded candles
+        if self.ohlcv is not None:
+            pair_of = {symbol.upper(): pair for symbol, pair in zip(self.universe.base, self.universe.pairs)}
+            pairs = df['pair'].where(df['pair'].isin(self.universe.pairs), df['symbol'].map(pair_of))
+            known = pairs.notna().to_numpy()
+            candles = self.ohlcv.get_metrics(pairs[known].tolist())
+            for column in ('realized_volatility', 'atr_pct', 'avg_quote_volume'):
+                values = np.full(len(df), np.nan)
+                values[known] = candles[column]
+                df[column] = values
+            has_candles = df['realized_volatility'].notna()
+            df.loc[has_candles, 'volatility'] = df.loc[has_candles, 'realized_volatility']
+        
+        return df
     
+    @metrics.timed('select_top_pairs')
     def select_top_pairs(self, analysis_df, max_pairs=10):
         """Select top performing pairs based on criteria"""
         if analysis_df.empty:
-            return []
+            return analysis_df
+        if self.ranking is not None:
+            return self.select_top_pairs_incremental(analysis_df, max_pairs)
+        
+        filtered_df = self.apply_criteria(analysis_df)
+        metrics.count('pairs_filtered_out', len(analysis_df) - len(filtered_df))
+        
+        if filtered_df.empty:
+            logger.warning("No pairs passed the criteria")
+            return filtered_df
+        
+        # Calculate composite score, then sort by score and select top pairs
+        return filtered_df.assign(score=self.calculate_score(filtered_df)).nlargest(max_pairs, 'score')
+    
+    def select_top_pairs_incremental(self, analysis_df, max_pairs=10):
+        """
+        Select through self.ranking, keeping incumbents unless a challenger is clearly better
+        
+        Scores use calculate_fixed_score: a min-max normalized score shifts for
+        every pair whenever any pair's volume changes, so only fixed-scale
+        scores can be reused for pairs whose inputs did not change.
+        """
+        columns = ['volume_24h', 'market_cap', 'volatility']
+        
+        def score_rows(rows):
+            df = pd.DataFrame(rows, columns=columns)
+            passed = df.index.isin(self.apply_criteria(df).index)
+            return self.calculate_fixed_score(df).where(passed, -np.inf).to_numpy()
         
         criteria = self.pairs_config['top_50_pairs']['selection_criteria']
+        rows = analysis_df.drop_duplicates('pair')
+        ranked = self.ranking.rank(rows['pair'].tolist(), rows[columns].to_numpy(dtype=np.float64),
+                                   score_rows, max_pairs,
+                                   scoring_key=json.dumps(criteria, sort_keys=True))
+        metrics.count('pairs_filtered_out', len(rows) - self.ranking.eligible)
         
-        # Apply filters
-        filtered_df = analysis_df[
+        if not ranked:
+            logger.warning("No pairs passed the criteria")
+            return analysis_df.iloc[0:0].assign(score=pd.Series(dtype=np.float64))
+        pairs, scores = zip(*ranked)
+        selected = rows.set_index('pair', drop=False).loc[list(pairs)]
+        return selected.assign(score=list(scores)).reset_index(drop=True)
+    
+    def apply_criteria(self, analysis_df):
+        """Rows passing the configured selection criteria"""
+        criteria = self.pairs_config['top_50_pairs']['selection_criteria']
+        return analysis_df[
             (analysis_df['volume_24h'] >= criteria['volume_min']) &
             (analysis_df['market_cap'] >= criteria['market_cap_min']) &
             (analysis_df['volatility'] >= criteria['min_volatility']) &
             (analysis_df['volatility'] <= criteria['max_volatility'])
         ]
-        
-        if filtered_df.empty:
-            logger.warning("No pairs passed the criteria")
-            return []
-        
-        # Calculate composite score
-        filtered_df['score'] = self.calculate_score(filtered_df)
-        
-        # Sort by score and select top pairs
-        top_pairs = filtered_df.nlargest(max_pairs, 'score')
-        
-        return top_pairs
     
+    @metrics.timed('calculate_score')
     def calculate_score(self, df):
         """Calculate composite score for pair ranking"""
-        # Normalize metrics
-        df_norm = df.copy()
+        # Normalize metrics (column arithmetic only, the frame is not copied)
+        volume = df['volume_24h']
+        market_cap = df['market_cap']
         
         # Volume score (higher is better)
-        df_norm['volume_score'] = (df_norm['volume_24h'] - df_norm['volume_24h'].min()) / \
-                                 (df_norm['volume_24h'].max() - df_norm['volume_24h'].min())
+        volume_score = (volume - volume.min()) / (volume.max() - volume.min())
         
         # Market cap score (higher is better)
-        df_norm['market_cap_score'] = (df_norm['market_cap'] - df_norm['market_cap'].min()) / \
-                                     (df_norm['market_cap'].max() - df_norm['market_cap'].min())
+        market_cap_score = (market_cap - market_cap.min()) / (market_cap.max() - market_cap.min())
         
         # Volatility score (optimal range is best)
         optimal_volatility = 0.05  # 5% volatility is optimal
-        df_norm['volatility_score'] = 1 - abs(df_norm['volatility'] - optimal_volatility) / optimal_volatility
+        volatility_score = 1 - (df['volatility'] - optimal_volatility).abs() / optimal_volatility
         
         # Composite score
         score = (
-            df_norm['volume_score'] * 0.4 +
-            df_norm['market_cap_score'] * 0.3 +
-            df_norm['volatility_score'] * 0.3
+            volume_score * 0.4 +
+            market_cap_score * 0.3 +
+            volatility_score * 0.3
         )
         
         return score
     
+    def calculate_fixed_score(self, df):
+        """
+        Composite score on fixed scales (volume and market cap capped, not min-max normalized)
+        
+        A row's score does not depend on the other rows, so it can be computed
+        page by page; calculate_score needs the whole universe first.
+        """
+        volume_score = (df['volume_24h'] / VOLUME_CAP).clip(upper=1.0)
+        market_cap_score = (df['market_cap'] / MARKET_CAP_CAP).clip(upper=1.0)
+        optimal_volatility = 0.05
+        volatility_score = 1 - (df['volatility'] - optimal_volatility).abs() / optimal_volatility
+        return volume_score * 0.4 + market_cap_score * 0.3 + volatility_score * 0.3
+    
+    @metrics.timed('stream_top_pairs')
+    def stream_top_pairs(self, max_pairs=10, pages=None):
+        """
+        Select top pairs while market data pages arrive, holding only the best rows
+        
+        Each page is analyzed, filtered and scored (calculate_fixed_score) on its
+        own and merged into a top-max_pairs buffer, so memory is bounded by
+        max_pairs plus the pages in flight. Pages are not appended to the
+        snapshot history.
+        
+        Args:
+            max_pairs: Number of pairs to select
+            pages: Scan this many pages of the whole listed market instead of the configured universe
+        """
+        pair_of = {}
+        if pages is None:
+            for pair, coin_id in self.id_index.ids_for_pairs(self.get_all_pairs()).items():
+                pair_of.setdefault(coin_id, pair)
+            page_iter = self.fetcher.iter_market_pages_sync(list(pair_of))
+        else:
+            page_iter = self.fetcher.iter_market_pages_sync(pages=pages)
+        
+        top = StreamingTopK(max_pairs)
+        columns = None
+        for page in page_iter:
+            for coin in page:
+                coin['pair'] = pair_of.get(coin.get('id'))
+            analysis = self.analyze_pairs(page)
+            if analysis.empty:
+                continue
+            passed = analysis.index.isin(self.apply_criteria(analysis).index)
+            analysis['score'] = self.calculate_fixed_score(analysis).where(passed, -np.inf)
+            columns = analysis.columns
+            top.push(analysis['score'].to_numpy(), analysis.iloc)
+        
+        metrics.count('pairs_filtered_out', top.seen - top.passed)
+        _, rows = top.result()
+        return pd.DataFrame(rows, columns=columns).infer_objects().reset_index(drop=True)
+    
+    def session(self, max_pairs=10):
+        """Start an analysis session (one fetch, one scoring pass)"""
+        return PairAnalysisSession(self, max_pairs=max_pairs)
+    
+    @metrics.timed('generate_pairlist')
     def generate_pairlist(self, max_pairs=10):
         """Generate a new pairlist for Freqtrade"""
-        all_pairs = self.get_all_pairs()
-        market_data = self.get_market_data(all_pairs)
-        analysis = self.analyze_pairs(market_data)
-        top_pairs = self.select_top_pairs(analysis, max_pairs)
-        
-        if top_pairs.empty:
+        session = self.session(max_pairs)
+        if session.top_pairs.empty:
             logger.error("No pairs selected")
             return []
-        
-        # Convert back to Freqtrade format
-        selected_pairs = []
-        for _, row in top_pairs.iterrows():
-            pair = f"{row['symbol']}/USDT:USDT"
-            selected_pairs.append(pair)
-        
-        return selected_pairs
+        return session.pairlist()
     
     def print_analysis(self, max_pairs=10):
         """Print detailed analysis of selected pairs"""
+        self.session(max_pairs).print_report()
+
+
+class PairAnalysisSession:
+    """
+    One analysis run of a PairManager
+    
+    Market data is fetched once and scored once on first access; the report,
+    the pairlist and any exports all read from that same result.
+    """
+    
+    def __init__(self, manager, max_pairs=10):
+        self.manager = manager
+        self.max_pairs = max_pairs
+        self.timestamp = None
+        self._market_data = None
+        self._analysis = None
+        self._top_pairs = None
+    
+    def run(self):
+        """Fetch and score (only the first call does any work)"""
+        if self._top_pairs is None:
+            self.timestamp = datetime.now()
+            self._market_data = self.manager.get_market_data(self.manager.get_all_pairs())
+            self._analysis = self.manager.analyze_pairs(self._market_data)
+            self._top_pairs = self.manager.select_top_pairs(self._analysis, self.max_pairs)
+        return self
+    
+    @property
+    def market_data(self):
+        return self.run()._market_data
+    
+    @property
+    def analysis(self):
+        """All analyzed coins"""
+        return self.run()._analysis
+    
+    @property
+    def top_pairs(self):
+        """Selected rows with their score, best first"""
+        return self.run()._top_pairs
+    
+    def pairlist(self):
+        """Selected pairs in Freqtrade format"""
+        if self.top_pairs.empty:
+            return []
+        return self.top_pairs['pair'].tolist()
+    
+    @metrics.timed('report_render')
+    def print_report(self):
+        """Print detailed analysis of selected pairs"""
+        top_pairs = self.top_pairs
         print(f"\n{'='*60}")
-        print(f"PAIR ANALYSIS REPORT - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"PAIR ANALYSIS REPORT - {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
         
-        all_pairs = self.get_all_pairs()
-        market_data = self.get_market_data(all_pairs)
-        analysis = self.analyze_pairs(market_data)
-        top_pairs = self.select_top_pairs(analysis, max_pairs)
-        
         if top_pairs.empty:
             print("❌ No pairs passed the selection criteria")
             return
@@ -183,13 +390,15 @@ class PairManager:
         print(f"{'Rank':<4} {'Symbol':<8} {'Name':<20} {'Price':<12} {'Volume':<15} {'Volatility':<12} {'Score':<8}")
         print("-" * 80)
         
-        for i, (_, row) in enumerate(top_pairs.iterrows(), 1):
-            print(f"{i:<4} {row['symbol']:<8} {row['name'][:18]:<20} "
-                  f"${row['current_price']:<11.4f} ${row['volume_24h']/1e6:<14.1f}M "
-                  f"{row['volatility']*100:<11.2f}% {row['score']:<8.3f}")
+        rows = zip(top_pairs['symbol'], top_pairs['name'], top_pairs['current_price'],
+                   top_pairs['volume_24h'], top_pairs['volatility'], top_pairs['score'])
+        for i, (symbol, name, price, volume, volatility, score) in enumerate(rows, 1):
+            print(f"{i:<4} {symbol:<8} {name[:18]:<20} "
+                  f"${price:<11.4f} ${volume/1e6:<14.1f}M "
+                  f"{volatility*100:<11.2f}% {score:<8.3f}")
         
         print(f"\n📈 SUMMARY STATISTICS:")
-        print(f"Total pairs analyzed: {len(analysis)}")
+        print(f"Total pairs analyzed: {len(self.analysis)}")
         print(f"Pairs passing filters: {len(top_pairs)}")
         print(f"Average volume: ${top_pairs['volume_24h'].mean()/1e6:.1f}M")
         print(f"Average volatility: {top_pairs['volatility'].mean()*100:.2f}%")
@@ -197,21 +406,41 @@ class PairManager:
         
         # Category breakdown
         print(f"\n🏷️  CATEGORY BREAKDOWN:")
-        categories = self.pairs_config['top_50_pairs']['categories']
-        for category, pairs in categories.items():
-            category_pairs = [p for p in pairs if p in [f"{row['symbol']}/USDT:USDT" for _, row in top_pairs.iterrows()]]
-            if category_pairs:
-                print(f"{category.replace('_', ' ').title()}: {len(category_pairs)} pairs")
+        for category, count in self.manager.universe.category_counts(self.pairlist()).items():
+            print(f"{category.replace('_', ' ').title()}: {count} pairs")
+    
+    @metrics.timed('file_write')
+    def export(self, output):
+        """Write the selected rows to CSV (.csv) or JSON (anything else)"""
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        top_pairs = self.top_pairs
+        if output.suffix.lower() == '.csv':
+            top_pairs.to_csv(output, index=False)
+            return output
+        
+        document = {
+            'timestamp': self.timestamp.isoformat(),
+            'pairs_analyzed': len(self.analysis),
+            'pairs': self.pairlist(),
+            'rows': json.loads(top_pairs.to_json(orient='records'))
+        }
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        return output
 
 def main():
     """Main function to run pair analysis"""
-    manager = PairManager()
+    logging.basicConfig(level=logging.INFO)
+    ohlcv = OHLCVProvider()
+    manager = PairManager(ohlcv=ohlcv if ohlcv.data_dir.is_dir() else None)
     
-    # Generate and print analysis
-    manager.print_analysis(max_pairs=10)
+    # One fetch and scoring pass feeds both the report and the pairlist
+    session = manager.session(max_pairs=10)
+    session.print_report()
     
     # Generate pairlist for Freqtrade
-    selected_pairs = manager.generate_pairlist(max_pairs=10)
+    selected_pairs = session.pairlist()
     
     if selected_pairs:
         print(f"\n🎯 RECOMMENDED PAIRLIST FOR FREQTRADE:")
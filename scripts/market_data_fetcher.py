@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Market Data Fetcher for Freqtrade Pair Selection
+Asyncio fetch engine for CoinGecko-style /coins/markets endpoints with a
+pooled keep-alive session, chunked ids, concurrent pages and jittered retries
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from request_scheduler import RateLimitedError, RequestScheduler
+
+asyncio = lazy_import('asyncio')
+futures = lazy_import('concurrent.futures')
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+
+
+class MarketDataFetcher:
+    """
+    Concurrent market data fetcher
+
+    Blocking HTTP calls run on a small thread pool sharing one pooled
+    `requests.Session`, so connections are kept alive across requests while
+    asyncio schedules chunks and pages under a concurrency limit.
+    """
+
+    def __init__(self, base_url: str = COINGECKO_API_URL, vs_currency: str = 'usd',
+                 chunk_size: int = 100, per_page: int = 250, concurrency: int = 4,
+                 retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0,
+                 timeout: float = 10.0, scheduler: Optional[RequestScheduler] = None):
+        """
+        Args:
+            base_url: API base URL (point at a local stub server for offline benchmarks)
+            vs_currency: Quote currency for prices and volumes
+            chunk_size: Maximum number of ids per request
+            per_page: Page size requested from the API
+            concurrency: Maximum number of requests in flight
+            retries: Retries per request after the first attempt (429, 5xx and connection errors only)
+            backoff: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound for a single backoff delay
+            timeout: Per-request timeout in seconds
+            scheduler: Rate limiting, coalescing and HTTP caching layer (see request_scheduler)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.vs_currency = vs_currency
+        self.chunk_size = max(1, min(chunk_size, per_page))
+        self.per_page = per_page
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.scheduler = scheduler
+
+        from requests.adapters import HTTPAdapter
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = futures.ThreadPoolExecutor(max_workers=self.concurrency,
+                                                    thread_name_prefix='market-fetch')
+
+        self.requests_made = 0
+        self.requests_failed = 0
+        self.bytes_fetched = 0
+
+    def close(self) -> None:
+        """Close the pooled session and worker threads"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self) -> 'MarketDataFetcher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _get(self, path: str, params: Dict) -> List[Dict]:
+        """Single blocking GET on the pooled session"""
+        self.requests_made += 1
+        metrics.count('api_calls')
+        if self.scheduler is not None:
+            response = self.scheduler.get(self.session, f"{self.base_url}{path}", params, self.timeout)
+            if not response.from_cache:
+                self.bytes_fetched += len(response.body)
+                metrics.count('bytes_fetched', len(response.body))
+            return response.json()
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        self.bytes_fetched += len(response.content)
+        metrics.count('bytes_fetched', len(response.content))
+        return response.json()
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        """Whether a failed request may succeed later (429, 5xx, connection and body errors)"""
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return True
+
+    async def _get_with_retries(self, semaphore: asyncio.Semaphore, path: str,
+                                params: Dict) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(self._executor, self._get, path, params)
+                except (requests.RequestException, RateLimitedError, ValueError) as e:
+                    # Other client errors (400, 401, 404, ...) fail the same way on every attempt
+                    if attempt >= self.retries or not self._retryable(e):
+                        raise
+                    delay = self._retry_delay(attempt)
+                    logger.warning(f"Request failed ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        return []
+
+    def _plan_requests(self, ids: Optional[Sequence[str]], pages: int) -> List[Dict]:
+        """Build the query parameters of every request"""
+        base = {
+            'vs_currency': self.vs_currency,
+            'order': 'market_cap_desc',
+            'per_page': self.per_page,
+            'sparkline': 'false'
+        }
+        if ids is None:
+            return [dict(base, page=page) for page in range(1, pages + 1)]
+
+        plan = []
+        unique_ids = list(dict.fromkeys(ids))
+        for start in range(0, len(unique_ids), self.chunk_size):
+            chunk = unique_ids[start:start + self.chunk_size]
+            for page in range(1, math.ceil(len(chunk) / self.per_page) + 1):
+                plan.append(dict(base, ids=','.join(chunk), page=page))
+        return plan
+
+    async def iter_market_pages(self, ids: Optional[Sequence[str]] = None,
+                                pages: int = 1) -> AsyncIterator[List[Dict]]:
+        """
+        Yield market data pages as they complete
+
+        Args:
+            ids: CoinGecko ids to fetch (chunked), or None to page through the whole market
+            pages: Number of pages to fetch when ids is None
+        """
+        plan = iter(self._plan_requests(ids, pages))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Only a bounded window of requests is scheduled, so completed pages
+        # waiting for a slow consumer stay at about 2 * concurrency
+        window = 2 * self.concurrency
+        pending = set()
+        try:
+            while True:
+                while len(pending) < window:
+                    params = next(plan, None)
+                    if params is None:
+                        break
+                    pending.add(asyncio.ensure_future(
+                        self._get_with_retries(semaphore, '/coins/markets', params)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        page = task.result()
+                    except Exception as e:
+                        # A failed chunk only drops its own coins, not the whole result
+                        self.requests_failed += 1
+                        metrics.count('api_errors')
+                        logger.error(f"Error fetching market data page: {e}")
+                        continue
+                    yield page
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def iter_market_pages_sync(self, ids: Optional[Sequence[str]] = None,
+                               pages: int = 1) -> Iterator[List[Dict]]:
+        """
+        Blocking generator over iter_market_pages
+
+        Pages arrive in completion order; see iter_market_pages for the bound
+        on pages held in memory.
+        """
+        loop = asyncio.new_event_loop()
+        agen = self.iter_market_pages(ids, pages)
+        try:
+            while True:
+                try:
+                    page = loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield page
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+
+    async def fetch_markets(self, ids: Optional[Sequence[str]] = None,
+                            pages: int = 1) -> List[Dict]:
+        """Fetch and merge market data, ordered by market cap (descending)"""
+        merged = {}
+        async for page in self.iter_market_pages(ids, pages):
+            for coin in page:
+                merged.setdefault(coin.get('id'), coin)
+        return sorted(merged.values(), key=lambda c: c.get('market_cap') or 0, reverse=True)
+
+    def fetch_markets_sync(self, ids: Optional[Sequence[str]] = None,
+                           pages: int = 1) -> List[Dict]:
+        """Blocking wrapper around fetch_markets for synchronous callers"""
+        return asyncio.run(self.fetch_markets(ids, pages))
+
+    def fetch_coin_list(self) -> List[Dict]:
+        """Every listed coin as {'id', 'symbol', 'name'} (one bulk /coins/list request, with retries)"""
+        async def fetch():
+            return await self._get_with_retries(asyncio.Semaphore(1), '/coins/list', {})
+        return asyncio.run(fetch())
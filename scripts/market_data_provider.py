@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Market Data Providers for Freqtrade Pair Selection
+One batch interface for market snapshots, with simulated, CoinGecko, file and
+replay (market history) sources
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import logging
+
+from lazy_imports import lazy_import
+from pair_universe import split_pair
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Columns of every snapshot, one float per requested pair (NaN when unknown)
+SNAPSHOT_FIELDS = ('price', 'volume_24h', 'market_cap', 'price_change_24h', 'volatility')
+
+
+def empty_snapshot(n: int) -> Dict[str, np.ndarray]:
+    """Snapshot of n unknown pairs"""
+    return {field: np.full(n, np.nan) for field in SNAPSHOT_FIELDS}
+
+
+def snapshot_from_coins(pairs: Sequence[str], coins: Sequence[Dict],
+                        ids: Optional[Dict[str, str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Align CoinGecko-style market entries with pairs
+
+    Volatility is the absolute 24h price change as a fraction.
+
+    Args:
+        pairs: Pairs to align with
+        coins: Market entries
+        ids: CoinGecko id of each pair; entries are then matched by id instead
+            of base symbol, which several coins may share
+    """
+    if ids is not None:
+        by_id = {coin.get('id'): coin for coin in coins}
+        rows = [by_id.get(ids.get(pair)) for pair in pairs]
+    else:
+        by_symbol = {}
+        for coin in coins:
+            symbol = str(coin.get('symbol') or '').upper()
+            if symbol:
+                by_symbol.setdefault(symbol, coin)
+        rows = [by_symbol.get(split_pair(pair)[0]) for pair in pairs]
+
+    def column(key: str) -> np.ndarray:
+        return np.array([(row.get(key) if row else None) for row in rows], dtype=np.float64)
+
+    change = column('price_change_percentage_24h') / 100
+    return {
+        'price': column('current_price'),
+        'volume_24h': column('total_volume'),
+        'market_cap': column('market_cap'),
+        'price_change_24h': change,
+        'volatility': np.abs(change)
+    }
+
+
+def coins_from_snapshot(pairs: Sequence[str], snapshot: Dict[str, np.ndarray]) -> List[Dict]:
+    """CoinGecko-style market entries of the known pairs, ranked by market cap"""
+    market_cap = snapshot['market_cap']
+    order = np.argsort(-np.nan_to_num(market_cap, nan=-np.inf), kind='stable')
+    rank = np.empty(len(pairs), dtype=np.int64)
+    rank[order] = np.arange(1, len(pairs) + 1)
+    coins = []
+    for i, pair in enumerate(pairs):
+        if np.isnan(snapshot['volume_24h'][i]):
+            continue
+        symbol = split_pair(pair)[0]
+        coins.append({
+            'pair': pair,
+            'id': symbol.lower(),
+            'symbol': symbol.lower(),
+            'name': symbol.title(),
+            'current_price': float(snapshot['price'][i]),
+            'market_cap': float(market_cap[i]),
+            'market_cap_rank': int(rank[i]),
+            'total_volume': float(snapshot['volume_24h'][i]),
+            'price_change_percentage_24h': float(snapshot['price_change_24h'][i] * 100)
+        })
+    return coins
+
+
+class MarketDataProvider:
+    """
+    Source of market snapshots
+
+    Subclasses implement get_snapshot. `cache_key` identifies snapshots that
+    may be cached by selectors (None means always ask the provider).
+    """
+
+    name = 'provider'
+
+    @property
+    def cache_key(self) -> Optional[str]:
+        return None
+
+    def get_snapshot(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Market data for pairs as columnar arrays (SNAPSHOT_FIELDS, NaN when unknown)"""
+        raise NotImplementedError
+
+    def get_markets(self, pairs: Sequence[str]) -> List[Dict]:
+        """Market data for pairs as CoinGecko-style entries (unknown pairs are left out)"""
+        return coins_from_snapshot(pairs, self.get_snapshot(pairs))
+
+
+class SimulatedMarketData(MarketDataProvider):
+    """
+    Whole snapshots drawn from a NumPy Generator
+
+    The same seed gives the same sequence of snapshots; seed=None draws fresh
+    entropy. Distributions match the selectors' former inline simulation.
+    Every call draws a new snapshot, so snapshots are never cached (a cached
+    one would freeze the sequence).
+    """
+
+    name = 'simulated'
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def get_snapshot(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        n = len(pairs)
+        volume = self.rng.uniform(5_000_000, 500_000_000, n)
+        market_cap = volume * self.rng.uniform(50, 500, n)
+        price_change = self.rng.uniform(-0.2, 0.2, n)
+        return {
+            'price': self.rng.uniform(0.01, 50_000, n),
+            'volume_24h': volume,
+            'market_cap': market_cap,
+            'price_change_24h': price_change,
+            'volatility': np.abs(price_change)
+        }
+
+
+class CoinGeckoMarketData(MarketDataProvider):
+    """
+    Snapshots from the CoinGecko /coins/markets endpoint
+
+    Pairs are mapped to CoinGecko ids through a CoinIdIndex, and every market
+    entry returned carries the 'pair' it was requested for.
+
+    Args:
+        fetcher: MarketDataFetcher to use (created from base_url on first use if omitted)
+        base_url: API base URL
+        id_index: CoinIdIndex to use (created on the fetcher on first use if omitted)
+    """
+
+    name = 'coingecko'
+
+    def __init__(self, fetcher=None, base_url: Optional[str] = None, id_index=None):
+        self._fetcher = fetcher
+        self.base_url = base_url
+        self._id_index = id_index
+
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            from market_data_fetcher import COINGECKO_API_URL, MarketDataFetcher
+            from request_scheduler import RequestScheduler
+            self._fetcher = MarketDataFetcher(base_url=self.base_url or COINGECKO_API_URL,
+                                              scheduler=RequestScheduler.shared())
+        return self._fetcher
+
+    @property
+    def id_index(self):
+        if self._id_index is None:
+            from coingecko_ids import CoinIdIndex, default_cache_file
+            self._id_index = CoinIdIndex(self.fetcher, cache_file=default_cache_file(self.fetcher.base_url))
+        return self._id_index
+
+    def coin_ids(self, pairs: Sequence[str]) -> Dict[str, str]:
+        """CoinGecko id of every pair whose base symbol is listed"""
+        return self.id_index.ids_for_pairs(pairs)
+
+    def coin_id(self, pair: str) -> Optional[str]:
+        """CoinGecko id requested for a pair (None when not listed)"""
+        return self.coin_ids([pair]).get(pair)
+
+    def _fetch(self, pairs: Sequence[str]):
+        ids = self.coin_ids(pairs)
+        # Pairs sharing a base symbol share one id, requested once
+        pair_of = {}
+        for pair, coin_id in ids.items():
+            pair_of.setdefault(coin_id, pair)
+        coins = self.fetcher.fetch_markets_sync(list(pair_of))
+        for coin in coins:
+            coin['pair'] = pair_of.get(coin.get('id'))
+        return ids, coins
+
+    def get_markets(self, pairs: Sequence[str]) -> List[Dict]:
+        return self._fetch(pairs)[1]
+
+    def get_snapshot(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        ids, coins = self._fetch(pairs)
+        return snapshot_from_coins(pairs, coins, ids)
+
+
+class FileMarketData(MarketDataProvider):
+    """
+    Snapshots from a local file, re-read when it changes
+
+    Accepts a JSON list of CoinGecko-style entries (a saved /coins/markets
+    response or synthetic_universe output) or a CSV with the same columns.
+    Snapshots are cached under the file's path, mtime and size, so selectors
+    ask again as soon as the file is rewritten.
+    """
+
+    name = 'file'
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._coins: List[Dict] = []
+        self._version = None
+
+    def _stat(self):
+        st = self.path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    @property
+    def cache_key(self) -> Optional[str]:
+        try:
+            mtime, size = self._stat()
+        except OSError:
+            return None
+        return f"file:{self.path.resolve()}:{mtime}:{size}"
+
+    def _load(self) -> List[Dict]:
+        version = self._stat()
+        if version != self._version:
+            if self.path.suffix.lower() == '.csv':
+                with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                    coins = [{key: _csv_value(value) for key, value in row.items()} for row in csv.DictReader(f)]
+            else:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    coins = json.load(f)
+            self._coins, self._version = coins, version
+        return self._coins
+
+    def get_markets(self, pairs: Sequence[str]) -> List[Dict]:
+        wanted = {split_pair(pair)[0] for pair in pairs}
+        return [coin for coin in self._load() if str(coin.get('symbol') or '').upper() in wanted]
+
+    def get_snapshot(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        return snapshot_from_coins(pairs, self._load())
+
+
+def _csv_value(value: str):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value or None
+
+
+class ReplayMarketData(MarketDataProvider):
+    """
+    Replays recorded snapshots from a MarketHistoryStore, one per call
+
+    24h price change is measured against the latest recorded snapshot at least
+    24h older (or the first one). After the last snapshot the replay stays
+    there unless loop is set. Every call moves the replay on, so snapshots
+    are never cached (a cached one would stall it).
+
+    Args:
+        store: MarketHistoryStore (or its root directory)
+        start: First snapshot time (epoch seconds or datetime)
+        end: Last snapshot time
+        loop: Start over after the last snapshot
+    """
+
+    name = 'replay'
+
+    def __init__(self, store, start=None, end=None, loop: bool = False):
+        if not hasattr(store, 'read'):
+            from market_history import MarketHistoryStore
+            store = MarketHistoryStore(store)
+        self.store = store
+        self.loop = loop
+        rows = store.read(start, end)
+        rows = rows[np.argsort(rows['timestamp'], kind='stable')]
+        self._rows = rows
+        self.timestamps, self._starts = np.unique(rows['timestamp'], return_index=True)
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(store.symbols)}
+        self._id_space = max(len(self._symbol_ids), int(rows['symbol_id'].max()) + 1 if len(rows) else 1)
+        self.position = -1
+        if not len(self.timestamps):
+            logger.warning("Market history replay has no snapshots in range")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def timestamp(self) -> Optional[int]:
+        """Time of the snapshot returned last"""
+        return int(self.timestamps[self.position]) if self.position >= 0 else None
+
+    def reset(self) -> None:
+        self.position = -1
+
+    def _prices(self, position: int, sids: np.ndarray) -> Dict[str, np.ndarray]:
+        begin = self._starts[position]
+        end = self._starts[position + 1] if position + 1 < len(self._starts) else len(self._rows)
+        rows = self._rows[begin:end]
+        # Row of every requested symbol in this snapshot (-1 when not recorded)
+        lookup = np.full(self._id_space, -1, dtype=np.int64)
+        lookup[rows['symbol_id']] = np.arange(len(rows))
+        index = np.where(sids >= 0, lookup[np.maximum(sids, 0)], -1)
+        known = index >= 0
+
+        def column(name: str) -> np.ndarray:
+            return np.where(known, rows[name][np.maximum(index, 0)], np.nan)
+
+        return {'price': column('price'), 'volume_24h': column('volume'), 'market_cap': column('market_cap')}
+
+    def get_snapshot(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not len(self.timestamps):
+            return empty_snapshot(len(pairs))
+        if self.position + 1 < len(self.timestamps):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+
+        sids = np.array([self._symbol_ids.get(split_pair(pair)[0], -1) for pair in pairs], dtype=np.int64)
+        snapshot = self._prices(self.position, sids)
+        ts = self.timestamps[self.position]
+        earlier = max(0, int(np.searchsorted(self.timestamps, ts - 86400, side='right')) - 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = snapshot['price'] / self._prices(earlier, sids)['price'] - 1
+        snapshot['price_change_24h'] = change
+        snapshot['volatility'] = np.abs(change)
+        return snapshot
+
+
+def make_provider(spec: str, seed: Optional[int] = None) -> MarketDataProvider:
+    """
+    Build a provider from a CLI spec
+
+    'simulated' (seeded with seed), 'coingecko' or 'coingecko:<base url>',
+    'file:<path>' and 'replay:<history dir>'.
+    """
+    kind, _, arg = spec.partition(':')
+    if kind == 'simulated':
+        return SimulatedMarketData(int(arg) if arg else seed)
+    if kind == 'coingecko':
+        return CoinGeckoMarketData(base_url=arg or None)
+    if kind == 'file' and arg:
+        return FileMarketData(arg)
+    if kind == 'replay':
+        return ReplayMarketData(arg or "user_data/market_history")
+    raise ValueError(f"Unknown market data source: {spec!r}")
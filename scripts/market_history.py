@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Market History Store for Freqtrade Pair Selection
+Append-only, chunked columnar store of market snapshots backed by
+memory-mapped NumPy files
+
+Usage:
+    python scripts/market_history.py --compact
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import logging
+
+from lazy_imports import lazy_import
+from selection_cache import file_lock
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Field spec of the structured rows (np.dtype accepts it as-is)
+HISTORY_DTYPE = [
+    ('timestamp', '<i8'),
+    ('symbol_id', '<i4'),
+    ('rank', '<i4'),
+    ('price', '<f8'),
+    ('volume', '<f8'),
+    ('market_cap', '<f8'),
+]
+
+_CHUNK_RE = re.compile(r'^chunk-(\d+)-(\d+)-(\w+)\.npy$')
+
+
+def _to_epoch(value: Union[None, int, float, datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+class MarketHistoryStore:
+    """
+    Local history of market snapshots
+
+    Every append writes one immutable chunk file named after its time range,
+    so time-range reads only open (memory-map) the chunks that overlap.
+    `compact` merges small old chunks into one chunk per day; append runs it
+    whenever the store holds more than `compact_threshold` chunks.
+
+    Args:
+        root: Store directory
+        compact_threshold: Chunk count above which append compacts (None disables)
+        compact_after: Age after which chunks are merged by append's compaction
+    """
+
+    def __init__(self, root: Union[str, Path] = "user_data/market_history",
+                 compact_threshold: Optional[int] = 64, compact_after: timedelta = timedelta(days=1)):
+        self.root = Path(root)
+        self.compact_threshold = compact_threshold
+        self.compact_after = compact_after
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._symbols_file = self.root / "symbols.json"
+        self._lock_file = self.root / ".lock"
+        self._symbols = []
+        self._symbol_ids = {}
+        self._symbols_mtime = None
+
+    # ------------------------------------------------------------------
+    # Symbol dictionary
+    # ------------------------------------------------------------------
+
+    def _load_symbols(self) -> None:
+        try:
+            mtime = self._symbols_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._symbols_mtime:
+            return
+        with open(self._symbols_file, 'r', encoding='utf-8') as f:
+            self._symbols = json.load(f)
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._symbols_mtime = mtime
+
+    def _intern_symbols(self, symbols: Iterable[str]) -> np.ndarray:
+        """Map symbols to ids, extending the dictionary (caller holds the lock)"""
+        self._load_symbols()
+        ids = []
+        added = False
+        for symbol in symbols:
+            symbol_id = self._symbol_ids.get(symbol)
+            if symbol_id is None:
+                symbol_id = len(self._symbols)
+                self._symbols.append(symbol)
+                self._symbol_ids[symbol] = symbol_id
+                added = True
+            ids.append(symbol_id)
+        if added:
+            self._atomic_write(self._symbols_file, json.dumps(self._symbols).encode('utf-8'))
+            self._symbols_mtime = self._symbols_file.stat().st_mtime_ns
+        return np.asarray(ids, dtype=np.int32)
+
+    def symbol_ids(self, symbols: Sequence[str]) -> np.ndarray:
+        """Get ids of known symbols (unknown symbols map to -1)"""
+        self._load_symbols()
+        return np.asarray([self._symbol_ids.get(s.upper(), -1) for s in symbols], dtype=np.int32)
+
+    @property
+    def symbols(self) -> List[str]:
+        self._load_symbols()
+        return list(self._symbols)
+
+    # ------------------------------------------------------------------
+    # Chunk files
+    # ------------------------------------------------------------------
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _write_chunk(self, rows: np.ndarray) -> Path:
+        start, end = int(rows['timestamp'].min()), int(rows['timestamp'].max())
+        path = self.root / f"chunk-{start:012d}-{end:012d}-{os.urandom(4).hex()}.npy"
+        buffer = io.BytesIO()
+        np.save(buffer, rows, allow_pickle=False)
+        self._atomic_write(path, buffer.getvalue())
+        return path
+
+    def chunks(self, start: Optional[int] = None, end: Optional[int] = None) -> List[Path]:
+        """List chunk files overlapping [start, end], oldest first"""
+        selected = []
+        for path in self.root.iterdir():
+            match = _CHUNK_RE.match(path.name)
+            if not match:
+                continue
+            chunk_start, chunk_end = int(match.group(1)), int(match.group(2))
+            if start is not None and chunk_end < start:
+                continue
+            if end is not None and chunk_start > end:
+                continue
+            selected.append((chunk_start, path))
+        selected.sort()
+        return [path for _, path in selected]
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def append(self, market_data: List[Dict], timestamp: Union[None, int, datetime] = None) -> int:
+        """
+        Append a CoinGecko /coins/markets snapshot
+
+        Args:
+            market_data: List of coin dicts (symbol, current_price, total_volume, ...)
+            timestamp: Snapshot time (defaults to now)
+
+        Returns:
+            Number of rows written
+        """
+        coins = [coin for coin in market_data if coin.get('symbol')]
+        if not coins:
+            return 0
+        ts = _to_epoch(timestamp) if timestamp is not None else int(time.time())
+
+        rows = np.empty(len(coins), dtype=HISTORY_DTYPE)
+        rows['timestamp'] = ts
+        rows['rank'] = [coin.get('market_cap_rank') or -1 for coin in coins]
+        rows['price'] = [coin.get('current_price') or np.nan for coin in coins]
+        rows['volume'] = [coin.get('total_volume') or np.nan for coin in coins]
+        rows['market_cap'] = [coin.get('market_cap') or np.nan for coin in coins]
+
+        with file_lock(self._lock_file):
+            rows['symbol_id'] = self._intern_symbols(coin['symbol'].upper() for coin in coins)
+            self._write_chunk(rows)
+            n_chunks = len(self.chunks())
+        if self.compact_threshold is not None and n_chunks > self.compact_threshold:
+            self.compact(self.compact_after)
+        return len(rows)
+
+    def read(self, start: Union[None, int, datetime] = None, end: Union[None, int, datetime] = None,
+             symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Read snapshot rows in a time range, optionally restricted to symbols
+
+        Chunks are listed and copied under the store lock, so a concurrent
+        compaction never shows both a merged chunk and its originals (or
+        removes a chunk between listing and loading).
+
+        Returns:
+            Structured array with HISTORY_DTYPE fields, ordered by chunk time
+        """
+        start, end = _to_epoch(start), _to_epoch(end)
+        wanted = self.symbol_ids(symbols) if symbols is not None else None
+        parts = []
+        with file_lock(self._lock_file):
+            for path in self.chunks(start, end):
+                rows = np.load(path, mmap_mode='r', allow_pickle=False)
+                mask = np.ones(len(rows), dtype=bool)
+                if start is not None:
+                    mask &= rows['timestamp'] >= start
+                if end is not None:
+                    mask &= rows['timestamp'] <= end
+                if wanted is not None:
+                    mask &= np.isin(rows['symbol_id'], wanted)
+                if mask.any():
+                    parts.append(np.asarray(rows[mask]))
+        if not parts:
+            return np.empty(0, dtype=HISTORY_DTYPE)
+        return np.concatenate(parts)
+
+    def compact(self, older_than: timedelta = timedelta(days=1)) -> int:
+        """
+        Merge chunks older than the cutoff into one chunk per UTC day
+
+        Returns:
+            Number of chunk files removed
+        """
+        cutoff = int(time.time() - older_than.total_seconds())
+        removed = 0
+        with file_lock(self._lock_file):
+            by_day = {}
+            for path in self.chunks(end=cutoff):
+                match = _CHUNK_RE.match(path.name)
+                if int(match.group(2)) > cutoff:
+                    continue
+                day = int(match.group(1)) // 86400
+                by_day.setdefault(day, []).append(path)
+
+            for day, paths in by_day.items():
+                if len(paths) < 2:
+                    continue
+                rows = np.concatenate([np.load(p, allow_pickle=False) for p in paths])
+                rows = rows[np.argsort(rows['timestamp'], kind='stable')]
+                self._write_chunk(rows)
+                for path in paths:
+                    path.unlink(missing_ok=True)
+                removed += len(paths)
+        if removed:
+            logger.info(f"Compacted {removed} history chunks")
+        return removed
+
+    def symbol_statistics(self, symbols: Sequence[str],
+                          window: timedelta = timedelta(days=7)) -> Dict[str, Dict[str, float]]:
+        """
+        Compute multi-day realized volatility and volume trend per symbol
+
+        Realized volatility is the daily-equivalent root of summed squared log
+        returns between snapshots. Volume trend is the mean volume of the newer
+        half of the symbol's observed span relative to the older half, minus one.
+        """
+        now = int(time.time())
+        start = now - int(window.total_seconds())
+        rows = self.read(start=start, symbols=symbols)
+        if len(rows) == 0:
+            return {}
+
+        order = np.lexsort((rows['timestamp'], rows['symbol_id']))
+        rows = rows[order]
+        sid, ts = rows['symbol_id'], rows['timestamp']
+        log_price = np.log(rows['price'])
+
+        # Log returns within each symbol group (first row of a group has no return)
+        same = np.empty(len(rows), dtype=bool)
+        same[0] = False
+        same[1:] = sid[1:] == sid[:-1]
+        returns = np.where(same, np.diff(log_price, prepend=np.nan), 0.0)
+        returns = np.nan_to_num(returns)
+
+        group_start = np.flatnonzero(~same)
+        group_end = np.append(group_start[1:], len(rows))
+        sq_sum = np.add.reduceat(returns ** 2, group_start)
+        span_days = (ts[group_end - 1] - ts[group_start]) / 86400
+
+        # Split each symbol's own observed span in half
+        group = np.cumsum(~same) - 1
+        midpoint = (ts[group_start] + ts[group_end - 1]) / 2
+        volume = np.nan_to_num(rows['volume'])
+        newer = ts > midpoint[group]
+        new_sum = np.add.reduceat(np.where(newer, volume, 0.0), group_start)
+        new_cnt = np.add.reduceat(newer.astype(np.int64), group_start)
+        old_sum = np.add.reduceat(np.where(newer, 0.0, volume), group_start)
+        old_cnt = np.add.reduceat((~newer).astype(np.int64), group_start)
+
+        stats = {}
+        symbol_names = self.symbols
+        for g, first in enumerate(group_start.tolist()):
+            samples = int(group_end[g] - first)
+            realized = float(np.sqrt(sq_sum[g] / span_days[g])) if span_days[g] > 0 else float('nan')
+            if new_cnt[g] and old_cnt[g] and old_sum[g] > 0:
+                trend = float((new_sum[g] / new_cnt[g]) / (old_sum[g] / old_cnt[g]) - 1)
+            else:
+                trend = float('nan')
+            stats[symbol_names[sid[first]]] = {
+                'samples': samples,
+                'realized_volatility': realized,
+                'volume_trend': trend
+            }
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    """Show or compact a market history store"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Inspect or compact the market snapshot history")
+    parser.add_argument('--root', default="user_data/market_history", help="Store directory")
+    parser.add_argument('--compact', action='store_true', help="Merge old chunks into one chunk per day")
+    parser.add_argument('--older-than', type=float, default=24.0,
+                        help="Hours after which chunks are merged by --compact")
+    args = parser.parse_args(argv)
+
+    store = MarketHistoryStore(args.root, compact_threshold=None)
+    if args.compact:
+        before = len(store.chunks())
+        removed = store.compact(timedelta(hours=args.older_than))
+        merged = removed - (before - len(store.chunks()))
+        print(f"\n🗜️  Merged {removed} chunks into {merged}")
+    print(f"\n📦 {args.root}: {len(store.chunks())} chunks, {len(store.symbols)} symbols")
+
+
+if __name__ == "__main__":
+    main()
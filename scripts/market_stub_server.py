@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Market Stub Server for offline benchmarks
+Local stand-in for the CoinGecko /coins/markets and /coins/list endpoints with
+configurable latency, failure rate, rate limiting (429) and HTTP caching headers
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_coin(coin_id: str, rank: int, seed: int = 0) -> Dict:
+    """Build a deterministic CoinGecko-style market entry for a coin id"""
+    rng = random.Random(f"{seed}:{coin_id}")
+    volume = rng.uniform(5_000_000, 500_000_000)
+    price = rng.uniform(0.01, 50_000)
+    return {
+        'id': coin_id,
+        'symbol': coin_id.split('-')[0][:10],
+        'name': coin_id.replace('-', ' ').title(),
+        'current_price': price,
+        'market_cap': volume * rng.uniform(50, 500),
+        'market_cap_rank': rank,
+        'total_volume': volume,
+        'price_change_percentage_24h': rng.uniform(-20, 20)
+    }
+
+
+class MarketStubServer:
+    """
+    Threaded HTTP server serving synthetic market data
+
+    With rate_limit set, requests beyond `burst` within a 1/rate_limit
+    refill are answered with 429 and a Retry-After header. Responses carry an
+    ETag (If-None-Match gets a 304) and Cache-Control max-age when max_age > 0.
+
+    Usage:
+        with MarketStubServer(latency=0.05, failure_rate=0.1) as stub:
+            fetcher = MarketDataFetcher(base_url=stub.url)
+    """
+
+    def __init__(self, coins: Optional[List[Dict]] = None, universe_size: int = 500,
+                 latency: float = 0.0, failure_rate: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 0,
+                 rate_limit: float = 0.0, burst: int = 1, max_age: int = 0):
+        if coins is None:
+            coins = [synthetic_coin(f"coin{i}", i + 1, seed) for i in range(universe_size)]
+        self.coins = sorted(coins, key=lambda c: c.get('market_cap') or 0, reverse=True)
+        self.by_id = {coin['id']: coin for coin in self.coins}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.rate_limit = rate_limit
+        self.burst = max(1, burst)
+        self.max_age = max_age
+        self.request_count = 0
+        self.throttled_count = 0
+        self.not_modified_count = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MarketStubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MarketStubServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _take_token(self) -> float:
+        """Consume a request token (caller holds the lock); returns seconds to wait if none"""
+        if not self.rate_limit:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate_limit
+
+    def markets(self, query: Dict[str, List[str]]) -> List[Dict]:
+        """Answer a /coins/markets query"""
+        per_page = int(query.get('per_page', ['100'])[0])
+        page = int(query.get('page', ['1'])[0])
+        if 'ids' in query:
+            ids = query['ids'][0].split(',')
+            # Unknown ids are silently dropped, like the real API
+            coins = [self.by_id[i] for i in ids if i in self.by_id]
+        else:
+            coins = self.coins
+        start = (page - 1) * per_page
+        return coins[start:start + per_page]
+
+    def coin_list(self) -> List[Dict]:
+        """Answer a /coins/list query"""
+        return [{'id': coin['id'], 'symbol': coin['symbol'], 'name': coin.get('name', '')}
+                for coin in self.coins]
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    wait = stub._take_token()
+                    if wait:
+                        stub.throttled_count += 1
+                    fail = stub._rng.random() < stub.failure_rate
+                if wait:
+                    self._send_json(429, {'error': 'rate limited'}, {'Retry-After': f"{wait:.3f}"})
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if fail:
+                    self._send_json(503, {'error': 'stub failure'})
+                    return
+
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                if parsed.path.endswith('/coins/markets'):
+                    payload = stub.markets(query)
+                elif parsed.path.endswith('/coins/list'):
+                    payload = stub.coin_list()
+                else:
+                    self._send_json(404, {'error': 'not found'})
+                    return
+
+                etag = '"' + hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()[:16] + '"'
+                headers = {'ETag': etag, 'Cache-Control': f"public, max-age={stub.max_age}"}
+                if self.headers.get('If-None-Match') == etag:
+                    with stub._lock:
+                        stub.not_modified_count += 1
+                    self.send_response(304)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self._send_json(200, payload, headers)
+
+        return Handler
+
+
+def main():
+    """Run the stub server in the foreground"""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Local market data stub server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--universe-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Requests per second before 429s (0: unlimited)")
+    parser.add_argument('--burst', type=int, default=1, help="Requests allowed back to back under --rate-limit")
+    parser.add_argument('--max-age', type=int, default=0, help="Cache-Control max-age of responses")
+    args = parser.parse_args()
+
+    stub = MarketStubServer(universe_size=args.universe_size, latency=args.latency,
+                            failure_rate=args.failure_rate, port=args.port,
+                            rate_limit=args.rate_limit, burst=args.burst, max_age=args.max_age)
+    print(f"🚀 Market stub server listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n👋 Goodbye!")
+    finally:
+        stub._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
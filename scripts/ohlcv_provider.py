@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+OHLCV Data Provider for Freqtrade Pair Selection
+Reads candles downloaded by Freqtrade (user_data/data/<exchange>/futures) and
+computes realized volatility, ATR and average quote volume for a whole universe
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+METRICS_FORMAT = "ohlcv-metrics"
+METRICS_FORMAT_VERSION = 1
+
+# Freqtrade data formats, in lookup order
+DATA_SUFFIXES = ('.feather', '.parquet', '.json', '.json.gz')
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+METRIC_NAMES = ('candles', 'last_close', 'price_change_24h', 'realized_volatility',
+                'atr', 'atr_pct', 'avg_quote_volume', 'quote_volume_24h')
+
+_TIMEFRAME_MINUTES = {'m': 1, 'h': 60, 'd': 1440, 'w': 10080}
+_ROW_BOUNDARY_RE = re.compile(rb'\]\s*,\s*\[')
+
+
+def timeframe_minutes(timeframe: str) -> int:
+    """Length of a Freqtrade timeframe (5m, 1h, 1d, ...) in minutes"""
+    return int(timeframe[:-1]) * _TIMEFRAME_MINUTES[timeframe[-1]]
+
+
+def pair_to_filename(pair: str) -> str:
+    """Freqtrade file stem of a pair (BTC/USDT:USDT -> BTC_USDT_USDT)"""
+    return pair.replace('/', '_').replace(':', '_').replace(' ', '_')
+
+
+def _read_arrow(path: Path, n: int) -> Dict[str, np.ndarray]:
+    # Memory-mapped; slicing the tail and converting single-chunk columns is zero-copy
+    try:
+        import pyarrow.feather as feather
+        import pyarrow.parquet as parquet
+    except ImportError as e:
+        raise RuntimeError(f"pyarrow is required to read {path.suffix} files") from e
+    columns = ['date', *OHLCV_COLUMNS]
+    if path.suffix == '.feather':
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = parquet.read_table(path, columns=columns, memory_map=True)
+    table = table.slice(max(0, table.num_rows - n))
+    candles = {name: table.column(name).to_numpy() for name in OHLCV_COLUMNS}
+    candles['date'] = table.column('date').to_numpy().astype('datetime64[ms]').astype(np.int64)
+    return candles
+
+
+def _read_json_tail(path: Path, n: int) -> list:
+    # Parse only the end of [[ts, o, h, l, c, v], ...], growing the window until it holds n rows
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        window = min(size, n * 128)
+        while True:
+            f.seek(size - window)
+            tail = f.read(window)
+            if window == size:
+                return json.loads(tail)[-n:]
+            boundary = _ROW_BOUNDARY_RE.search(tail)
+            if boundary is not None:
+                rows = json.loads(b'[' + tail[boundary.end() - 1:])
+                if len(rows) >= n:
+                    return rows[-n:]
+            window = min(size, window * 2)
+
+
+def _read_json(path: Path, n: int) -> Dict[str, np.ndarray]:
+    if path.name.endswith('.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            rows = json.load(f)[-n:]
+    else:
+        rows = _read_json_tail(path, n)
+    values = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+    candles = {name: values[:, i + 1] for i, name in enumerate(OHLCV_COLUMNS)}
+    candles['date'] = values[:, 0].astype(np.int64)
+    return candles
+
+
+def read_candles(path: Union[str, Path], n: int) -> Dict[str, np.ndarray]:
+    """Read the last n candles of a Freqtrade data file as column arrays (date in epoch ms)"""
+    path = Path(path)
+    if path.suffix in ('.feather', '.parquet'):
+        return _read_arrow(path, n)
+    return _read_json(path, n)
+
+
+def compute_metrics(candles: Sequence[Dict[str, np.ndarray]], candles_per_day: int,
+                    volatility_window: int, atr_window: int, volume_window: int) -> Dict[str, np.ndarray]:
+    """
+    Compute metrics for many pairs at once
+
+    Candle tails are right-aligned into (pairs, window) matrices padded with
+    NaN, so every metric is one nan-aware reduction along the time axis.
+
+    Returns:
+        Arrays (one value per pair, NaN where there is not enough data) for
+        every name in METRIC_NAMES
+    """
+    n_pairs = len(candles)
+    width = max(volatility_window, atr_window, volume_window, candles_per_day) + 1
+    matrix = {name: np.full((n_pairs, width), np.nan) for name in OHLCV_COLUMNS}
+    lengths = np.zeros(n_pairs, dtype=np.int64)
+    for i, columns in enumerate(candles):
+        length = min(len(columns['close']), width)
+        lengths[i] = length
+        if length:
+            for name in OHLCV_COLUMNS:
+                matrix[name][i, width - length:] = columns[name][-length:]
+
+    close, high, low, volume = matrix['close'], matrix['high'], matrix['low'], matrix['volume']
+    previous_close = close[:, :-1]
+    result = {'candles': lengths.astype(np.float64), 'last_close': close[:, -1]}
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['price_change_24h'] = close[:, -1] / close[:, -1 - candles_per_day] - 1.0
+
+        returns = np.diff(np.log(close[:, -volatility_window - 1:]), axis=1)
+        valid = np.count_nonzero(~np.isnan(returns), axis=1)
+        realized = np.sqrt(np.nansum((returns - _nanmean(returns)[:, None]) ** 2, axis=1) / np.maximum(valid - 1, 1))
+        result['realized_volatility'] = np.where(valid >= 2, realized * np.sqrt(candles_per_day), np.nan)
+
+        true_range = np.fmax(high[:, 1:] - low[:, 1:],
+                             np.fmax(np.abs(high[:, 1:] - previous_close), np.abs(low[:, 1:] - previous_close)))
+        result['atr'] = _nanmean(true_range[:, -atr_window:])
+        result['atr_pct'] = result['atr'] / close[:, -1]
+
+        quote_volume = (volume * close)[:, -volume_window:]
+        result['avg_quote_volume'] = _nanmean(quote_volume)
+        result['quote_volume_24h'] = result['avg_quote_volume'] * candles_per_day
+    return result
+
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    # np.nanmean warns on all-NaN rows; those simply stay NaN here
+    count = np.count_nonzero(~np.isnan(values), axis=1)
+    total = np.nansum(values, axis=1)
+    return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+class OHLCVProvider:
+    """
+    Universe-wide candle metrics from a Freqtrade data directory
+
+    Metrics are cached per data file, keyed by its mtime and size (in memory
+    and optionally on disk), so only files Freqtrade re-downloaded are read
+    again.
+
+    Args:
+        datadir: Freqtrade data directory (user_data/data)
+        exchange: Exchange sub-directory
+        timeframe: Candle timeframe of the files to read
+        trading_mode: 'futures' (files under futures/, -futures suffix) or 'spot'
+        volatility_window: Candles used for realized volatility
+        atr_window: Candles used for ATR
+        volume_window: Candles used for average quote volume
+        cache_file: JSON file persisting metrics across processes (None disables)
+    """
+
+    def __init__(self, datadir: Union[str, Path] = "user_data/data", exchange: str = "binance",
+                 timeframe: str = "1h", trading_mode: str = "futures",
+                 volatility_window: int = 168, atr_window: int = 14, volume_window: int = 24,
+                 cache_file: Optional[Union[str, Path]] = "user_data/cache/ohlcv_metrics.json"):
+        self.timeframe = timeframe
+        self.trading_mode = trading_mode
+        self.data_dir = Path(datadir) / exchange / ('futures' if trading_mode == 'futures' else '')
+        self.candles_per_day = max(1, 1440 // timeframe_minutes(timeframe))
+        self.volatility_window = volatility_window
+        self.atr_window = atr_window
+        self.volume_window = volume_window
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._memo: Dict[str, Dict] = {}
+        self._disk_loaded = False
+
+    @property
+    def settings_key(self) -> str:
+        """Identity of the metric settings (cached metrics are only reused under the same settings)"""
+        return f"{self.timeframe}:{self.candles_per_day}:{self.volatility_window}:{self.atr_window}:{self.volume_window}"
+
+    def pair_file(self, pair: str) -> Optional[Path]:
+        """Find the data file of a pair, in Freqtrade's format lookup order"""
+        stem = f"{pair_to_filename(pair)}-{self.timeframe}"
+        if self.trading_mode == 'futures':
+            stem += '-futures'
+        for suffix in DATA_SUFFIXES:
+            path = self.data_dir / f"{stem}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def _file_keys(self, pairs: Sequence[str]) -> List[Optional[Tuple[str, int, int]]]:
+        keys = []
+        for pair in pairs:
+            path = self.pair_file(pair)
+            if path is None:
+                keys.append(None)
+                continue
+            st = path.stat()
+            keys.append((str(path), st.st_mtime_ns, st.st_size))
+        return keys
+
+    def digest(self, pairs: Sequence[str]) -> str:
+        """Hash of the data files behind pairs (changes when Freqtrade refreshes data)"""
+        payload = json.dumps([self.settings_key, self._file_keys(pairs)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load_candles(self, pairs: Sequence[str], depth: int) -> List[Dict[str, np.ndarray]]:
+        """Last depth candles of every pair (empty columns for pairs without data)"""
+        candles = []
+        for pair in pairs:
+            path = self.pair_file(pair)
+            try:
+                if path is None:
+                    raise FileNotFoundError(pair)
+                candles.append(read_candles(path, depth))
+            except (OSError, ValueError, RuntimeError) as e:
+                if path is not None:
+                    logger.warning(f"Skipping {path}: {e}")
+                candles.append({name: np.empty(0) for name in ('date', *OHLCV_COLUMNS)})
+        return candles
+
+    def _load_disk_cache(self) -> None:
+        self._disk_loaded = True
+        if self.cache_file is None or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable OHLCV metrics cache: {e}")
+            return
+        if document.get('format') == METRICS_FORMAT and document.get('version') == METRICS_FORMAT_VERSION:
+            self._memo.update(document.get('files', {}))
+
+    def _save_disk_cache(self) -> None:
+        if self.cache_file is None:
+            return
+        document = {'format': METRICS_FORMAT, 'version': METRICS_FORMAT_VERSION, 'files': self._memo}
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(document, f, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @metrics.timed('ohlcv_metrics')
+    def get_metrics(self, pairs: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Metrics for pairs as aligned arrays (NaN for pairs without data)
+
+        Returns:
+            One array per name in METRIC_NAMES
+        """
+        if not self._disk_loaded:
+            self._load_disk_cache()
+        keys = self._file_keys(pairs)
+        settings = self.settings_key
+
+        stale = [i for i, key in enumerate(keys) if key is not None and not self._is_cached(key, settings)]
+        if stale:
+            depth = max(self.volatility_window, self.atr_window, self.volume_window, self.candles_per_day) + 1
+            candles = []
+            for i in stale:
+                try:
+                    candles.append(read_candles(keys[i][0], depth))
+                except (OSError, ValueError, RuntimeError) as e:
+                    logger.warning(f"Skipping {keys[i][0]}: {e}")
+                    candles.append({name: np.empty(0) for name in OHLCV_COLUMNS})
+            computed = compute_metrics(candles, self.candles_per_day, self.volatility_window,
+                                       self.atr_window, self.volume_window)
+            for row, i in enumerate(stale):
+                path, mtime_ns, size = keys[i]
+                self._memo[path] = {
+                    'mtime_ns': mtime_ns, 'size': size, 'settings': settings,
+                    'metrics': [None if np.isnan(computed[name][row]) else float(computed[name][row])
+                                for name in METRIC_NAMES]
+                }
+            metrics.count('ohlcv_files_read', len(stale))
+            self._save_disk_cache()
+
+        values = np.full((len(pairs), len(METRIC_NAMES)), np.nan)
+        for i, key in enumerate(keys):
+            if key is not None:
+                row = self._memo[key[0]]['metrics']
+                values[i] = [np.nan if v is None else v for v in row]
+        return {name: values[:, j] for j, name in enumerate(METRIC_NAMES)}
+
+    def _is_cached(self, key: Tuple[str, int, int], settings: str) -> bool:
+        entry = self._memo.get(key[0])
+        return (entry is not None and entry['mtime_ns'] == key[1]
+                and entry['size'] == key[2] and entry['settings'] == settings)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Print candle metrics for the configured pair universe"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compute candle metrics from Freqtrade data files")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('--datadir', default="user_data/data")
+    parser.add_argument('--exchange', default="binance")
+    parser.add_argument('--timeframe', default="1h")
+    parser.add_argument('--volatility-window', type=int, default=168)
+    parser.add_argument('--atr-window', type=int, default=14)
+    parser.add_argument('--volume-window', type=int, default=24)
+    args = parser.parse_args(argv)
+
+    from config_service import config_service
+    pairs = config_service.get(args.config).universe.pairs
+    provider = OHLCVProvider(args.datadir, args.exchange, args.timeframe,
+                             volatility_window=args.volatility_window,
+                             atr_window=args.atr_window, volume_window=args.volume_window)
+    start = time.perf_counter()
+    data = provider.get_metrics(pairs)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n📈 CANDLE METRICS ({args.timeframe}, {elapsed_ms:.1f} ms)")
+    print(f"{'Pair':<20} {'Candles':>8} {'Vol/day %':>10} {'ATR %':>8} {'Quote vol 24h':>16}")
+    print("-" * 66)
+    for i, pair in enumerate(pairs):
+        if np.isnan(data['candles'][i]):
+            print(f"{pair:<20} {'no data':>8}")
+            continue
+        print(f"{pair:<20} {int(data['candles'][i]):>8} {data['realized_volatility'][i]*100:>9.2f}% "
+              f"{data['atr_pct'][i]*100:>7.2f}% {data['quote_volume_24h'][i]/1e6:>15.1f}M")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,33 @@ Optimized Pair Selector for Freqtrade Strategy
 Enhanced version with caching, performance optimizations, and advanced features
 """
 
-import json
+from __future__ import annotations
+
 import random
 import os
-import pickle
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from backtest_ingest import BacktestIngest, BacktestTable
+from camarilla import CamarillaEngine, CamarillaLevels
+from config_service import ConfigError, ConfigView, LoadedConfig
+from correlation import RollingCorrelation, aligned_log_returns, greedy_decorrelated, max_pairwise_correlation
+from incremental_ranking import IncrementalRanking
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from market_data_provider import MarketDataProvider, SimulatedMarketData
+from ohlcv_provider import OHLCVProvider, timeframe_minutes
+from pair_scoring import (ScoredUniverse, WeightSweep, backtest_scores, category_allocations, performance_scores,
+                          score_universe, top_n_indices)
+from pair_universe import PairUniverse
+from selection_cache import SelectionCache, cached_selection, make_cache_key
+from streaming_selection import stream_performance_top
+
+np = lazy_import('numpy')
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -30,95 +45,155 @@ class PairMetrics:
     volatility: float = 0.0
     score: float = 0.0
 
+SELECTION_METHODS = ('category_weights', 'performance', 'incremental', 'market_cap', 'balanced', 'decorrelated',
+                     'random')
+
 class OptimizedPairSelector:
     """
     Optimized pair selector with caching, performance improvements, and advanced features
     """
     
     def __init__(self, config_file: str = "user_data/pairlists/top_50_pairs.json", 
-                 cache_dir: str = "user_data/cache"):
+                 cache_dir: str = "user_data/cache",
+                 cache_duration: timedelta = timedelta(hours=6),
+                 use_cache: bool = True,
+                 backtest: Optional[BacktestTable] = None,
+                 ohlcv: Optional[OHLCVProvider] = None,
+                 provider: Optional[MarketDataProvider] = None,
+                 ranking: Optional[IncrementalRanking] = None):
         """Initialize the optimized pair selector"""
         self.config_file = Path(config_file)
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Load configuration
-        self.pairs_config = self._load_config()
-        if not self.pairs_config:
+        # Performance optimizations (dropped whenever the config file changes)
+        self._all_pairs_cache = None
+        self._category_pairs_cache = {}
+        
+        # Load configuration (shared, reloaded when the file changes)
+        self._config_view = ConfigView(self.config_file, on_reload=self._on_config_reload)
+        if not self._load_config():
             raise ValueError(f"Failed to load configuration from {config_file}")
         
-        # Initialize cache
-        self._cache_file = self.cache_dir / "pair_selection_cache.pkl"
-        self._cache_duration = timedelta(hours=6)  # Cache for 6 hours
+        # Initialize cache (results and market snapshots)
+        self._cache_duration = cache_duration
+        self.cache = SelectionCache(self.cache_dir / "selection", ttl=cache_duration) if use_cache else None
         
-        # Performance optimizations
-        self._all_pairs_cache = None
-        self._category_pairs_cache = {}
+        # Market snapshots (simulated unless another provider is given)
+        self.provider = provider if provider is not None else SimulatedMarketData()
+        # Market cap ranking follows the curated order unless a provider is given
+        self.market_cap_provider = provider
+        
+        # Per-pair backtest results feeding the performance score (optional)
+        self.backtest = backtest
+        # Real candle metrics from Freqtrade's data directory (optional)
+        self.ohlcv = ohlcv
+        self._camarilla = None
+        # Rolling return correlation of the universe (see select_decorrelated)
+        self.correlation_window = 168
+        self._correlation = None
+        self._correlation_candle_date = None
+        self._correlation_candle_key = None
+        # Hysteresis state of select_by_performance_score_incremental, one state file per config
+        self._own_ranking = ranking is None
+        self.ranking = ranking if ranking is not None else IncrementalRanking(
+            state_file=self._ranking_state_file(self.config_digest))
         
         logger.info("OptimizedPairSelector initialized successfully")
     
     def _load_config(self) -> Optional[Dict]:
         """Load configuration with error handling"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            logger.info(f"Configuration loaded from {self.config_file}")
-            return config
-        except FileNotFoundError:
-            logger.error(f"Config file {self.config_file} not found")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in config file: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error loading config: {e}")
+            config = self._config_view.load()
+            logger.info(f"Configuration loaded from {self.config_file} (version {config.version})")
+            return config.data
+        except ConfigError as e:
+            logger.error(str(e))
             return None
     
-    def _load_cache(self) -> Optional[Dict]:
-        """Load cached data if valid"""
-        try:
-            if not self._cache_file.exists():
-                return None
-            
-            # Check cache age
-            cache_age = datetime.now() - datetime.fromtimestamp(self._cache_file.stat().st_mtime)
-            if cache_age > self._cache_duration:
-                logger.info("Cache expired, will refresh")
-                return None
-            
-            with open(self._cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-            logger.info("Cache loaded successfully")
-            return cache_data
-            
-        except Exception as e:
-            logger.warning(f"Failed to load cache: {e}")
+    def _ranking_state_file(self, config_digest: str) -> Path:
+        return self.cache_dir / f"incremental_ranking_{config_digest[:16]}.json"
+    
+    def _on_config_reload(self, config: LoadedConfig) -> None:
+        """Drop state derived from the previous config version"""
+        self._all_pairs_cache = None
+        self._category_pairs_cache = {}
+        self._correlation = None
+        if self._own_ranking:
+            # The current selection carries over into the new config's state file
+            self.ranking.state_file = self._ranking_state_file(config.digest)
+        logger.info(f"Pair universe reloaded: {len(config.universe)} pairs (version {config.version})")
+    
+    @property
+    def pairs_config(self) -> Dict:
+        """Current pairlist configuration"""
+        return self._config_view.current().data
+    
+    @property
+    def universe(self) -> PairUniverse:
+        """Compiled universe of the current configuration"""
+        return self._config_view.current().universe
+    
+    @property
+    def config_digest(self) -> str:
+        """Content hash of the current configuration (part of every cache key)"""
+        return self._config_view.current().digest
+    
+    @property
+    def scoring_digest(self) -> str:
+        """Identity of the extra scoring inputs (part of every cache key)"""
+        parts = []
+        if self.backtest is not None:
+            parts.append(self.backtest.digest)
+        if self.ohlcv is not None:
+            parts.append(self.ohlcv.digest(self.universe.pairs))
+        return ':'.join(parts)
+    
+    @property
+    def market_digest(self) -> Optional[str]:
+        """Identity of get_market_snapshot's data (None when the provider's snapshots cannot be cached)"""
+        if self.ohlcv is not None:
+            return 'candles'
+        return self.provider.cache_key
+    
+    def load_backtest_results(self, results_dir: str = "user_data/backtest_results",
+                              strategy: Optional[str] = "PivotCamarillaStrategy") -> BacktestTable:
+        """Ingest Freqtrade backtest results and use them in the performance score"""
+        ingest = BacktestIngest(results_dir, self.cache_dir / "backtest_pairs.json", strategy)
+        self.backtest = ingest.load()
+        return self.backtest
+    
+    def backtest_score_terms(self) -> Optional[np.ndarray]:
+        """Backtest score terms per pair (aligned with get_all_pairs), or None"""
+        if self.backtest is None:
             return None
+        stats = self.backtest.arrays(self.universe.pairs)
+        return backtest_scores(stats['profit_mean'], stats['win_rate'],
+                               stats['max_drawdown'], stats['trades'])
     
-    def _save_cache(self, data: Dict) -> None:
-        """Save data to cache"""
-        try:
-            with open(self._cache_file, 'wb') as f:
-                pickle.dump(data, f)
-            logger.info("Cache saved successfully")
-        except Exception as e:
-            logger.warning(f"Failed to save cache: {e}")
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters"""
+        if self.cache is None:
+            return {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        return self.cache.stats_dict()
     
     def get_all_pairs(self) -> List[str]:
         """Get all pairs with caching"""
+        universe = self.universe  # drops the caches if the config was reloaded
         if self._all_pairs_cache is None:
-            all_pairs = []
-            for category, pairs in self.pairs_config['top_50_pairs']['categories'].items():
-                all_pairs.extend(pairs)
-            self._all_pairs_cache = all_pairs
+            self._all_pairs_cache = list(universe.pairs)
         return self._all_pairs_cache
     
     def get_pairs_by_category(self, category: str) -> List[str]:
         """Get pairs for a specific category with caching"""
+        universe = self.universe  # drops the caches if the config was reloaded
         if category not in self._category_pairs_cache:
-            self._category_pairs_cache[category] = self.pairs_config['top_50_pairs']['categories'].get(category, [])
+            self._category_pairs_cache[category] = list(universe.get_pairs(category))
         return self._category_pairs_cache[category]
     
+    @metrics.timed('select_by_category_weights')
+    @cached_selection()
     def select_by_category_weights(self, max_pairs: int = 10, 
                                  custom_weights: Optional[Dict[str, float]] = None) -> List[str]:
         """
@@ -128,17 +203,8 @@ class OptimizedPairSelector:
             max_pairs: Maximum number of pairs to select
             custom_weights: Custom category weights (optional)
         """
-        strategy = self.pairs_config['top_50_pairs']['selection_strategy']
-        categories = self.pairs_config['top_50_pairs']['categories']
-        
         # Use custom weights if provided, otherwise use default
-        weights = custom_weights or {
-            'blue_chips': strategy['blue_chips_weight'],
-            'defi_tokens': strategy['defi_weight'],
-            'layer1_blockchains': strategy['layer1_weight'],
-            'gaming_metaverse': strategy['gaming_weight'],
-            'other': strategy.get('other_weight', 0.1)
-        }
+        weights = custom_weights or self.default_category_weights()
         
         selected_pairs = []
         remaining_weight = 1.0
@@ -148,7 +214,7 @@ class OptimizedPairSelector:
             if remaining_weight <= 0 or len(selected_pairs) >= max_pairs:
                 break
             
-            category_pairs = categories.get(category, [])
+            category_pairs = self.universe.get_pairs(category)
             if not category_pairs:
                 continue
             
@@ -163,71 +229,383 @@ class OptimizedPairSelector:
                 selected_pairs.extend(category_pairs[:category_count])
                 remaining_weight -= weight
         
-        # Fill remaining slots with best available pairs
+        return self._fill_selection(selected_pairs, max_pairs)
+    
+    def default_category_weights(self) -> Dict[str, float]:
+        """Category weights from the configured selection strategy"""
+        strategy = self.pairs_config['top_50_pairs']['selection_strategy']
+        return {
+            'blue_chips': strategy['blue_chips_weight'],
+            'defi_tokens': strategy['defi_weight'],
+            'layer1_blockchains': strategy['layer1_weight'],
+            'gaming_metaverse': strategy['gaming_weight'],
+            'other': strategy.get('other_weight', 0.1)
+        }
+    
+    def _fill_selection(self, selected_pairs: List[str], max_pairs: int) -> List[str]:
+        """Fill remaining slots with best available pairs"""
         remaining_slots = max_pairs - len(selected_pairs)
         if remaining_slots > 0:
-            all_available = self.get_all_pairs()
-            available_pairs = [p for p in all_available if p not in selected_pairs]
-            selected_pairs.extend(available_pairs[:remaining_slots])
+            taken = set(selected_pairs)
+            for pair in self.universe.pairs:
+                if remaining_slots <= 0:
+                    break
+                if pair not in taken:
+                    selected_pairs.append(pair)
+                    remaining_slots -= 1
         
         return selected_pairs[:max_pairs]
     
+    @metrics.timed('select_by_category_weights_bulk')
+    def select_by_category_weights_bulk(self, weight_matrix, max_pairs: int = 10,
+                                        categories: Optional[List[str]] = None) -> WeightSweep:
+        """
+        Evaluate many category weight vectors in one call
+        
+        Each row gives the same selection as select_by_category_weights with
+        custom_weights = dict(zip(categories, row)). Rows with identical
+        allocations share one materialized selection.
+        
+        Args:
+            weight_matrix: (M, K) array of weight vectors
+            max_pairs: Maximum number of pairs to select per vector
+            categories: Column order of the matrix (default: the configured weight categories)
+        """
+        categories = tuple(categories or self.default_category_weights())
+        weights = np.atleast_2d(np.asarray(weight_matrix, dtype=np.float64))
+        if weights.shape[1] != len(categories):
+            raise ValueError(f"Weight matrix has {weights.shape[1]} columns for {len(categories)} categories")
+        
+        sizes = np.array([len(self.universe.get_pairs(c)) for c in categories], dtype=np.int64)
+        counts = category_allocations(weights, sizes, max_pairs)
+        allocations, allocation_index = np.unique(counts, axis=0, return_inverse=True)
+        
+        selections = []
+        for allocation in allocations.tolist():
+            selected_pairs = []
+            for category, count in zip(categories, allocation):
+                if count:
+                    selected_pairs.extend(self.universe.get_pairs(category)[:count])
+            selections.append(self._fill_selection(selected_pairs, max_pairs))
+        
+        return WeightSweep(
+            categories=categories,
+            weights=weights,
+            allocations=allocations,
+            allocation_index=allocation_index.reshape(-1),
+            selections=selections
+        )
+    
+    def get_category_ids(self) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """Get category names and a category id per pair (aligned with get_all_pairs)"""
+        return self.universe.categories, self.universe.category_id
+    
+    @metrics.timed('market_fetch')
+    def get_market_snapshot(self) -> Dict[str, np.ndarray]:
+        """Get market data for all pairs as columnar arrays (candle metrics when available)"""
+        if self.ohlcv is not None:
+            return self._candle_market_arrays()
+        return self.get_provider_snapshot()
+    
+    def get_provider_snapshot(self, provider: Optional[MarketDataProvider] = None) -> Dict[str, np.ndarray]:
+        """Snapshot of all pairs from a market data provider (default: self.provider), cached when it allows"""
+        provider = provider if provider is not None else self.provider
+        pairs = self.universe.pairs
+        if self.cache is None or provider.cache_key is None:
+            return provider.get_snapshot(pairs)
+        key = make_cache_key(self.config_digest, 'market_snapshot', provider.cache_key)
+        snapshot = self.cache.get_or_compute(key, lambda: provider.get_snapshot(pairs))
+        return {name: np.asarray(values, dtype=np.float64) for name, values in snapshot.items()}
+    
+    def _candle_market_arrays(self) -> Dict[str, np.ndarray]:
+        """Market data from Freqtrade candles (market cap is not in the candles and scores 0)"""
+        candles = self.ohlcv.get_metrics(self.universe.pairs)
+        return {
+            'volume_24h': candles['quote_volume_24h'],
+            'market_cap': np.zeros(len(self.universe)),
+            'price_change_24h': candles['price_change_24h'],
+            'volatility': candles['realized_volatility']
+        }
+    
+    def get_camarilla_levels(self, period: str = 'daily') -> CamarillaLevels:
+        """Camarilla levels of every pair for the current period (needs an ohlcv provider)"""
+        if self.ohlcv is None:
+            raise ValueError("Camarilla levels need candle data (pass an OHLCVProvider as ohlcv)")
+        if self._camarilla is None or self._camarilla.provider is not self.ohlcv:
+            cache = SelectionCache(self.cache_dir / "camarilla") if self.cache is not None else None
+            self._camarilla = CamarillaEngine(self.ohlcv, cache)
+        return self._camarilla.levels(self.universe.pairs, period)
+    
+    @metrics.timed('select_by_camarilla')
+    def select_by_camarilla(self, max_pairs: int = 10, period: str = 'daily',
+                            rank_by: str = 'width') -> List[str]:
+        """
+        Select pairs by Camarilla pivot levels
+        
+        Args:
+            max_pairs: Maximum number of pairs to select
+            period: 'daily', 'weekly' or 'session' levels
+            rank_by: 'width' (widest H4-L4 band first) or 'h3_l3_distance' (closest to H3/L3 first)
+        """
+        levels = self.get_camarilla_levels(period)
+        last_close = self.ohlcv.get_metrics(self.universe.pairs)['last_close']
+        return levels.rank(rank_by, max_pairs, last_close=last_close)
+    
+    def get_correlation_tracker(self) -> RollingCorrelation:
+        """Rolling return correlation of the universe, synced with new candles when available"""
+        n = len(self.universe)
+        if self._correlation is None or self._correlation.n_assets != n:
+            self._correlation = RollingCorrelation(n, self.correlation_window)
+            self._correlation_candle_date = None
+            self._correlation_candle_key = None
+        if self.ohlcv is not None:
+            self._sync_correlation_candles()
+        return self._correlation
+    
+    def update_correlation(self, prices: np.ndarray) -> None:
+        """Add a price snapshot (aligned with get_all_pairs) to the rolling correlation"""
+        self.get_correlation_tracker().update_prices(prices)
+    
+    @metrics.timed('correlation_sync')
+    def _sync_correlation_candles(self) -> None:
+        """Push only the candles closed since the last sync (the full window on first use)"""
+        pairs = self.universe.pairs
+        key = self.ohlcv.digest(pairs)
+        if key == self._correlation_candle_key:
+            return
+        tracker = self._correlation
+        timeframe_ms = timeframe_minutes(self.ohlcv.timeframe) * 60_000
+        last = self._correlation_candle_date
+        depth = tracker.window + 1 if last is None else 2
+        candles = self.ohlcv.load_candles(pairs, depth)
+        end = max((int(c['date'][-1]) for c in candles if len(c['date'])), default=None)
+        if end is None:
+            return
+        periods = depth - 1 if last is None else min(tracker.window, (end - last) // timeframe_ms)
+        if periods > depth - 1:
+            candles = self.ohlcv.load_candles(pairs, periods + 1)
+        if periods > 0:
+            tracker.extend(aligned_log_returns(candles, end, periods, timeframe_ms))
+            metrics.count('correlation_rows', periods)
+        self._correlation_candle_date = end
+        self._correlation_candle_key = key
+    
+    @metrics.timed('select_decorrelated')
+    def select_decorrelated(self, max_pairs: int = 10, max_correlation: float = 0.7,
+                            min_volume: float = 10_000_000,
+                            max_volatility: float = 0.15,
+                            market: Optional[Dict[str, np.ndarray]] = None) -> List[str]:
+        """
+        Select the best performance scores such that no two picks are strongly correlated
+        
+        Pairs are taken in score order and skipped when their absolute return
+        correlation with an already selected pair exceeds max_correlation.
+        Until enough returns are seen the constraint does not apply.
+        
+        Args:
+            max_pairs: Maximum number of pairs to select
+            max_correlation: Maximum absolute correlation between two selected pairs
+            min_volume: Minimum 24h volume filter
+            max_volatility: Maximum volatility filter
+            market: Snapshot to score (default: get_market_snapshot())
+        """
+        all_pairs = self.get_all_pairs()
+        _, category_ids = self.get_category_ids()
+        if market is None:
+            market = self.get_market_snapshot()
+        top = self.select_by_performance_score_batch(
+            market['volume_24h'], market['market_cap'], market['volatility'], category_ids,
+            max_pairs=len(all_pairs), min_volume=min_volume, max_volatility=max_volatility,
+            extra_score=self.backtest_score_terms()
+        )
+        scores = np.full(len(all_pairs), -np.inf)
+        scores[top.index] = top.score
+        
+        correlation = self.get_correlation_tracker().correlation()
+        picked = greedy_decorrelated(scores, correlation, max_pairs, max_correlation)
+        worst = max_pairwise_correlation(correlation, picked)
+        if worst is not None:
+            logger.info(f"Selected {len(picked)} pairs, max pairwise correlation {worst:.2f}")
+        return [all_pairs[i] for i in picked]
+    
+    def select_by_performance_score_batch(self, volume: np.ndarray, market_cap: np.ndarray,
+                                          volatility: np.ndarray,
+                                          category_id: Optional[np.ndarray] = None,
+                                          max_pairs: int = 10,
+                                          min_volume: float = 10_000_000,
+                                          max_volatility: float = 0.15,
+                                          extra_score: Optional[np.ndarray] = None) -> ScoredUniverse:
+        """
+        Score a whole universe given as NumPy arrays and return the top rows
+        
+        Args:
+            volume: 24h volume per pair
+            market_cap: Market cap per pair
+            volatility: Volatility per pair
+            category_id: Category id per pair (see get_category_ids)
+            max_pairs: Maximum number of pairs to select
+            min_volume: Minimum 24h volume filter
+            max_volatility: Maximum volatility filter
+            extra_score: Additional score per pair (see backtest_score_terms)
+        """
+        return score_universe(volume, market_cap, volatility, category_id,
+                              max_pairs=max_pairs, min_volume=min_volume,
+                              max_volatility=max_volatility, extra_score=extra_score)
+    
+    @metrics.timed('select_by_performance_score')
+    @cached_selection(decode=lambda rows: [PairMetrics(**row) for row in rows],
+                      market=lambda self: self.market_digest)
     def select_by_performance_score(self, max_pairs: int = 10, 
                                   min_volume: float = 10_000_000,
                                   max_volatility: float = 0.15) -> List[PairMetrics]:
         """
-        Select pairs based on performance scoring with real market data simulation
+        Select pairs based on performance scoring of the current market snapshot
         """
-        # Simulate market data (in real implementation, this would fetch from API)
+        # Market data from candle metrics or the market data provider
         all_pairs = self.get_all_pairs()
+        category_names, category_ids = self.get_category_ids()
+        market = self.get_market_snapshot()
+        
+        top = self.select_by_performance_score_batch(
+            market['volume_24h'], market['market_cap'], market['volatility'], category_ids,
+            max_pairs=max_pairs, min_volume=min_volume, max_volatility=max_volatility,
+            extra_score=self.backtest_score_terms()
+        )
+        
+        metrics.count('pairs_filtered_out', len(all_pairs) - top.passed)
+        
+        # Only the selected rows are materialized as PairMetrics
+        price_change = market['price_change_24h'][top.index]
         pair_metrics = []
+        for row, i in enumerate(top.index.tolist()):
+            pair = all_pairs[i]
+            pair_metrics.append(PairMetrics(
+                symbol=self.universe.symbol(pair),
+                pair=pair,
+                category=category_names[top.category_id[row]],
+                volume_24h=float(top.volume_24h[row]),
+                market_cap=float(top.market_cap[row]),
+                price_change_24h=float(price_change[row]),
+                volatility=float(top.volatility[row]),
+                score=float(top.score[row])
+            ))
+        return pair_metrics
+    
+    @metrics.timed('select_by_performance_score_incremental')
+    def select_by_performance_score_incremental(self, max_pairs: int = 10,
+                                                min_volume: float = 10_000_000,
+                                                max_volatility: float = 0.15,
+                                                market: Optional[Dict[str, np.ndarray]] = None,
+                                                ranking: Optional[IncrementalRanking] = None) -> List[PairMetrics]:
+        """
+        Performance selection that only changes pairs when a challenger is clearly better
         
-        for pair in all_pairs:
-            symbol = pair.split('/')[0]
-            category = self._get_pair_category(pair)
-            
-            # Simulate realistic market data
-            volume = random.uniform(5_000_000, 500_000_000)
-            market_cap = volume * random.uniform(50, 500)
-            price_change = random.uniform(-0.2, 0.2)
-            volatility = abs(price_change)
-            
-            # Apply filters
-            if volume < min_volume or volatility > max_volatility:
-                continue
-            
-            # Calculate score
-            score = self._calculate_performance_score(volume, market_cap, volatility)
-            
-            metrics = PairMetrics(
-                symbol=symbol,
+        Same score and filters as select_by_performance_score, ranked through
+        self.ranking (see IncrementalRanking for the margin and holding
+        period). Pairs whose market inputs did not change are not re-scored.
+        Not cached: every call advances the hysteresis state. `market` is the
+        snapshot to rank (default: get_market_snapshot()) and `ranking` the
+        state to advance (default: self.ranking).
+        """
+        ranking = ranking if ranking is not None else self.ranking
+        all_pairs = self.get_all_pairs()
+        if market is None:
+            market = self.get_market_snapshot()
+        extra = self.backtest_score_terms()
+        inputs = np.column_stack([market['volume_24h'], market['market_cap'], market['volatility'],
+                                  extra if extra is not None else np.zeros(len(all_pairs))])
+        
+        def score_rows(rows: np.ndarray) -> np.ndarray:
+            volume, market_cap, volatility, extra_score = rows.T
+            scores = performance_scores(volume, market_cap, volatility) + extra_score
+            scores[~((volume >= min_volume) & (volatility <= max_volatility))] = -np.inf
+            return scores
+        
+        ranked = ranking.rank(all_pairs, inputs, score_rows, max_pairs,
+                              scoring_key=f"performance:{min_volume}:{max_volatility}")
+        metrics.count('pairs_filtered_out', len(all_pairs) - ranking.eligible)
+        
+        index = self.universe.index
+        pair_metrics = []
+        for pair, score in ranked:
+            i = index[pair]
+            pair_metrics.append(PairMetrics(
+                symbol=self.universe.symbol(pair),
                 pair=pair,
-                category=category,
-                volume_24h=volume,
-                market_cap=market_cap,
-                price_change_24h=price_change,
-                volatility=volatility,
-                score=score
-            )
-            pair_metrics.append(metrics)
+                category=self._get_pair_category(pair),
+                volume_24h=float(market['volume_24h'][i]),
+                market_cap=float(market['market_cap'][i]),
+                price_change_24h=float(market['price_change_24h'][i]),
+                volatility=float(market['volatility'][i]),
+                score=float(score)
+            ))
+        return pair_metrics
+    
+    @metrics.timed('select_by_performance_score_streaming')
+    def select_by_performance_score_streaming(self, chunks: Iterable[Dict[str, np.ndarray]],
+                                              max_pairs: int = 10,
+                                              min_volume: float = 10_000_000,
+                                              max_volatility: float = 0.15) -> List[PairMetrics]:
+        """
+        Performance selection over market data arriving in chunks (e.g. API pages)
+        
+        Only the current top max_pairs rows are kept, so any number of chunks
+        can be ranked; pairs outside the configured universe are allowed.
+        
+        Args:
+            chunks: Columnar chunks, e.g. streaming_selection.iter_market_columns(pages)
+            max_pairs: Maximum number of pairs to select
+            min_volume: Minimum 24h volume filter
+            max_volatility: Maximum volatility filter
+        """
+        extra_score = None
+        if self.backtest is not None:
+            def extra_score(chunk):
+                stats = self.backtest.arrays(chunk['pair'])
+                return backtest_scores(stats['profit_mean'], stats['win_rate'],
+                                       stats['max_drawdown'], stats['trades'])
         
-        # Sort by score and return top pairs
-        pair_metrics.sort(key=lambda x: x.score, reverse=True)
-        return pair_metrics[:max_pairs]
+        top, rows = stream_performance_top(chunks, max_pairs, min_volume, max_volatility, extra_score)
+        metrics.count('pairs_filtered_out', top.seen - top.passed)
+        return [PairMetrics(
+            symbol=self.universe.symbol(row['pair']),
+            pair=row['pair'],
+            category=self._get_pair_category(row['pair']),
+            volume_24h=float(row['volume_24h']),
+            market_cap=float(row['market_cap']),
+            price_change_24h=float(row.get('price_change_24h', 0.0)),
+            volatility=float(row['volatility']),
+            score=float(row['score'])
+        ) for row in rows]
     
+    @metrics.timed('select_by_market_cap_ranking')
+    @cached_selection(market=lambda self: self.market_cap_provider.cache_key
+                      if self.market_cap_provider is not None else 'curated')
     def select_by_market_cap_ranking(self, max_pairs: int = 10) -> List[str]:
-        """Select pairs based on market cap ranking"""
-        # Simulate market cap ranking (in real implementation, fetch from API)
-        market_cap_order = [
-            'BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT',
-            'XRP/USDT:USDT', 'ADA/USDT:USDT', 'AVAX/USDT:USDT', 'DOT/USDT:USDT',
-            'MATIC/USDT:USDT', 'LINK/USDT:USDT', 'UNI/USDT:USDT', 'LTC/USDT:USDT',
-            'BCH/USDT:USDT', 'ATOM/USDT:USDT', 'NEAR/USDT:USDT', 'OP/USDT:USDT',
-            'ARB/USDT:USDT', 'MKR/USDT:USDT', 'AAVE/USDT:USDT', 'COMP/USDT:USDT'
-        ]
-        
-        return market_cap_order[:max_pairs]
+        """
+        Select pairs based on market cap ranking
+        
+        Without a market data provider the curated market cap order is used;
+        with one, pairs without market cap data are skipped.
+        """
+        if self.market_cap_provider is None:
+            # Curated order by typical market cap
+            market_cap_order = [
+                'BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT',
+                'XRP/USDT:USDT', 'ADA/USDT:USDT', 'AVAX/USDT:USDT', 'DOT/USDT:USDT',
+                'MATIC/USDT:USDT', 'LINK/USDT:USDT', 'UNI/USDT:USDT', 'LTC/USDT:USDT',
+                'BCH/USDT:USDT', 'ATOM/USDT:USDT', 'NEAR/USDT:USDT', 'OP/USDT:USDT',
+                'ARB/USDT:USDT', 'MKR/USDT:USDT', 'AAVE/USDT:USDT', 'COMP/USDT:USDT'
+            ]
+            return market_cap_order[:max_pairs]
+        
+        market_cap = self.get_provider_snapshot(self.market_cap_provider)['market_cap']
+        known = np.flatnonzero(np.isfinite(market_cap))
+        all_pairs = self.get_all_pairs()
+        return [all_pairs[i] for i in known[top_n_indices(market_cap[known], max_pairs)].tolist()]
     
+    @metrics.timed('select_balanced_portfolio')
+    @cached_selection()
     def select_balanced_portfolio(self, max_pairs: int = 10) -> List[str]:
         """
         Select pairs for a balanced portfolio across different market sectors
@@ -243,13 +621,35 @@ class OptimizedPairSelector:
         
         return self.select_by_category_weights(max_pairs, sector_weights)
     
+    def select(self, method: str, max_pairs: int = 10, **kwargs) -> List[str]:
+        """
+        Run a selection method by name and return the selected pairs
+        
+        Args:
+            method: One of SELECTION_METHODS
+            max_pairs: Maximum number of pairs to select
+            **kwargs: Extra arguments for the method (e.g. custom_weights, min_volume)
+        """
+        if method == 'category_weights':
+            return self.select_by_category_weights(max_pairs, **kwargs)
+        if method == 'performance':
+            return [pm.pair for pm in self.select_by_performance_score(max_pairs, **kwargs)]
+        if method == 'incremental':
+            return [pm.pair for pm in self.select_by_performance_score_incremental(max_pairs, **kwargs)]
+        if method == 'market_cap':
+            return self.select_by_market_cap_ranking(max_pairs)
+        if method == 'balanced':
+            return self.select_balanced_portfolio(max_pairs)
+        if method == 'decorrelated':
+            return self.select_decorrelated(max_pairs, **kwargs)
+        if method == 'random':
+            all_pairs = self.get_all_pairs()
+            return random.sample(all_pairs, min(max_pairs, len(all_pairs)))
+        raise ValueError(f"Unknown selection method: {method}")
+    
     def _get_pair_category(self, pair: str) -> str:
         """Get the category of a pair"""
-        categories = self.pairs_config['top_50_pairs']['categories']
-        for category, pairs in categories.items():
-            if pair in pairs:
-                return category
-        return 'unknown'
+        return self.universe.category(pair)
     
     def _calculate_performance_score(self, volume: float, market_cap: float, volatility: float) -> float:
         """Calculate performance score for a pair"""
@@ -273,6 +673,7 @@ class OptimizedPairSelector:
         
         return '\n'.join(config_lines)
     
+    @metrics.timed('report_render')
     def print_detailed_analysis(self, selected_pairs: List[str], method_name: str) -> None:
         """Print detailed analysis with enhanced formatting"""
         print(f"\n{'='*80}")
@@ -286,18 +687,14 @@ class OptimizedPairSelector:
         print(f"\n{'Rank':<4} {'Symbol':<8} {'Category':<20} {'Pair':<20}")
         print("-" * 60)
         
-        categories = self.pairs_config['top_50_pairs']['categories']
         for i, pair in enumerate(selected_pairs, 1):
-            symbol = pair.split('/')[0]
-            category = self._get_pair_category(pair)
+            symbol = self.universe.symbol(pair)
+            category = self.universe.category(pair)
             print(f"{i:<4} {symbol:<8} {category.replace('_', ' ').title():<20} {pair:<20}")
         
         # Category breakdown
         print(f"\n🏷️  CATEGORY BREAKDOWN:")
-        category_counts = {}
-        for pair in selected_pairs:
-            category = self._get_pair_category(pair)
-            category_counts[category] = category_counts.get(category, 0) + 1
+        category_counts = self.universe.category_counts(selected_pairs)
         
         for category, count in sorted(category_counts.items()):
             percentage = (count / len(selected_pairs)) * 100
@@ -322,8 +719,16 @@ class OptimizedPairSelector:
 
 def main():
     """Main function with enhanced user interface"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     try:
         selector = OptimizedPairSelector()
+        if Path("user_data/backtest_results").is_dir():
+            table = selector.load_backtest_results()
+            print(f"📊 Using backtest results for {len(table)} pairs")
+        ohlcv = OHLCVProvider()
+        if ohlcv.data_dir.is_dir():
+            selector.ohlcv = ohlcv
+            print(f"🕯️  Using candle metrics from {ohlcv.data_dir}")
         
         print("🚀 Optimized Pair Selector for Freqtrade")
         print("=" * 50)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Vectorized Pair Scoring for Freqtrade Strategy
+Columnar scoring engine that filters and ranks a whole pair universe at once
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+# Composite score weights (same as OptimizedPairSelector._calculate_performance_score)
+VOLUME_WEIGHT = 0.4
+MARKET_CAP_WEIGHT = 0.3
+VOLATILITY_WEIGHT = 0.3
+
+VOLUME_CAP = 100_000_000
+MARKET_CAP_CAP = 1_000_000_000
+
+# Additional terms from per-pair backtest results (see backtest_ingest.py)
+BACKTEST_PROFIT_WEIGHT = 0.2
+BACKTEST_WIN_RATE_WEIGHT = 0.1
+BACKTEST_DRAWDOWN_WEIGHT = 0.1
+
+BACKTEST_PROFIT_CAP = 0.02     # mean profit per trade scoring +/-1
+BACKTEST_DRAWDOWN_CAP = 0.5    # drawdown (sum of trade ratios) scoring -1
+BACKTEST_MIN_TRADES = 5
+
+
+@dataclass
+class ScoredUniverse:
+    """Top-N rows of a scored universe, ordered by descending score"""
+    index: np.ndarray
+    score: np.ndarray
+    volume_24h: np.ndarray
+    market_cap: np.ndarray
+    volatility: np.ndarray
+    category_id: np.ndarray
+    passed: int = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+def performance_scores(volume: np.ndarray, market_cap: np.ndarray,
+                       volatility: np.ndarray) -> np.ndarray:
+    """Calculate the composite performance score for every row"""
+    volume_score = np.minimum(volume / VOLUME_CAP, 1.0)
+    market_cap_score = np.minimum(market_cap / MARKET_CAP_CAP, 1.0)
+
+    # Volatility score (lower is better for stability)
+    volatility_score = np.maximum(0.0, 1.0 - volatility)
+
+    return (volume_score * VOLUME_WEIGHT +
+            market_cap_score * MARKET_CAP_WEIGHT +
+            volatility_score * VOLATILITY_WEIGHT)
+
+
+def backtest_scores(profit_mean: np.ndarray, win_rate: np.ndarray, max_drawdown: np.ndarray,
+                    trades: np.ndarray, min_trades: int = BACKTEST_MIN_TRADES) -> np.ndarray:
+    """
+    Backtest terms added to the composite score for every row
+
+    Profit is scored in [-1, 1], win rate is centred on 50% and drawdown is a
+    penalty. Pairs with fewer than min_trades trades get a neutral 0.
+    """
+    profit_score = np.clip(profit_mean / BACKTEST_PROFIT_CAP, -1.0, 1.0)
+    win_rate_score = 2.0 * win_rate - 1.0
+    drawdown_score = -np.minimum(max_drawdown / BACKTEST_DRAWDOWN_CAP, 1.0)
+    score = (profit_score * BACKTEST_PROFIT_WEIGHT +
+             win_rate_score * BACKTEST_WIN_RATE_WEIGHT +
+             drawdown_score * BACKTEST_DRAWDOWN_WEIGHT)
+    return np.where(trades >= min_trades, score, 0.0)
+
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """Return indices of the n highest scores, best first (ties keep input order)"""
+    if n <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if n < scores.size:
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(scores.size)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def score_universe(volume: np.ndarray, market_cap: np.ndarray, volatility: np.ndarray,
+                   category_id: Optional[np.ndarray] = None, max_pairs: int = 10,
+                   min_volume: float = 10_000_000,
+                   max_volatility: float = 0.15,
+                   extra_score: Optional[np.ndarray] = None) -> ScoredUniverse:
+    """
+    Filter, score and rank a whole universe of pairs in one pass
+
+    Args:
+        volume: 24h volume per pair
+        market_cap: Market cap per pair
+        volatility: Volatility per pair (fraction, e.g. 0.05 for 5%)
+        category_id: Integer category id per pair (optional)
+        max_pairs: Number of top rows to return
+        min_volume: Minimum 24h volume filter
+        max_volatility: Maximum volatility filter
+        extra_score: Additional score per pair (e.g. backtest_scores), optional
+    """
+    volume = np.asarray(volume, dtype=np.float64)
+    market_cap = np.asarray(market_cap, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    if category_id is None:
+        category_id = np.full(volume.shape, -1, dtype=np.int32)
+    else:
+        category_id = np.asarray(category_id)
+
+    mask = (volume >= min_volume) & (volatility <= max_volatility)
+    candidates = np.flatnonzero(mask)
+
+    scores = performance_scores(volume[candidates], market_cap[candidates], volatility[candidates])
+    if extra_score is not None:
+        scores = scores + np.asarray(extra_score, dtype=np.float64)[candidates]
+    best = top_n_indices(scores, max_pairs)
+    index = candidates[best]
+
+    return ScoredUniverse(
+        index=index,
+        score=scores[best],
+        volume_24h=volume[index],
+        market_cap=market_cap[index],
+        volatility=volatility[index],
+        category_id=category_id[index],
+        passed=int(candidates.size)
+    )
+
+
+def category_allocations(weights: np.ndarray, category_sizes: np.ndarray,
+                         max_pairs: int) -> np.ndarray:
+    """
+    Per-category pair counts for many weight vectors at once
+
+    Broadcasts the quota arithmetic of OptimizedPairSelector.select_by_category_weights
+    over the rows of a weight matrix: categories are taken in column order, each
+    gets min(int(max_pairs * weight), category size, free slots), and a row stops
+    once its remaining weight reaches zero or it is full.
+
+    Args:
+        weights: (M, K) weight matrix, one weight vector per row
+        category_sizes: (K,) number of pairs per category
+        max_pairs: Number of pairs to select per row
+
+    Returns:
+        (M, K) integer matrix of pairs taken from each category
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    category_sizes = np.asarray(category_sizes, dtype=np.int64)
+    n_rows, n_categories = weights.shape
+    counts = np.zeros((n_rows, n_categories), dtype=np.int64)
+    selected = np.zeros(n_rows, dtype=np.int64)
+    remaining = np.ones(n_rows, dtype=np.float64)
+    stopped = np.zeros(n_rows, dtype=bool)
+
+    for k in range(n_categories):
+        stopped |= (remaining <= 0) | (selected >= max_pairs)
+        if category_sizes[k] == 0:
+            continue
+        quota = np.trunc(max_pairs * weights[:, k]).astype(np.int64)
+        count = np.minimum(np.minimum(quota, category_sizes[k]), max_pairs - selected)
+        taken = (count > 0) & ~stopped
+        counts[taken, k] = count[taken]
+        selected[taken] += count[taken]
+        remaining[taken] -= weights[taken, k]
+    return counts
+
+
+@dataclass
+class WeightSweep:
+    """Selections for a matrix of category weight vectors"""
+    categories: Tuple[str, ...]
+    weights: np.ndarray
+    allocations: np.ndarray
+    allocation_index: np.ndarray
+    selections: List[List[str]]
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def selection(self, row: int) -> List[str]:
+        """Selected pairs for one weight vector"""
+        return self.selections[self.allocation_index[row]]
+
+    def allocation(self, row: int) -> Dict[str, int]:
+        """Pairs taken from each category for one weight vector"""
+        counts = self.allocations[self.allocation_index[row]]
+        return {category: int(count) for category, count in zip(self.categories, counts)}
+
+    def frequencies(self) -> np.ndarray:
+        """Number of weight vectors mapping to each distinct allocation"""
+        return np.bincount(self.allocation_index, minlength=len(self.allocations))
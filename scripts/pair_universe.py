@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Pair Universe for Freqtrade Strategy
+Precompiled index of the pair configuration shared by all pair selectors
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+UNKNOWN_CATEGORY = 'unknown'
+
+
+def split_pair(pair: str) -> Tuple[str, str, str]:
+    """Split a Freqtrade pair (BTC/USDT:USDT) into base, quote and settle symbols"""
+    base, _, rest = pair.partition('/')
+    quote, _, settle = rest.partition(':')
+    return base, quote, settle
+
+
+@dataclass
+class PairUniverse:
+    """
+    Compiled view of a pairlist configuration
+
+    Built once per configuration so that category lookups, symbol splitting
+    and membership tests are O(1) instead of scanning the category lists.
+    """
+    pairs: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    category_pairs: Dict[str, Tuple[str, ...]]
+    category_of: Dict[str, str]
+    index: Dict[str, int]
+    category_id: np.ndarray
+    base: Tuple[str, ...]
+    quote: Tuple[str, ...]
+    settle: Tuple[str, ...]
+    pair_set: frozenset = field(default_factory=frozenset)
+
+    @classmethod
+    def from_config(cls, pairs_config: Dict) -> 'PairUniverse':
+        """Compile a universe from a loaded top_50_pairs.json configuration"""
+        return cls.from_categories(pairs_config['top_50_pairs']['categories'])
+
+    @classmethod
+    def from_categories(cls, categories: Dict[str, List[str]]) -> 'PairUniverse':
+        """Compile a universe from a category -> pairs mapping"""
+        category_names = tuple(sys.intern(c) for c in categories)
+        category_pairs = {}
+        category_of = {}
+        index = {}
+        pairs = []
+        category_ids = []
+
+        for category_id, category in enumerate(category_names):
+            members = []
+            for pair in categories[category]:
+                pair = sys.intern(pair)
+                members.append(pair)
+                # First category wins, matching the original linear scan
+                if pair in index:
+                    continue
+                index[pair] = len(pairs)
+                category_of[pair] = category
+                pairs.append(pair)
+                category_ids.append(category_id)
+            category_pairs[category] = tuple(members)
+
+        symbols = [split_pair(pair) for pair in pairs]
+        return cls(
+            pairs=tuple(pairs),
+            categories=category_names,
+            category_pairs=category_pairs,
+            category_of=category_of,
+            index=index,
+            category_id=np.asarray(category_ids, dtype=np.int32),
+            base=tuple(sys.intern(s[0]) for s in symbols),
+            quote=tuple(sys.intern(s[1]) for s in symbols),
+            settle=tuple(sys.intern(s[2]) for s in symbols),
+            pair_set=frozenset(pairs)
+        )
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __contains__(self, pair: str) -> bool:
+        return pair in self.pair_set
+
+    def category(self, pair: str) -> str:
+        """Get the category of a pair"""
+        return self.category_of.get(pair, UNKNOWN_CATEGORY)
+
+    def symbol(self, pair: str) -> str:
+        """Get the base symbol of a pair"""
+        i = self.index.get(pair)
+        return self.base[i] if i is not None else split_pair(pair)[0]
+
+    def get_pairs(self, category: str) -> Tuple[str, ...]:
+        """Get the pairs of a category"""
+        return self.category_pairs.get(category, ())
+
+    def category_counts(self, pairs: Iterable[str]) -> Dict[str, int]:
+        """Count pairs per category, in configuration order"""
+        counts = {}
+        for pair in pairs:
+            category = self.category(pair)
+            counts[category] = counts.get(category, 0) + 1
+        ordered = {c: counts[c] for c in self.categories if c in counts}
+        if UNKNOWN_CATEGORY in counts:
+            ordered[UNKNOWN_CATEGORY] = counts[UNKNOWN_CATEGORY]
+        return ordered
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Pairlist Daemon for Freqtrade
+Long-running service that keeps the pair selectors warm, re-ranks on a
+schedule and serves the whitelist in Freqtrade RemotePairList format
+
+Freqtrade config:
+    "pairlists": [{
+        "method": "RemotePairList",
+        "pairlist_url": "http://127.0.0.1:8090/pairlist",
+        "number_assets": 10,
+        "refresh_period": 1800
+    }]
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+import logging
+
+from market_data_provider import make_provider
+from optimized_pair_selector import SELECTION_METHODS, OptimizedPairSelector
+
+logger = logging.getLogger(__name__)
+
+
+class PairlistService:
+    """
+    Holds the current whitelist and re-ranks it on a schedule
+
+    HTTP requests only read the last rendered response, so any number of
+    bots can poll without triggering a recomputation.
+    """
+
+    def __init__(self, select: Callable[[], List[str]], refresh_period: int = 1800):
+        """
+        Args:
+            select: Callable returning the current list of pairs
+            refresh_period: Seconds between re-rankings (also sent to the bots)
+        """
+        self.select = select
+        self.refresh_period = refresh_period
+        self.pairs = []
+        self.etag = None
+        self.body = b''
+        self.generated_at = None
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> bool:
+        """Re-rank now; returns True when the whitelist changed"""
+        try:
+            pairs = list(self.select())
+        except Exception as e:
+            # Keep serving the last good whitelist
+            logger.error(f"Pairlist refresh failed: {e}")
+            return False
+
+        generated_at = datetime.now(timezone.utc)
+        with self._lock:
+            self.refresh_count += 1
+            self.generated_at = generated_at
+            if pairs == self.pairs and self.body:
+                return False
+            payload = {
+                'pairs': pairs,
+                'refresh_period': self.refresh_period,
+                'info': f"Generated {generated_at.isoformat(timespec='seconds')}"
+            }
+            self.pairs = pairs
+            self.body = json.dumps(payload).encode('utf-8')
+            # ETag depends on the pairs only, so unchanged whitelists stay cacheable
+            self.etag = '"' + hashlib.sha256(json.dumps(pairs).encode('utf-8')).hexdigest()[:32] + '"'
+        logger.info(f"Whitelist updated: {len(pairs)} pairs")
+        return True
+
+    def snapshot(self):
+        """Get (etag, body, age in seconds) of the current response"""
+        with self._lock:
+            age = (datetime.now(timezone.utc) - self.generated_at).total_seconds() if self.generated_at else 0
+            return self.etag, self.body, age
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_period):
+            self.refresh()
+
+    def start(self) -> None:
+        """Compute the first whitelist and start the scheduler thread"""
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name='pairlist-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def make_handler(service: PairlistService):
+    """Build the HTTP handler class bound to a service"""
+
+    class PairlistHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body and self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0].rstrip('/')
+            if path == '/health':
+                body = json.dumps({'status': 'ok', 'refresh_count': service.refresh_count}).encode('utf-8')
+                self._send(200, body, {'Content-Type': 'application/json'})
+                return
+            if path not in ('', '/pairlist'):
+                self._send(404, b'{"error": "not found"}', {'Content-Type': 'application/json'})
+                return
+
+            etag, body, age = service.snapshot()
+            if not body:
+                self._send(503, b'{"error": "pairlist not ready"}', {'Content-Type': 'application/json'})
+                return
+            headers = {
+                'ETag': etag,
+                'Cache-Control': f"max-age={max(0, int(service.refresh_period - age))}"
+            }
+            if_none_match = self.headers.get('If-None-Match', '')
+            if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+                self._send(304, headers=headers)
+                return
+            headers['Content-Type'] = 'application/json'
+            self._send(200, body, headers)
+
+        do_HEAD = do_GET
+
+    return PairlistHandler
+
+
+def build_selector_callable(args) -> Callable[[], List[str]]:
+    """Create a warm selector and return a zero-argument selection callable"""
+    provider = make_provider(args.market_data, args.seed) if args.market_data else None
+    if args.source == 'manager':
+        from incremental_ranking import IncrementalRanking
+        from manage_pairs import PairManager
+        # --method incremental ranks the manager's selection with hysteresis
+        ranking = None
+        if args.method == 'incremental':
+            ranking = IncrementalRanking(state_file="user_data/cache/manager_ranking.json")
+        manager = PairManager(config_file=args.config, provider=provider, ranking=ranking)
+        return lambda: manager.generate_pairlist(max_pairs=args.max_pairs)
+
+    # Cached selections expire well before the next re-ranking, so every refresh recomputes
+    refresh_period = getattr(args, 'refresh_period', None) or 1800
+    selector = OptimizedPairSelector(config_file=args.config, cache_duration=timedelta(seconds=refresh_period / 2),
+                                     use_cache=not args.no_cache, provider=provider)
+    return lambda: selector.select(args.method, args.max_pairs)
+
+
+def main():
+    """Run the pairlist daemon"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve a Freqtrade RemotePairList whitelist")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('--source', choices=['optimized', 'manager'], default='optimized',
+                        help="OptimizedPairSelector or CoinGecko-backed PairManager")
+    parser.add_argument('--method', choices=SELECTION_METHODS, default='category_weights')
+    parser.add_argument('--max-pairs', type=int, default=10)
+    parser.add_argument('--market-data', help="Market data source: simulated[:seed], coingecko[:url], "
+                                              "file:<path> or replay:<history dir> (default per source)")
+    parser.add_argument('--seed', type=int, help="Seed of the simulated market data")
+    parser.add_argument('--refresh-period', type=int, default=1800, help="Seconds between re-rankings")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the selection cache")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    args = parser.parse_args()
+
+    service = PairlistService(build_selector_callable(args), refresh_period=args.refresh_period)
+    service.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"🚀 Serving pairlist on http://{args.host}:{args.port}/pairlist "
+          f"(refresh every {args.refresh_period}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\n👋 Goodbye!")
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
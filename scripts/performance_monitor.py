@@ -4,20 +4,22 @@ Performance Monitor for Pair Selection Methods
 Tracks and compares the performance of different pair selection strategies
 """
 
+import functools
+import gc
+import math
+import statistics
 import time
+import tracemalloc
 import json
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from dataclasses import asdict, dataclass
 from pathlib import Path
 import logging
 
-# Import both selectors for comparison
-from simple_pair_selector import SimplePairSelector
-from optimized_pair_selector import OptimizedPairSelector
+from instrumentation import metrics
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -30,22 +32,189 @@ class PerformanceMetrics:
     cache_hits: int = 0
     cache_misses: int = 0
 
+@dataclass
+class BenchmarkResult:
+    """Statistical benchmark result for one method (times in seconds, memory in bytes)"""
+    method_name: str
+    rounds: int
+    repeats: int
+    mean: float
+    stdev: float
+    min_time: float
+    max_time: float
+    p50: float
+    p95: float
+    p99: float
+    ci_low: float
+    ci_high: float
+    peak_memory: int
+    allocated_memory: int
+    pairs_selected: int
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+         9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+def _t_critical(df: int) -> float:
+    """Student t critical value for a 95% interval (normal approximation above 30)"""
+    if df > 30:
+        return 1.96
+    # Untabulated df use the next smaller df, whose wider value keeps the interval conservative
+    return _T_95[max(k for k in _T_95 if k <= df)]
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of pre-sorted values"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
 class PerformanceMonitor:
     """Monitor and compare performance of different pair selection methods"""
     
-    def __init__(self):
-        self.simple_selector = SimplePairSelector()
-        self.optimized_selector = OptimizedPairSelector()
+    def __init__(self, seed: Optional[int] = None):
+        """Args: seed: Seed of the simulated market data (None for fresh data every run)"""
         self.results = []
+        self._memory_cache = {}
+        self.seed = seed
+    
+    @functools.cached_property
+    def simple_selector(self):
+        """Simple selector, built on first use"""
+        from market_data_provider import SimulatedMarketData
+        from simple_pair_selector import SimplePairSelector
+        return SimplePairSelector(provider=SimulatedMarketData(self.seed))
+    
+    @functools.cached_property
+    def optimized_selector(self):
+        """Optimized selector without the selection cache, built on first use (timings are recomputations)"""
+        from market_data_provider import SimulatedMarketData
+        from optimized_pair_selector import OptimizedPairSelector
+        return OptimizedPairSelector(use_cache=False, provider=SimulatedMarketData(self.seed))
+    
+    @functools.cached_property
+    def cached_selector(self):
+        """Optimized selector with the selection cache, built on first use (reported separately)"""
+        from market_data_provider import SimulatedMarketData
+        from optimized_pair_selector import OptimizedPairSelector
+        return OptimizedPairSelector(provider=SimulatedMarketData(self.seed))
     
     def measure_execution_time(self, func, *args, **kwargs) -> Tuple[float, any]:
         """Measure execution time of a function"""
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        execution_time = end_time - start_time
+        end_time = time.perf_counter_ns()
+        execution_time = (end_time - start_time) / 1e9
         return execution_time, result
     
+    @staticmethod
+    def measure_memory(func, *args, **kwargs) -> Tuple[int, int]:
+        """Measure (peak, retained) bytes allocated by one call using tracemalloc"""
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            gc.collect()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = func(*args, **kwargs)
+            current, peak = tracemalloc.get_traced_memory()
+            del result
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        return peak - baseline, max(0, current - baseline)
+    
+    def _memory_usage(self, method_name: str, func, *args) -> float:
+        """Peak memory of a method in bytes, measured once per method"""
+        if method_name not in self._memory_cache:
+            self._memory_cache[method_name] = float(self.measure_memory(func, *args)[0])
+        return self._memory_cache[method_name]
+    
+    def benchmark(self, method_name: str, func, *args, rounds: int = 30,
+                  warmup_time: float = 0.1, min_round_time: float = 0.002,
+                  max_repeats: int = 100_000, **kwargs) -> BenchmarkResult:
+        """
+        Statistically benchmark a function
+        
+        Args:
+            method_name: Label for the report
+            func: Callable to benchmark
+            rounds: Number of timed rounds (samples)
+            warmup_time: Seconds of untimed calls before measuring
+            min_round_time: Minimum duration of one round; the repeat count is
+                calibrated so each round is well above timer resolution
+            max_repeats: Upper bound for the calibrated repeat count
+        """
+        if rounds < 1:
+            raise ValueError(f"rounds must be at least 1, got {rounds}")
+        
+        # Warm-up (imports, caches, branch predictors)
+        deadline = time.perf_counter() + warmup_time
+        result = func(*args, **kwargs)
+        while time.perf_counter() < deadline:
+            func(*args, **kwargs)
+        
+        # Calibrate repeats per round
+        min_round_ns = min_round_time * 1e9
+        repeats = 1
+        while repeats < max_repeats:
+            start = time.perf_counter_ns()
+            for _ in range(repeats):
+                func(*args, **kwargs)
+            if time.perf_counter_ns() - start >= min_round_ns:
+                break
+            repeats *= 2
+        
+        # Timed rounds with the garbage collector paused
+        samples = []
+        gc.collect()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter_ns()
+                for _ in range(repeats):
+                    func(*args, **kwargs)
+                samples.append((time.perf_counter_ns() - start) / repeats / 1e9)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        
+        peak, allocated = self.measure_memory(func, *args, **kwargs)
+        
+        ordered = sorted(samples)
+        mean = statistics.fmean(samples)
+        stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+        half_width = _t_critical(len(samples) - 1) * stdev / math.sqrt(len(samples)) if len(samples) > 1 else 0.0
+        
+        return BenchmarkResult(
+            method_name=method_name,
+            rounds=rounds,
+            repeats=repeats,
+            mean=mean,
+            stdev=stdev,
+            min_time=ordered[0],
+            max_time=ordered[-1],
+            p50=_percentile(ordered, 50),
+            p95=_percentile(ordered, 95),
+            p99=_percentile(ordered, 99),
+            ci_low=mean - half_width,
+            ci_high=mean + half_width,
+            peak_memory=peak,
+            allocated_memory=allocated,
+            pairs_selected=len(result)
+        )
+    
+    def measure_cached_call(self, func, *args, **kwargs) -> Tuple[float, any, int, int]:
+        """Measure execution time and cached selector hits/misses of a call"""
+        before = self.cached_selector.cache_stats
+        exec_time, result = self.measure_execution_time(func, *args, **kwargs)
+        after = self.cached_selector.cache_stats
+        return exec_time, result, after['hits'] - before['hits'], after['misses'] - before['misses']
+    
     def benchmark_simple_selector(self, iterations: int = 100) -> List[PerformanceMetrics]:
         """Benchmark the simple pair selector"""
         metrics = []
@@ -58,7 +227,7 @@ class PerformanceMonitor:
             metrics.append(PerformanceMetrics(
                 method_name="Simple Category-Weighted",
                 execution_time=exec_time,
-                memory_usage=0,  # Simple estimation
+                memory_usage=self._memory_usage("Simple Category-Weighted", self.simple_selector.select_by_category_weights, 10),
                 pairs_selected=len(pairs)
             ))
             
@@ -69,7 +238,7 @@ class PerformanceMonitor:
             metrics.append(PerformanceMetrics(
                 method_name="Simple Random",
                 execution_time=exec_time,
-                memory_usage=0,
+                memory_usage=self._memory_usage("Simple Random", self.simple_selector.select_random_top_pairs, 10),
                 pairs_selected=len(pairs)
             ))
         
@@ -87,7 +256,7 @@ class PerformanceMonitor:
             metrics.append(PerformanceMetrics(
                 method_name="Optimized Category-Weighted",
                 execution_time=exec_time,
-                memory_usage=0,
+                memory_usage=self._memory_usage("Optimized Category-Weighted", self.optimized_selector.select_by_category_weights, 10),
                 pairs_selected=len(pairs)
             ))
             
@@ -98,7 +267,7 @@ class PerformanceMonitor:
             metrics.append(PerformanceMetrics(
                 method_name="Optimized Performance-Based",
                 execution_time=exec_time,
-                memory_usage=0,
+                memory_usage=self._memory_usage("Optimized Performance-Based", self.optimized_selector.select_by_performance_score, 10),
                 pairs_selected=len(pair_metrics)
             ))
             
@@ -109,9 +278,22 @@ class PerformanceMonitor:
             metrics.append(PerformanceMetrics(
                 method_name="Optimized Balanced Portfolio",
                 execution_time=exec_time,
-                memory_usage=0,
+                memory_usage=self._memory_usage("Optimized Balanced Portfolio", self.optimized_selector.select_balanced_portfolio, 10),
                 pairs_selected=len(pairs)
             ))
+            
+            # The same selections served by the selection cache
+            for name, select in (("Optimized Category-Weighted (cached)", self.cached_selector.select_by_category_weights),
+                                 ("Optimized Balanced Portfolio (cached)", self.cached_selector.select_balanced_portfolio)):
+                exec_time, pairs, hits, misses = self.measure_cached_call(select, 10)
+                metrics.append(PerformanceMetrics(
+                    method_name=name,
+                    execution_time=exec_time,
+                    memory_usage=self._memory_usage(name, select, 10),
+                    pairs_selected=len(pairs),
+                    cache_hits=hits,
+                    cache_misses=misses
+                ))
         
         return metrics
     
@@ -128,7 +310,9 @@ class PerformanceMonitor:
                     'avg_time': 0,
                     'min_time': float('inf'),
                     'max_time': 0,
-                    'total_pairs': 0
+                    'total_pairs': 0,
+                    'cache_hits': 0,
+                    'cache_misses': 0
                 }
             
             analysis[method]['count'] += 1
@@ -136,6 +320,8 @@ class PerformanceMonitor:
             analysis[method]['min_time'] = min(analysis[method]['min_time'], metric.execution_time)
             analysis[method]['max_time'] = max(analysis[method]['max_time'], metric.execution_time)
             analysis[method]['total_pairs'] += metric.pairs_selected
+            analysis[method]['cache_hits'] += metric.cache_hits
+            analysis[method]['cache_misses'] += metric.cache_misses
         
         # Calculate averages
         for method, data in analysis.items():
@@ -161,6 +347,15 @@ class PerformanceMonitor:
             print(f"{method:<35} {data['count']:<8} {data['avg_time']*1000:<15.3f} "
                   f"{data['min_time']*1000:<15.3f} {data['max_time']*1000:<15.3f} {data['avg_pairs']:<10.1f}")
         
+        # Cache effectiveness
+        cached_methods = [(m, d) for m, d in sorted_methods if d['cache_hits'] + d['cache_misses']]
+        if cached_methods:
+            print(f"\n💾 CACHE STATISTICS:")
+            for method, data in cached_methods:
+                lookups = data['cache_hits'] + data['cache_misses']
+                print(f"  {method}: {data['cache_hits']} hits / {data['cache_misses']} misses "
+                      f"({data['cache_hits'] / lookups * 100:.1f}% hit rate)")
+        
         # Performance comparison
         print(f"\n🏆 PERFORMANCE COMPARISON:")
         if len(sorted_methods) >= 2:
@@ -203,6 +398,7 @@ class PerformanceMonitor:
         # Save results
         self.save_results(analysis)
     
+    @metrics.timed('file_write')
     def save_results(self, analysis: Dict) -> None:
         """Save benchmark results to file"""
         results_file = Path("user_data/benchmark_results.json")
@@ -223,13 +419,9 @@ class PerformanceMonitor:
         
         print(f"\n💾 Results saved to: {results_file}")
     
-    def compare_selection_methods(self, max_pairs: int = 10) -> None:
-        """Compare different selection methods side by side"""
-        print(f"\n{'='*80}")
-        print(f"🔄 SELECTION METHOD COMPARISON")
-        print(f"{'='*80}")
-        
-        methods = [
+    def selection_methods(self, max_pairs: int = 10) -> List[Tuple[str, any]]:
+        """Get (name, zero-argument callable) for every selection method"""
+        return [
             ("Simple Category-Weighted", lambda: self.simple_selector.select_by_category_weights(max_pairs)),
             ("Simple Random", lambda: self.simple_selector.select_random_top_pairs(max_pairs)),
             ("Optimized Category-Weighted", lambda: self.optimized_selector.select_by_category_weights(max_pairs)),
@@ -237,9 +429,15 @@ class PerformanceMonitor:
             ("Optimized Balanced Portfolio", lambda: self.optimized_selector.select_balanced_portfolio(max_pairs)),
             ("Optimized Market Cap Ranking", lambda: self.optimized_selector.select_by_market_cap_ranking(max_pairs))
         ]
+    
+    def compare_selection_methods(self, max_pairs: int = 10) -> None:
+        """Compare different selection methods side by side"""
+        print(f"\n{'='*80}")
+        print(f"🔄 SELECTION METHOD COMPARISON")
+        print(f"{'='*80}")
         
         results = []
-        for method_name, method_func in methods:
+        for method_name, method_func in self.selection_methods(max_pairs):
             exec_time, pairs = self.measure_execution_time(method_func)
             results.append({
                 'method': method_name,
@@ -262,9 +460,62 @@ class PerformanceMonitor:
         print(f"\n🏆 Fastest Method: {fastest['method']} ({fastest['execution_time']*1000:.3f} ms)")
         
         return results
+    
+    def run_statistical_benchmark(self, rounds: int = 30, max_pairs: int = 10) -> List[BenchmarkResult]:
+        """Benchmark every selection method with warm-up, calibration, percentiles and memory"""
+        print("🚀 Starting Statistical Benchmark...")
+        print(f"Running {rounds} calibrated rounds for each method...")
+        
+        results = [self.benchmark(name, func, rounds=rounds)
+                   for name, func in self.selection_methods(max_pairs)]
+        self.print_benchmark_report(results)
+        self.save_benchmark_results(results)
+        return results
+    
+    def print_benchmark_report(self, results: List[BenchmarkResult]) -> None:
+        """Print statistical benchmark report (times in microseconds)"""
+        print(f"\n{'='*120}")
+        print(f"📊 STATISTICAL BENCHMARK REPORT")
+        print(f"{'='*120}")
+        print(f"🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        print(f"\n{'Method':<32} {'Rounds':<8} {'Repeats':<8} {'Mean (µs)':<12} {'95% CI (µs)':<20} "
+              f"{'p50':<10} {'p95':<10} {'p99':<10} {'Peak Mem (KB)':<14}")
+        print("-" * 120)
+        
+        ordered = sorted(results, key=lambda r: r.mean)
+        for r in ordered:
+            ci = f"{r.ci_low*1e6:.2f}-{r.ci_high*1e6:.2f}"
+            print(f"{r.method_name:<32} {r.rounds:<8} {r.repeats:<8} {r.mean*1e6:<12.2f} {ci:<20} "
+                  f"{r.p50*1e6:<10.2f} {r.p95*1e6:<10.2f} {r.p99*1e6:<10.2f} {r.peak_memory/1024:<14.1f}")
+        
+        # Only claim a difference when the confidence intervals do not overlap
+        print(f"\n🏆 PERFORMANCE COMPARISON:")
+        if len(ordered) >= 2:
+            fastest, slowest = ordered[0], ordered[-1]
+            significant = fastest.ci_high < slowest.ci_low
+            print(f"  Fastest Method: {fastest.method_name} ({fastest.mean*1e6:.2f} µs)")
+            print(f"  Slowest Method: {slowest.method_name} ({slowest.mean*1e6:.2f} µs)")
+            print(f"  Speedup Factor: {slowest.mean / fastest.mean:.2f}x "
+                  f"({'significant' if significant else 'within noise'} at 95%)")
+    
+    @metrics.timed('file_write')
+    def save_benchmark_results(self, results: List[BenchmarkResult]) -> None:
+        """Save statistical benchmark results to file"""
+        results_file = Path("user_data/benchmark_statistics.json")
+        results_file.parent.mkdir(exist_ok=True)
+        
+        with open(results_file, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'results': [asdict(r) for r in results]
+            }, f, indent=2)
+        
+        print(f"\n💾 Results saved to: {results_file}")
 
 def main():
     """Main function for performance monitoring"""
+    logging.basicConfig(level=logging.INFO)
     monitor = PerformanceMonitor()
     
     print("🚀 Performance Monitor for Pair Selection Methods")
@@ -273,9 +524,10 @@ def main():
     print("1. Run comprehensive benchmark (100 iterations)")
     print("2. Quick comparison (single run)")
     print("3. Custom benchmark")
+    print("4. Statistical benchmark (percentiles, confidence intervals, memory)")
     
     try:
-        choice = input("\nEnter choice (1-3): ").strip()
+        choice = input("\nEnter choice (1-4): ").strip()
         
         if choice == "1":
             iterations = int(input("Number of iterations (default 100): ") or "100")
@@ -290,6 +542,11 @@ def main():
             max_pairs = int(input("Number of pairs to select: "))
             monitor.run_comprehensive_benchmark(iterations)
             
+        elif choice == "4":
+            rounds = int(input("Number of rounds (default 30): ") or "30")
+            max_pairs = int(input("Number of pairs to select (default 10): ") or "10")
+            monitor.run_statistical_benchmark(rounds, max_pairs)
+            
         else:
             print("Invalid choice. Running quick comparison...")
             monitor.compare_selection_methods(10)
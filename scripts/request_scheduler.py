@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Request Scheduler for Market Data APIs
+Shared token-bucket rate limiting, in-flight request coalescing and an
+on-disk HTTP cache with Cache-Control/ETag revalidation
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Union
+from urllib.parse import urlencode
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from selection_cache import file_lock
+
+futures = lazy_import('concurrent.futures')
+
+logger = logging.getLogger(__name__)
+
+# Response headers kept with cached entries
+CACHED_HEADERS = ('cache-control', 'etag', 'last-modified', 'content-type', 'date')
+
+
+class RateLimitedError(Exception):
+    """The API kept answering 429 and no cached response could be served"""
+
+    def __init__(self, url: str, retry_after: float):
+        super().__init__(f"Rate limited by {url} (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+def request_key(url: str, params: Optional[Dict] = None) -> str:
+    """Identity of a GET request (parameter order does not matter)"""
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return hashlib.sha256(f"{url}?{query}".encode('utf-8')).hexdigest()
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Cache-Control directives as a dict (lower-case names, None for flags)"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class HTTPResponse:
+    """Body and headers of a completed (or cached) GET"""
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every process using the same state file
+
+    The bucket state (tokens, last refill, shared back-off deadline) lives in a
+    small JSON file updated under an exclusive file lock, so bots and cron jobs
+    behind one egress IP draw from one budget. Without a state file the bucket
+    is local to the process.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size
+        state_file: Shared state file (None for an in-process bucket)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 state_file: Optional[Union[str, Path]] = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.state_file = Path(state_file) if state_file else None
+        self._lock = threading.Lock()
+        self._state = {'tokens': self.capacity, 'updated': time.time(), 'blocked_until': 0.0}
+        if self.state_file is not None:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_file = self.state_file.with_name(self.state_file.name + '.lock')
+
+    def _read_state(self) -> Dict[str, float]:
+        if self.state_file is None:
+            return self._state
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'tokens': self.capacity, 'updated': time.time(), 'blocked_until': 0.0}
+
+    def _write_state(self, state: Dict[str, float]) -> None:
+        if self.state_file is None:
+            self._state = state
+            return
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def _update(self, change) -> float:
+        with self._lock:
+            if self.state_file is None:
+                return change(self._state)
+            with file_lock(self._lock_file):
+                state = self._read_state()
+                result = change(state)
+                self._write_state(state)
+                return result
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return the seconds to wait"""
+        def take(state: Dict[str, float]) -> float:
+            now = time.time()
+            if now < state['blocked_until']:
+                return state['blocked_until'] - now
+            elapsed = max(0.0, now - state['updated'])
+            state['tokens'] = min(self.capacity, state['tokens'] + elapsed * self.rate)
+            state['updated'] = now
+            if state['tokens'] >= 1.0:
+                state['tokens'] -= 1.0
+                return 0.0
+            return (1.0 - state['tokens']) / self.rate
+        return self._update(take)
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block until a token is available (TimeoutError after timeout seconds)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("Rate limiter wait exceeds timeout")
+            metrics.count('rate_limit_waits')
+            time.sleep(wait)
+
+    def block(self, seconds: float) -> None:
+        """Stop all sharing processes for seconds (e.g. after a 429) and drain the bucket"""
+        def penalize(state: Dict[str, float]) -> None:
+            now = time.time()
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+            state['tokens'] = 0.0
+            state['updated'] = now
+        self._update(penalize)
+
+
+@dataclass
+class CacheEntry:
+    """Stored response plus the time it was stored or last revalidated"""
+    url: str
+    status: int
+    headers: Dict[str, str]
+    stored_at: float
+    body: bytes
+
+    def max_age(self, default_ttl: float) -> float:
+        directives = parse_cache_control(self.headers.get('cache-control'))
+        if 'no-cache' in directives:
+            return 0.0
+        try:
+            return float(directives['max-age'])
+        except (KeyError, TypeError, ValueError):
+            return default_ttl
+
+    def is_fresh(self, default_ttl: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.stored_at < self.max_age(default_ttl)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if 'etag' in self.headers:
+            headers['If-None-Match'] = self.headers['etag']
+        if 'last-modified' in self.headers:
+            headers['If-Modified-Since'] = self.headers['last-modified']
+        return headers
+
+    def response(self) -> HTTPResponse:
+        return HTTPResponse(self.status, self.body, dict(self.headers), from_cache=True)
+
+
+class HTTPCache:
+    """
+    On-disk GET response cache
+
+    One file per request: a JSON metadata line followed by the raw body,
+    written to a temp file and renamed into place. Responses marked no-store
+    (or without validators and freshness) are not kept. Loads and stores
+    stamp the entry's mtime, and every store trims the least recently used
+    entries beyond max_entries.
+
+    Args:
+        cache_dir: Directory of the entries
+        default_ttl: Freshness in seconds when a response has no max-age
+        max_entries: Entries kept before the least recently used are evicted
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = "user_data/cache/http", default_ttl: float = 0.0,
+                 max_entries: int = 512):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock_file = self.cache_dir / ".http.lock"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.http"
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        # Explicit ns stamp: filesystem clocks are too coarse to order back-to-back uses
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return CacheEntry(meta['url'], meta['status'], meta['headers'], meta['stored_at'], body)
+
+    def store(self, key: str, entry: CacheEntry) -> bool:
+        """Write an entry if its headers allow caching"""
+        directives = parse_cache_control(entry.headers.get('cache-control'))
+        if 'no-store' in directives:
+            return False
+        if not entry.validators() and entry.max_age(self.default_ttl) <= 0:
+            return False
+        meta = {'url': entry.url, 'status': entry.status, 'headers': entry.headers, 'stored_at': entry.stored_at}
+        with file_lock(self._lock_file):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(json.dumps(meta).encode('utf-8') + b'\n')
+                    f.write(entry.body)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._touch(self._path(key))
+            self._evict_locked()
+        return True
+
+    def _evict_locked(self) -> int:
+        """Remove the least recently used entries beyond max_entries (caller holds the lock)"""
+        entries = []
+        for path in self.cache_dir.glob('*.http'):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        stale = entries[:max(0, len(entries) - self.max_entries)]
+        for _, path in stale:
+            path.unlink(missing_ok=True)
+        if stale:
+            metrics.count('http_cache_evictions', len(stale))
+        return len(stale)
+
+    def clear(self) -> int:
+        """Remove every entry; returns the number removed"""
+        removed = 0
+        for path in self.cache_dir.glob('*.http'):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+class RequestScheduler:
+    """
+    Request layer for GETs against a rate-limited API
+
+    Every GET goes through the HTTP cache first (fresh entries are served
+    without a request), identical in-flight GETs from different threads share
+    one response, and every network request takes a token from the shared
+    bucket. A 429 blocks the whole bucket for Retry-After seconds and retries;
+    if retries run out a stale cached response is served when there is one.
+
+    Args:
+        limiter: TokenBucket shared by all callers (None disables rate limiting)
+        cache: HTTPCache (None disables response caching)
+        max_retries: Retries after a 429
+        backoff: Back-off in seconds when a 429 has no Retry-After (doubles per retry)
+    """
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, cache: Optional[HTTPCache] = None,
+                 max_retries: int = 3, backoff: float = 1.0):
+        self.limiter = limiter
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._inflight: Dict[str, 'futures.Future'] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, state_dir: Union[str, Path] = "user_data/cache/http",
+               rate: float = 0.5, burst: float = 5.0, **kwargs) -> 'RequestScheduler':
+        """Scheduler whose bucket and cache live in state_dir (shared by every process using it)"""
+        state_dir = Path(state_dir)
+        return cls(TokenBucket(rate, burst, state_dir / "rate_limit.json"), HTTPCache(state_dir), **kwargs)
+
+    def get(self, session, url: str, params: Optional[Dict] = None, timeout: float = 10.0) -> HTTPResponse:
+        """GET url with params through the cache, coalescing and the rate limiter"""
+        key = request_key(url, params)
+        entry = self.cache.load(key) if self.cache is not None else None
+        if entry is not None and entry.is_fresh(self.cache.default_ttl):
+            metrics.count('http_cache_hits')
+            return entry.response()
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = futures.Future()
+        if not leader:
+            metrics.count('http_coalesced')
+            return future.result()
+
+        try:
+            response = self._fetch(session, url, params, timeout, key, entry)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, session, url: str, params: Optional[Dict], timeout: float,
+               key: str, entry: Optional[CacheEntry]) -> HTTPResponse:
+        headers = entry.validators() if entry is not None else {}
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            metrics.count('http_requests')
+
+            if response.status_code == 429:
+                delay = parse_retry_after(response.headers.get('Retry-After'), self.backoff * 2 ** attempt)
+                metrics.count('http_throttled')
+                if self.limiter is not None:
+                    self.limiter.block(delay)
+                if attempt < self.max_retries:
+                    logger.warning(f"Rate limited by {url}, retrying in {delay:.1f}s")
+                    if self.limiter is None:
+                        time.sleep(delay)
+                    continue
+                if entry is not None:
+                    logger.warning(f"Rate limited by {url}, serving stale cached response")
+                    return entry.response()
+                raise RateLimitedError(url, delay)
+
+            if response.status_code == 304 and entry is not None:
+                metrics.count('http_revalidated')
+                entry.headers.update(_kept_headers(response.headers))
+                entry.stored_at = time.time()
+                self.cache.store(key, entry)
+                return entry.response()
+
+            response.raise_for_status()
+            result = HTTPResponse(response.status_code, response.content, _kept_headers(response.headers))
+            if self.cache is not None:
+                self.cache.store(key, CacheEntry(url, result.status, result.headers, time.time(), result.body))
+            return result
+        raise RateLimitedError(url, 0.0)
+
+
+def _kept_headers(headers) -> Dict[str, str]:
+    return {name: headers[name] for name in CACHED_HEADERS if name in headers}
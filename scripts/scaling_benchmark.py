@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark for Pair Selectors
+Runs every SimplePairSelector, OptimizedPairSelector and PairManager method
+against synthetic universes of increasing size and reports measured
+complexity curves plus time and peak memory per method
+
+Usage:
+    python scripts/scaling_benchmark.py --sizes 50 500 5000 50000 100000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import logging
+
+from manage_pairs import PairManager
+from market_data_fetcher import MarketDataFetcher
+from market_data_provider import SimulatedMarketData
+from market_stub_server import MarketStubServer
+from optimized_pair_selector import OptimizedPairSelector
+from performance_monitor import PerformanceMonitor
+from simple_pair_selector import SimplePairSelector
+from synthetic_universe import generate_pairlist_config, synthetic_market_coins, write_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (50, 500, 5_000, 50_000, 100_000)
+
+
+def time_call(func: Callable, repeats: int) -> float:
+    """Best-of-repeats wall time in seconds (stdout suppressed for report methods)"""
+    best = float('inf')
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter_ns()
+            func()
+            elapsed = (time.perf_counter_ns() - start) / 1e9
+        best = min(best, elapsed)
+    return best
+
+
+def fit_exponent(sizes: List[int], times: List[float]) -> float:
+    """Least-squares slope of log(time) against log(n)"""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if t > 0]
+    if len(points) < 2:
+        return float('nan')
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return float('nan')
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def complexity_label(exponent: float) -> str:
+    """Map a fitted exponent to the nearest complexity class"""
+    if math.isnan(exponent):
+        return '?'
+    if exponent < 0.3:
+        return 'O(1)'
+    if exponent < 1.3:
+        return 'O(n)'
+    if exponent < 1.7:
+        return 'O(n^1.5)'
+    if exponent < 2.5:
+        return 'O(n^2)'
+    return f"O(n^{exponent:.1f})"
+
+
+def build_methods(config_path: Path, cache_dir: Path, stub_url: str,
+                  seed: int = 0) -> List[Tuple[str, Callable]]:
+    """Instantiate the selectors for one universe and list their methods"""
+    simple = SimplePairSelector(str(config_path), provider=SimulatedMarketData(seed))
+    optimized = OptimizedPairSelector(str(config_path), cache_dir=str(cache_dir), use_cache=False,
+                                      provider=SimulatedMarketData(seed))
+    fetcher = MarketDataFetcher(base_url=stub_url, concurrency=8, retries=0)
+    manager = PairManager(str(config_path), fetcher=fetcher, history_dir=None,
+                          id_cache_file=cache_dir / "coingecko_ids.json")
+
+    selected = optimized.select_by_category_weights(10)
+    all_pairs = manager.get_all_pairs()
+    market_data = manager.get_market_data(all_pairs)
+    analysis = manager.analyze_pairs(market_data)
+
+    return [
+        ("Simple.select_by_category_weights", lambda: simple.select_by_category_weights(10)),
+        ("Simple.select_random_top_pairs", lambda: simple.select_random_top_pairs(10)),
+        ("Simple.select_by_volume_priority", lambda: simple.select_by_volume_priority(10)),
+        ("Simple.print_selection", lambda: simple.print_selection(selected, "Benchmark")),
+        ("Optimized.select_by_category_weights", lambda: optimized.select_by_category_weights(10)),
+        ("Optimized.select_by_performance_score", lambda: optimized.select_by_performance_score(10)),
+        ("Optimized.select_by_market_cap_ranking", lambda: optimized.select_by_market_cap_ranking(10)),
+        ("Optimized.select_balanced_portfolio", lambda: optimized.select_balanced_portfolio(10)),
+        ("Optimized.print_detailed_analysis", lambda: optimized.print_detailed_analysis(selected, "Benchmark")),
+        ("PairManager.get_market_data", lambda: manager.get_market_data(all_pairs)),
+        ("PairManager.analyze_pairs", lambda: manager.analyze_pairs(market_data)),
+        ("PairManager.select_top_pairs", lambda: manager.select_top_pairs(analysis, 10)),
+        ("PairManager.print_analysis", lambda: manager.print_analysis(10)),
+    ]
+
+
+def run_scaling_benchmark(sizes: List[int], n_categories: int = 20, repeats: int = 3,
+                          method_budget: float = 10.0, seed: int = 0) -> Dict:
+    """
+    Benchmark every method at every size
+
+    Args:
+        sizes: Universe sizes (number of pairs)
+        n_categories: Number of categories per universe
+        repeats: Best-of repeats per measurement
+        method_budget: Skip larger sizes for a method once one call exceeded this many seconds
+        seed: Generator seed
+    """
+    results: Dict[str, Dict[str, List]] = {}
+    over_budget = set()
+
+    with tempfile.TemporaryDirectory(prefix='pair-scaling-') as tmp:
+        for n in sizes:
+            config = generate_pairlist_config(n, n_categories, seed)
+            config_path = write_config(config, Path(tmp) / f"pairs_{n}.json")
+            print(f"📈 N={n:,} pairs, K={n_categories} categories")
+
+            with MarketStubServer(coins=synthetic_market_coins(config, seed)) as stub:
+                for name, func in build_methods(config_path, Path(tmp) / 'cache', stub.url, seed):
+                    if name in over_budget:
+                        continue
+                    elapsed = time_call(func, repeats)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        peak, _ = PerformanceMonitor.measure_memory(func)
+                    entry = results.setdefault(name, {'sizes': [], 'times': [], 'peak_memory': []})
+                    entry['sizes'].append(n)
+                    entry['times'].append(elapsed)
+                    entry['peak_memory'].append(peak)
+                    if elapsed > method_budget:
+                        over_budget.add(name)
+
+    for entry in results.values():
+        entry['exponent'] = fit_exponent(entry['sizes'], entry['times'])
+        entry['complexity'] = complexity_label(entry['exponent'])
+    return results
+
+
+def print_scaling_report(results: Dict, sizes: List[int]) -> None:
+    """Print time and memory per method and size with the fitted complexity"""
+    print(f"\n{'='*120}")
+    print(f"📊 SCALING BENCHMARK REPORT")
+    print(f"{'='*120}")
+    print(f"🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    header = ''.join(f"{f'N={n:,}':>14}" for n in sizes)
+    print(f"\n⏱️  TIME (ms):")
+    print(f"{'Method':<42}{header} {'Exponent':>10} {'Fit':>10}")
+    print("-" * 120)
+    for name, entry in results.items():
+        by_size = dict(zip(entry['sizes'], entry['times']))
+        cells = ''.join(f"{by_size[n]*1000:>14.3f}" if n in by_size else f"{'skipped':>14}" for n in sizes)
+        print(f"{name:<42}{cells} {entry['exponent']:>10.2f} {entry['complexity']:>10}")
+
+    print(f"\n💾 PEAK MEMORY (KB):")
+    print(f"{'Method':<42}{header}")
+    print("-" * 120)
+    for name, entry in results.items():
+        by_size = dict(zip(entry['sizes'], entry['peak_memory']))
+        cells = ''.join(f"{by_size[n]/1024:>14.1f}" if n in by_size else f"{'skipped':>14}" for n in sizes)
+        print(f"{name:<42}{cells}")
+
+
+def main():
+    """Run the scaling benchmark"""
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the pair selectors")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--method-budget', type=float, default=10.0,
+                        help="Seconds after which a method is skipped at larger sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', type=Path, default=Path("user_data/scaling_benchmark.json"))
+    args = parser.parse_args()
+
+    results = run_scaling_benchmark(args.sizes, args.categories, args.repeats,
+                                    args.method_budget, args.seed)
+    print_scaling_report(results, args.sizes)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'categories': args.categories,
+                   'results': results}, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Selection Cache for Freqtrade Pair Selectors
+Versioned, TTL-based on-disk cache shared safely between several processes
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, is_dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+import logging
+
+from instrumentation import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = "pair-selection-cache"
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CacheStats:
+    """Cache hit/miss counters"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert dataclasses (and lists of them) into JSON-serializable structures"""
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+@contextmanager
+def file_lock(lock_file: Union[str, Path]) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on lock_file"""
+    with open(lock_file, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Build a stable cache key from JSON-serializable parts"""
+    payload = json.dumps(to_jsonable(parts), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SelectionCache:
+    """
+    File-per-entry JSON cache with TTL and size/age eviction
+
+    Entries are written to a temp file and renamed into place, so readers
+    never see partial writes. Writers and eviction hold an exclusive file
+    lock so several bot processes can share one cache directory.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], ttl: timedelta = timedelta(hours=6),
+                 max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock_file = self.cache_dir / ".lock"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _locked(self):
+        """Hold an exclusive inter-process lock on the cache directory"""
+        return file_lock(self._lock_file)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing, expired or unreadable"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            metrics.count('cache_misses')
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            self.stats.misses += 1
+            metrics.count('cache_misses')
+            return None
+
+        if (entry.get('format') != CACHE_FORMAT or
+                entry.get('version') != CACHE_FORMAT_VERSION or
+                entry.get('expires', 0) < time.time()):
+            self.stats.misses += 1
+            metrics.count('cache_misses')
+            return None
+
+        self.stats.hits += 1
+        metrics.count('cache_hits')
+        return entry['value']
+
+    def set(self, key: str, value: Any, ttl: Optional[timedelta] = None) -> None:
+        """Store a value atomically (ttl can shorten, not extend, the cache-wide ttl)"""
+        now = time.time()
+        entry = {
+            'format': CACHE_FORMAT,
+            'version': CACHE_FORMAT_VERSION,
+            'key': key,
+            'created': now,
+            'expires': now + (ttl or self.ttl).total_seconds(),
+            'value': to_jsonable(value)
+        }
+        try:
+            with metrics.stage('cache_write'), self._locked():
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-', suffix='.json')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(entry, f, separators=(',', ':'))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self._entry_path(key))
+                except BaseException:
+                    Path(tmp_path).unlink(missing_ok=True)
+                    raise
+                self.stats.writes += 1
+                self._evict_locked()
+        except Exception as e:
+            logger.warning(f"Failed to save cache entry: {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       ttl: Optional[timedelta] = None) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = to_jsonable(compute())
+            self.set(key, value, ttl)
+        return value
+
+    def evict(self) -> int:
+        """Remove expired entries and trim the cache to its size limits"""
+        with self._locked():
+            return self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.cache_dir.glob('*.json'):
+            if path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl.total_seconds():
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Oldest first until both limits hold
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            removed += 1
+
+        self.stats.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._locked():
+            for path in self.cache_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+    def stats_dict(self) -> Dict[str, int]:
+        """Get counters as a plain dict"""
+        return asdict(self.stats)
+
+
+def cached_selection(decode: Optional[Callable[[Any], Any]] = None,
+                     market: Optional[Callable[[Any], Optional[str]]] = None):
+    """
+    Cache a selector method's result keyed by config digest, method and parameters
+
+    The owning object must provide `cache` (a SelectionCache or None to
+    disable caching) and `config_digest` (hash of the config file content).
+    An optional `scoring_digest` attribute keys extra scoring inputs.
+
+    Methods reading market data pass `market`, which maps the owner to the
+    identity of that data; None means the data cannot be identified (it may
+    differ on every read) and the call is not cached.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+            market_digest = market(self) if market else ''
+            if market_digest is None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(list(bound.arguments.items())[1:])
+            parts = (self.config_digest, method.__name__, params)
+            if market_digest:
+                parts += (market_digest,)
+            scoring_digest = getattr(self, 'scoring_digest', None)
+            if scoring_digest:
+                parts += (scoring_digest,)
+            key = make_cache_key(*parts)
+            value = self.cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+            return decode(value) if decode else value
+
+        return wrapper
+    return decorator
@@ -4,32 +4,46 @@ Simple Pair Selector for Freqtrade Strategy
 Selects top performing pairs from a predefined list without external API calls
 """
 
-import json
+import math
 import random
 from datetime import datetime
 
+from config_service import ConfigError, ConfigView
+from instrumentation import metrics
+
 class SimplePairSelector:
-    def __init__(self, config_file="user_data/pairlists/top_50_pairs.json"):
-        """Initialize the pair selector"""
+    def __init__(self, config_file="user_data/pairlists/top_50_pairs.json", provider=None):
+        """Initialize the pair selector (provider: MarketDataProvider ranking by volume, curated order if None)"""
         self.config_file = config_file
-        self.pairs_config = self.load_config()
+        self.provider = provider
+        self._config_view = ConfigView(config_file)
+        self.load_config()
         
     def load_config(self):
-        """Load pair configuration from JSON file"""
+        """Load pair configuration from JSON file (parsed once, reloaded when it changes)"""
         try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Config file {self.config_file} not found")
+            return self._config_view.load().data
+        except ConfigError as e:
+            print(e)
             return None
     
+    @property
+    def pairs_config(self):
+        """Current pair configuration, or None if it could not be loaded"""
+        config = self._config_view.current()
+        return config.data if config else None
+    
+    @property
+    def universe(self):
+        """Compiled universe of the current configuration"""
+        config = self._config_view.current()
+        return config.universe if config else None
+    
     def get_all_pairs(self):
         """Get all pairs from all categories"""
-        all_pairs = []
-        for category, pairs in self.pairs_config['top_50_pairs']['categories'].items():
-            all_pairs.extend(pairs)
-        return all_pairs
+        return list(self.universe.pairs)
     
+    @metrics.timed('select_by_category_weights')
     def select_by_category_weights(self, max_pairs=10):
         """Select pairs based on category weights"""
         strategy = self.pairs_config['top_50_pairs']['selection_strategy']
@@ -70,24 +84,33 @@ class SimplePairSelector:
         
         return selected_pairs[:max_pairs]
     
+    @metrics.timed('select_random_top_pairs')
     def select_random_top_pairs(self, max_pairs=10):
         """Select random pairs from the top 50"""
         all_pairs = self.get_all_pairs()
         return random.sample(all_pairs, min(max_pairs, len(all_pairs)))
     
+    @metrics.timed('select_by_volume_priority')
     def select_by_volume_priority(self, max_pairs=10):
-        """Select pairs prioritizing high volume coins"""
-        # Priority order based on typical volume
-        priority_order = [
-            'BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT',
-            'XRP/USDT:USDT', 'ADA/USDT:USDT', 'AVAX/USDT:USDT', 'DOT/USDT:USDT',
-            'MATIC/USDT:USDT', 'LINK/USDT:USDT', 'UNI/USDT:USDT', 'LTC/USDT:USDT',
-            'BCH/USDT:USDT', 'ATOM/USDT:USDT', 'NEAR/USDT:USDT', 'OP/USDT:USDT',
-            'ARB/USDT:USDT', 'MKR/USDT:USDT', 'AAVE/USDT:USDT', 'COMP/USDT:USDT'
-        ]
+        """Select pairs prioritizing high volume coins (pairs without volume data are skipped)"""
+        if self.provider is None:
+            # Priority order based on typical volume
+            priority_order = [
+                'BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT',
+                'XRP/USDT:USDT', 'ADA/USDT:USDT', 'AVAX/USDT:USDT', 'DOT/USDT:USDT',
+                'MATIC/USDT:USDT', 'LINK/USDT:USDT', 'UNI/USDT:USDT', 'LTC/USDT:USDT',
+                'BCH/USDT:USDT', 'ATOM/USDT:USDT', 'NEAR/USDT:USDT', 'OP/USDT:USDT',
+                'ARB/USDT:USDT', 'MKR/USDT:USDT', 'AAVE/USDT:USDT', 'COMP/USDT:USDT'
+            ]
+            return priority_order[:max_pairs]
         
-        return priority_order[:max_pairs]
+        all_pairs = self.get_all_pairs()
+        volume = self.provider.get_snapshot(all_pairs)['volume_24h'].tolist()
+        known = [i for i, v in enumerate(volume) if not math.isnan(v)]
+        ranked = sorted(known, key=lambda i: volume[i], reverse=True)
+        return [all_pairs[i] for i in ranked[:max_pairs]]
     
+    @metrics.timed('report_render')
     def print_selection(self, selected_pairs, method_name):
         """Print the selected pairs"""
         print(f"\n{'='*60}")
@@ -98,16 +121,13 @@ class SimplePairSelector:
         
         print(f"\n📊 SELECTED PAIRS:")
         for i, pair in enumerate(selected_pairs, 1):
-            symbol = pair.split('/')[0]
+            symbol = self.universe.symbol(pair)
             print(f"{i:2d}. {symbol:<8} ({pair})")
         
         # Category breakdown
-        categories = self.pairs_config['top_50_pairs']['categories']
         print(f"\n🏷️  CATEGORY BREAKDOWN:")
-        for category, pairs in categories.items():
-            category_pairs = [p for p in pairs if p in selected_pairs]
-            if category_pairs:
-                print(f"{category.replace('_', ' ').title()}: {len(category_pairs)} pairs")
+        for category, count in self.universe.category_counts(selected_pairs).items():
+            print(f"{category.replace('_', ' ').title()}: {count} pairs")
         
         print(f"\n🎯 FREQTRADE CONFIG:")
         print("Add these to your config.json pair_whitelist:")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Streaming Top-K Selection for Freqtrade Pair Selection
+Keeps only the best K rows of market data consumed page by page, so the whole
+listed market can be ranked in O(K) memory
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from lazy_imports import lazy_import
+from pair_scoring import performance_scores
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingTopK:
+    """
+    Top-k rows of a stream of scored chunks
+
+    Each chunk is cut to its own top k with a partition and merged with the
+    current buffer, so memory stays at k rows plus one chunk. Ties keep stream
+    order. Rows with a non-finite score (filtered out) are dropped.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self.seen = 0
+        self.passed = 0
+        self._scores = np.empty(0)
+        self._order = np.empty(0, dtype=np.int64)
+        self._items: List = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def threshold(self) -> float:
+        """Score a new row must beat once the buffer is full (-inf before that)"""
+        if len(self._items) < self.k or self.k == 0:
+            return -np.inf
+        return float(self._scores[-1])
+
+    def push(self, scores: np.ndarray, items: Sequence) -> None:
+        """Offer one chunk of rows (items[i] is kept only if scores[i] makes the top k)"""
+        scores = np.asarray(scores, dtype=np.float64)
+        order = self.seen + np.arange(scores.size)
+        self.seen += scores.size
+        valid = np.flatnonzero(np.isfinite(scores))
+        self.passed += valid.size
+        if self.k == 0 or valid.size == 0:
+            return
+
+        # Rows below the current k-th score can never enter
+        valid = valid[scores[valid] >= self.threshold]
+        if valid.size > self.k:
+            # Keep every row tied with the chunk's k-th score so ties resolve by order below
+            kth = -np.partition(-scores[valid], self.k - 1)[self.k - 1]
+            valid = valid[scores[valid] >= kth]
+
+        merged_scores = np.concatenate([self._scores, scores[valid]])
+        merged_order = np.concatenate([self._order, order[valid]])
+        best = np.lexsort((merged_order, -merged_scores))[:self.k]
+        merged_items = self._items + [items[i] for i in valid.tolist()]
+        self._scores = merged_scores[best]
+        self._order = merged_order[best]
+        self._items = [merged_items[i] for i in best.tolist()]
+
+    def result(self) -> Tuple[np.ndarray, List]:
+        """Scores and items of the current top k, best first"""
+        return self._scores.copy(), list(self._items)
+
+
+def market_page_columns(page: Sequence[Dict], quote: str = 'USDT') -> Dict[str, np.ndarray]:
+    """Columnar arrays of one CoinGecko /coins/markets page (volatility: |24h change|)"""
+    symbols = np.array([str(coin.get('symbol') or '').upper() for coin in page], dtype=object)
+    price_change = np.array([coin.get('price_change_percentage_24h') or 0.0 for coin in page],
+                            dtype=np.float64) / 100
+    return {
+        'symbol': symbols,
+        'pair': symbols + f"/{quote}:{quote}",
+        'volume_24h': np.array([coin.get('total_volume') or 0.0 for coin in page], dtype=np.float64),
+        'market_cap': np.array([coin.get('market_cap') or 0.0 for coin in page], dtype=np.float64),
+        'price_change_24h': price_change,
+        'volatility': np.abs(price_change)
+    }
+
+
+class _ChunkRows:
+    """Row view of a columnar chunk; only indexed rows are materialized"""
+    __slots__ = ('chunk',)
+
+    def __init__(self, chunk: Dict[str, np.ndarray]):
+        self.chunk = chunk
+
+    def __getitem__(self, i: int) -> Dict:
+        return {name: values[i].item() if hasattr(values[i], 'item') else values[i]
+                for name, values in self.chunk.items()}
+
+
+def stream_performance_top(chunks: Iterable[Dict[str, np.ndarray]], max_pairs: int = 10,
+                           min_volume: float = 10_000_000,
+                           max_volatility: float = 0.15,
+                           extra_score=None) -> Tuple[StreamingTopK, List[Dict]]:
+    """
+    Filter and score columnar chunks as they arrive, keeping the top max_pairs rows
+
+    The composite performance score uses fixed caps (see pair_scoring), so a
+    row's score does not depend on the rest of the stream. Scores normalized by
+    the universe min/max cannot be computed before the last page arrives and
+    are therefore not supported here.
+
+    Args:
+        chunks: Dicts of equally long arrays with at least 'pair', 'volume_24h',
+            'market_cap' and 'volatility'
+        max_pairs: Rows to keep
+        min_volume: Minimum 24h volume filter
+        max_volatility: Maximum volatility filter
+        extra_score: Optional callable (chunk -> array) added to the score
+
+    Returns:
+        The top-k buffer (with seen/passed counters) and the kept rows, best first
+    """
+    top = StreamingTopK(max_pairs)
+    for chunk in chunks:
+        volume, market_cap, volatility = chunk['volume_24h'], chunk['market_cap'], chunk['volatility']
+        scores = performance_scores(volume, market_cap, volatility)
+        if extra_score is not None:
+            scores = scores + extra_score(chunk)
+        scores[(volume < min_volume) | (volatility > max_volatility)] = -np.inf
+        top.push(scores, _ChunkRows(chunk))
+    scores, rows = top.result()
+    for row, score in zip(rows, scores.tolist()):
+        row['score'] = score
+    return top, rows
+
+
+def iter_market_columns(pages: Iterable[Sequence[Dict]], quote: str = 'USDT') -> Iterator[Dict[str, np.ndarray]]:
+    """Convert fetched pages into columnar chunks, one page at a time"""
+    for page in pages:
+        if page:
+            yield market_page_columns(page, quote)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Rank the whole listed market page by page"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from market_data_fetcher import COINGECKO_API_URL, MarketDataFetcher
+
+    parser = argparse.ArgumentParser(description="Streaming top-K selection over paged market data")
+    parser.add_argument('--pages', type=int, default=20, help="Market pages to scan (250 coins each)")
+    parser.add_argument('--max-pairs', type=int, default=10)
+    parser.add_argument('--min-volume', type=float, default=10_000_000)
+    parser.add_argument('--max-volatility', type=float, default=0.15)
+    parser.add_argument('--api-url', default=COINGECKO_API_URL)
+    parser.add_argument('-o', '--output', help="Write the selected rows as JSON")
+    args = parser.parse_args(argv)
+
+    with MarketDataFetcher(base_url=args.api_url) as fetcher:
+        pages = fetcher.iter_market_pages_sync(pages=args.pages)
+        top, rows = stream_performance_top(iter_market_columns(pages), args.max_pairs,
+                                           args.min_volume, args.max_volatility)
+
+    print(f"\n🌊 STREAMED {top.seen} coins, {top.passed} passed filters")
+    print(f"{'Rank':<5} {'Pair':<20} {'Volume':>14} {'Volatility':>11} {'Score':>7}")
+    for rank, row in enumerate(rows, 1):
+        print(f"{rank:<5} {row['pair']:<20} ${row['volume_24h']/1e6:>12.1f}M "
+              f"{row['volatility']*100:>10.2f}% {row['score']:>7.3f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n✅ Selection written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
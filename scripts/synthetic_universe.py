@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Synthetic Pair Universe Generator
+Builds valid top_50_pairs.json-style configs with N pairs and K categories
+(plus matching stub market data) for scaling benchmarks
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import string
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Category keys the selectors reference directly
+STANDARD_CATEGORIES = (
+    'blue_chips', 'defi_tokens', 'layer1_blockchains', 'gaming_metaverse',
+    'payment_solutions', 'enterprise_blockchains', 'utility_tokens'
+)
+
+
+def synthetic_symbols(n: int) -> List[str]:
+    """Generate n unique upper-case base symbols (AAA, AAB, ... then longer)"""
+    letters = string.ascii_uppercase
+    symbols = []
+    length = 3
+    while len(symbols) < n:
+        count = min(n - len(symbols), 26 ** length)
+        for i in range(count):
+            chars = []
+            for _ in range(length):
+                i, r = divmod(i, 26)
+                chars.append(letters[r])
+            symbols.append(''.join(reversed(chars)))
+        length += 1
+    return symbols
+
+
+def generate_pairlist_config(n_pairs: int, n_categories: int = 7, seed: int = 0,
+                             quote: str = 'USDT') -> Dict:
+    """
+    Generate a pairlist config with n_pairs pairs spread over n_categories
+
+    The standard category keys are always present (possibly empty) so every
+    selector can run against the result.
+    """
+    rng = np.random.default_rng(seed)
+    n_categories = max(1, n_categories)
+    names = list(STANDARD_CATEGORIES[:n_categories])
+    names += [f"category_{k}" for k in range(len(names), n_categories)]
+
+    pairs = [f"{symbol}/{quote}:{quote}" for symbol in synthetic_symbols(n_pairs)]
+    # Skewed category sizes, like real universes
+    assignment = rng.choice(n_categories, size=n_pairs, p=_zipf_weights(n_categories))
+    categories = {name: [] for name in names}
+    for pair, category_id in zip(pairs, assignment.tolist()):
+        categories[names[category_id]].append(pair)
+    for name in STANDARD_CATEGORIES:
+        categories.setdefault(name, [])
+
+    return {
+        'top_50_pairs': {
+            'description': f"Synthetic universe ({n_pairs} pairs, {n_categories} categories, seed {seed})",
+            'categories': categories,
+            'selection_criteria': {
+                'volume_min': 10_000_000,
+                'market_cap_min': 100_000_000,
+                'min_volatility': 0.01,
+                'max_volatility': 0.15
+            },
+            'selection_strategy': {
+                'blue_chips_weight': 0.3,
+                'defi_weight': 0.25,
+                'layer1_weight': 0.25,
+                'gaming_weight': 0.1,
+                'other_weight': 0.1
+            }
+        }
+    }
+
+
+def _zipf_weights(k: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, k + 1)
+    return weights / weights.sum()
+
+
+def synthetic_market_coins(pairs_config: Dict, seed: int = 0) -> List[Dict]:
+    """Build CoinGecko-style market entries for every pair (id = lower-case base symbol)"""
+    pairs = [pair for members in pairs_config['top_50_pairs']['categories'].values() for pair in members]
+    bases = list(dict.fromkeys(pair.split('/')[0] for pair in pairs))
+    rng = np.random.default_rng(seed)
+    n = len(bases)
+    volume = rng.uniform(5_000_000, 500_000_000, n)
+    market_cap = volume * rng.uniform(50, 500, n)
+    price = rng.uniform(0.01, 50_000, n)
+    change = rng.uniform(-20, 20, n)
+    order = np.argsort(-market_cap)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(1, n + 1)
+    return [
+        {
+            'id': base.lower(),
+            'symbol': base.lower(),
+            'name': base.title(),
+            'current_price': float(price[i]),
+            'market_cap': float(market_cap[i]),
+            'market_cap_rank': int(rank[i]),
+            'total_volume': float(volume[i]),
+            'price_change_percentage_24h': float(change[i])
+        }
+        for i, base in enumerate(bases)
+    ]
+
+
+def write_config(pairs_config: Dict, path: Path) -> Path:
+    """Write a generated config to disk"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(pairs_config, f)
+    return path
+
+
+def main(argv: Optional[List[str]] = None):
+    """Generate a synthetic pairlist config"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic pairlist config")
+    parser.add_argument('--pairs', type=int, default=1000)
+    parser.add_argument('--categories', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', type=Path, default=Path("user_data/pairlists/synthetic_pairs.json"))
+    args = parser.parse_args(argv)
+
+    config = generate_pairlist_config(args.pairs, args.categories, args.seed)
+    write_config(config, args.output)
+    print(f"✅ Wrote {args.pairs} pairs in {args.categories} categories to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Shared fixtures; the scripts are flat modules, so their directory goes on sys.path"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic_universe import generate_pairlist_config, write_config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory, so default user_data/ paths stay there"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def pairs_config():
+    """Synthetic 60-pair config"""
+    return generate_pairlist_config(60, seed=1)
+
+
+@pytest.fixture
+def config_file(tmp_path, pairs_config):
+    return write_config(pairs_config, tmp_path / "user_data" / "pairlists" / "pairs.json")
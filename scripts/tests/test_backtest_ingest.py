@@ -0,0 +1,85 @@
+"""Streaming parser and incremental ingest of backtest results"""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+import backtest_ingest
+from backtest_ingest import BacktestIngest, ingest_file, iter_backtest_trades
+
+
+def trade(pair, profit_ratio):
+    return {'pair': pair, 'profit_ratio': profit_ratio, 'profit_abs': profit_ratio * 100,
+            'open_date': '2024-01-01 00:00:00+00:00', 'exit_reason': 'roi'}
+
+
+RESULT = {
+    'metadata': {'PivotCamarillaStrategy': {'run_id': 'x'}},
+    'strategy': {
+        'PivotCamarillaStrategy': {
+            'trades': [trade('BTC/USDT:USDT', 0.02), trade('ETH/USDT:USDT', -0.01),
+                       trade('BTC/USDT:USDT', -0.03), trade('BTC/USDT:USDT', 0.01)],
+            'results_per_pair': [{'key': 'BTC/USDT:USDT', 'trades': 3}]
+        },
+        'OtherStrategy': {
+            'trades': [trade('SOL/USDT:USDT', 0.5)]
+        }
+    },
+    'strategy_comparison': []
+}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_stream_matches_a_full_parse(chunk_size):
+    text = json.dumps(RESULT, indent=2)
+    parsed = list(iter_backtest_trades(io.StringIO(text), chunk_size=chunk_size))
+    expected = [(name, t) for name, block in RESULT['strategy'].items() for t in block['trades']]
+    assert parsed == expected
+
+
+def test_truncated_document_raises():
+    text = json.dumps(RESULT)
+    cut = text.index('ETH/USDT:USDT')
+    with pytest.raises(ValueError):
+        list(iter_backtest_trades(io.StringIO(text[:cut]), chunk_size=16))
+
+
+def test_ingest_aggregates_one_strategy(tmp_path):
+    path = tmp_path / "backtest-result-2024.json"
+    path.write_text(json.dumps(RESULT))
+    stats = ingest_file(path, 'PivotCamarillaStrategy')
+    assert set(stats) == {'BTC/USDT:USDT', 'ETH/USDT:USDT'}
+    btc = stats['BTC/USDT:USDT']
+    assert (btc.trades, btc.wins) == (3, 2)
+    assert btc.profit_mean == pytest.approx(0.0)
+    # Peak +0.02 after the first trade, trough -0.01 after the second
+    assert btc.max_drawdown == pytest.approx(0.03)
+
+
+def test_zip_archives_are_read(tmp_path):
+    path = tmp_path / "backtest-result-2024.zip"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("backtest-result-2024.json", json.dumps(RESULT))
+        archive.writestr("backtest-result-2024_config.json", json.dumps({'trades': []}))
+    assert ingest_file(path, 'OtherStrategy')['SOL/USDT:USDT'].trades == 1
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, monkeypatch):
+    results = tmp_path / "backtest_results"
+    results.mkdir()
+    (results / "backtest-result-1.json").write_text(json.dumps(RESULT))
+    ingest = BacktestIngest(results, tmp_path / "cache.json")
+    first = ingest.load()
+    assert first.get('BTC/USDT:USDT').trades == 3
+
+    calls = []
+    original = backtest_ingest.ingest_file
+    monkeypatch.setattr(backtest_ingest, 'ingest_file', lambda *args: calls.append(args) or original(*args))
+    (results / "backtest-result-2.json").write_text(json.dumps(RESULT))
+    second = ingest.load()
+    assert len(calls) == 1
+    assert second.get('BTC/USDT:USDT').trades == 6
+    assert second.get('BTC/USDT:USDT').runs == 2
+    assert second.digest != first.digest
@@ -0,0 +1,85 @@
+"""BatchSelector: shared snapshot, filters and backtest terms for every method"""
+
+import numpy as np
+import pytest
+
+from batch_selector import BatchSelector, SelectionSpec
+from market_data_provider import SimulatedMarketData
+from optimized_pair_selector import OptimizedPairSelector
+
+
+class CountingMarketData(SimulatedMarketData):
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.snapshots = 0
+
+    def get_snapshot(self, pairs):
+        self.snapshots += 1
+        return super().get_snapshot(pairs)
+
+
+@pytest.fixture
+def provider():
+    return CountingMarketData(seed=5)
+
+
+@pytest.fixture
+def batch(config_file, tmp_path, provider):
+    selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"), provider=provider)
+    return BatchSelector(selector)
+
+
+@pytest.mark.parametrize('method', ['performance', 'incremental', 'decorrelated', 'market_cap'])
+def test_filters_apply_to_every_market_method(batch, method):
+    market = batch.market
+    min_volume, max_volatility = 200_000_000, 0.1
+    result = batch.evaluate(SelectionSpec('s', method, max_pairs=50,
+                                          filters={'min_volume': min_volume, 'max_volatility': max_volatility}))
+    index = batch.selector.universe.index
+    rows = [index[pair] for pair in result['pairs']]
+    assert rows
+    assert (market['volume_24h'][rows] >= min_volume).all()
+    assert (market['volatility'][rows] <= max_volatility).all()
+    passing = (market['volume_24h'] >= min_volume) & (market['volatility'] <= max_volatility)
+    assert len(rows) == min(50, int(passing.sum()))
+
+
+def test_one_snapshot_for_the_whole_batch(batch, provider):
+    specs = [SelectionSpec(method, method, max_pairs=5)
+             for method in ('performance', 'incremental', 'decorrelated', 'market_cap', 'category_weights')]
+    batch.run(specs)
+    assert provider.snapshots == 1
+
+
+def test_market_cap_ranks_the_shared_snapshot(batch):
+    pairs = batch.evaluate(SelectionSpec('s', 'market_cap', max_pairs=5))['pairs']
+    market_cap = batch.market['market_cap']
+    expected = np.argsort(-market_cap)[:5]
+    all_pairs = batch.selector.get_all_pairs()
+    assert pairs == [all_pairs[i] for i in expected.tolist()]
+
+
+def test_backtest_terms_reach_the_performance_scores(batch, monkeypatch):
+    plain = batch.evaluate(SelectionSpec('s', 'performance', max_pairs=5))
+    boost = np.zeros(len(batch.selector.get_all_pairs()))
+    last = batch.selector.universe.index[plain['pairs'][-1]]
+    boost[last] = 10.0
+    monkeypatch.setattr(batch, 'extra_score', boost)
+    boosted = batch.evaluate(SelectionSpec('s', 'performance', max_pairs=5))
+    assert boosted['pairs'][0] == plain['pairs'][-1]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_incremental_specs_keep_their_own_state(batch, workers):
+    loose = {'min_volume': 10_000_000, 'max_volatility': 0.2}
+    strict = {'min_volume': 200_000_000, 'max_volatility': 0.1}
+    specs = [SelectionSpec('loose', 'incremental', max_pairs=8, filters=loose),
+             SelectionSpec('strict', 'incremental', max_pairs=3, filters=strict)] * 2
+    results = batch.run(specs, workers=workers)
+
+    for result, spec in zip(results, specs):
+        expected = batch.evaluate(SelectionSpec('ref', 'performance', spec.max_pairs, filters=spec.filters))
+        assert sorted(result['pairs']) == sorted(expected['pairs'])
+    assert results[0]['pairs'] == results[2]['pairs']
+    assert results[1]['pairs'] == results[3]['pairs']
+    assert not batch.selector.ranking.state_file.exists()
@@ -0,0 +1,73 @@
+"""CandlePrefetcher download, top-up and backfill merges"""
+
+import json
+import time
+
+import pytest
+
+import candle_prefetch
+from candle_prefetch import CandlePrefetcher, SimulatedExchange, write_candles
+
+PAIR = 'BTC/USDT:USDT'
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    """Keep the last closed candle fixed for the whole test"""
+    now = (int(time.time()) // 1800) * 1800 + 900
+    monkeypatch.setattr(candle_prefetch.time, 'time', lambda: float(now))
+
+
+@pytest.fixture
+def exchange():
+    return SimulatedExchange(seed=1, max_limit=40)
+
+
+@pytest.fixture
+def prefetcher(exchange, tmp_path):
+    return CandlePrefetcher(exchange, tmp_path / "data", startup_candles=100, page_limit=40)
+
+
+def stored(prefetcher):
+    return json.loads(prefetcher.data_file(PAIR).read_text())
+
+
+def window(prefetcher):
+    last = prefetcher._last_closed()
+    return list(range(last - 99 * prefetcher.tf_ms, last + 1, prefetcher.tf_ms))
+
+
+def test_new_file_gets_the_startup_window(prefetcher):
+    assert prefetcher.prefetch_pair(PAIR) == 100
+    assert [int(row[0]) for row in stored(prefetcher)] == window(prefetcher)
+
+
+def test_complete_file_costs_no_request(prefetcher, exchange):
+    prefetcher.prefetch_pair(PAIR)
+    calls = exchange.calls
+    assert prefetcher.prefetch_pair(PAIR) == 0
+    assert exchange.calls == calls
+
+
+def test_short_up_to_date_file_is_backfilled(prefetcher, exchange):
+    times = window(prefetcher)
+    recent = [exchange._candle(PAIR, ts) for ts in times[-10:]]
+    write_candles(prefetcher.data_file(PAIR), recent)
+
+    assert prefetcher.prefetch_pair(PAIR) == 90
+    rows = stored(prefetcher)
+    assert [int(row[0]) for row in rows] == times
+    assert rows[-10:] == recent
+
+
+def test_stale_file_is_topped_up_and_its_last_candle_replaced(prefetcher, exchange):
+    times = window(prefetcher)
+    old = [exchange._candle(PAIR, ts) for ts in times[:60]]
+    # Written while the last candle was still open
+    old[-1] = [old[-1][0], 1.0, 1.0, 1.0, 1.0, 1.0]
+    write_candles(prefetcher.data_file(PAIR), old)
+
+    assert prefetcher.prefetch_pair(PAIR) == 40
+    rows = stored(prefetcher)
+    assert [int(row[0]) for row in rows] == times
+    assert rows[59] == exchange._candle(PAIR, times[59])
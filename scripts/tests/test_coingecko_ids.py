@@ -0,0 +1,45 @@
+"""CoinIdIndex persistence and disambiguation against the market stub server"""
+
+import pytest
+
+from coingecko_ids import CoinIdIndex
+from manage_pairs import PairManager
+from market_data_fetcher import MarketDataFetcher
+from market_stub_server import MarketStubServer, synthetic_coin
+
+
+@pytest.fixture
+def stub():
+    coins = [synthetic_coin('bitcoin', 1), synthetic_coin('ethereum', 2)]
+    coins[0]['symbol'], coins[1]['symbol'] = 'btc', 'eth'
+    # Copycat token sharing a symbol, far smaller than the real one
+    copycat = synthetic_coin('bitcoin-copy', 3)
+    copycat.update(symbol='btc', market_cap=1.0)
+    with MarketStubServer(coins=coins + [copycat]) as server:
+        yield server
+
+
+def test_shared_symbol_resolves_to_highest_market_cap(stub, tmp_path):
+    index = CoinIdIndex(MarketDataFetcher(base_url=stub.url, retries=0), cache_file=tmp_path / "ids.json")
+    assert index.ids_for_pairs(['BTC/USDT:USDT', 'ETH/USDT:USDT', 'XYZ/USDT:USDT']) == {
+        'BTC/USDT:USDT': 'bitcoin', 'ETH/USDT:USDT': 'ethereum'}
+
+    requests = stub.request_count
+    warm = CoinIdIndex(MarketDataFetcher(base_url=stub.url, retries=0), cache_file=tmp_path / "ids.json")
+    assert warm.coin_id('btc') == 'bitcoin'
+    assert stub.request_count == requests
+
+
+def test_memory_only_index(stub, workdir):
+    index = CoinIdIndex(MarketDataFetcher(base_url=stub.url, retries=0), cache_file=None)
+    assert index.coin_id('eth') == 'ethereum'
+    assert not (workdir / "user_data").exists()
+
+
+def test_stub_endpoint_is_not_persisted(stub, config_file, tmp_path):
+    id_cache = tmp_path / "cache" / "coingecko_ids.json"
+    manager = PairManager(str(config_file), fetcher=MarketDataFetcher(base_url=stub.url, retries=0),
+                          history_dir=None, id_cache_file=id_cache)
+    assert manager.id_index.coin_id('btc') == 'bitcoin'
+    assert not id_cache.exists()
+    assert not (tmp_path / "user_data" / "cache" / "coingecko_ids.json").exists()
@@ -0,0 +1,84 @@
+"""IncrementalRanking hysteresis and the selector's ranking state"""
+
+import numpy as np
+
+from config_service import config_service
+from incremental_ranking import IncrementalRanking
+from optimized_pair_selector import OptimizedPairSelector
+from synthetic_universe import generate_pairlist_config, write_config
+
+KEYS = ['a', 'b', 'c', 'd']
+
+
+def identity(rows):
+    return rows[:, 0].copy()
+
+
+def rank(ranking, scores, now, max_items=2):
+    return [key for key, _ in ranking.rank(KEYS, np.array(scores, dtype=float), identity, max_items, now=now)]
+
+
+def test_challenger_needs_the_margin():
+    ranking = IncrementalRanking(margin=0.1, min_hold=None)
+    assert rank(ranking, [1.0, 0.9, 0.5, 0.0], now=0) == ['a', 'b']
+    # c beats b, but not by the margin
+    assert rank(ranking, [1.0, 0.9, 0.95, 0.0], now=1) == ['a', 'b']
+    assert ranking.swaps == 0
+    assert rank(ranking, [1.0, 0.9, 1.05, 0.0], now=2) == ['c', 'a']
+    assert ranking.swaps == 1
+
+
+def test_margin_protection_ends_after_min_hold():
+    ranking = IncrementalRanking(margin=0.1, min_hold=100.0)
+    rank(ranking, [1.0, 0.9, 0.5, 0.0], now=0)
+    assert rank(ranking, [1.0, 0.9, 0.95, 0.0], now=50) == ['a', 'b']
+    assert rank(ranking, [1.0, 0.9, 0.95, 0.0], now=150) == ['a', 'c']
+
+
+def test_filtered_incumbent_leaves_at_once():
+    ranking = IncrementalRanking(margin=10.0, min_hold=None)
+    rank(ranking, [1.0, 0.9, 0.5, 0.0], now=0)
+    assert rank(ranking, [1.0, -np.inf, 0.5, 0.0], now=1) == ['a', 'c']
+
+
+def test_only_changed_rows_are_rescored():
+    ranking = IncrementalRanking()
+    rank(ranking, [1.0, 0.9, 0.5, 0.0], now=0)
+    assert ranking.rescored == 4
+    rank(ranking, [1.0, 0.9, 0.6, 0.0], now=1)
+    assert ranking.rescored == 1
+    ranking.rank(KEYS, np.array([1.0, 0.9, 0.6, 0.0]), identity, 2, scoring_key='other', now=2)
+    assert ranking.rescored == 4
+
+
+def test_state_survives_restarts(tmp_path):
+    state = tmp_path / "ranking.json"
+    first = IncrementalRanking(margin=0.1, min_hold=None, state_file=state)
+    rank(first, [1.0, 0.9, 0.5, 0.0], now=0)
+    second = IncrementalRanking(margin=0.1, min_hold=None, state_file=state)
+    assert rank(second, [1.0, 0.9, 0.95, 0.0], now=1) == ['a', 'b']
+    assert second.rescored == 1
+
+
+def test_selectors_of_different_configs_keep_separate_state(tmp_path):
+    cache_dir = tmp_path / "cache"
+    selectors = []
+    for seed in (1, 2):
+        config = write_config(generate_pairlist_config(30, seed=seed), tmp_path / f"pairs_{seed}.json")
+        selectors.append(OptimizedPairSelector(str(config), cache_dir=str(cache_dir)))
+    files = {selector.ranking.state_file for selector in selectors}
+    assert len(files) == 2
+    for selector in selectors:
+        selector.select('incremental', 5)
+    assert all(path.exists() for path in files)
+
+
+def test_state_follows_a_config_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_service, 'check_interval', 0.0)
+    config = write_config(generate_pairlist_config(30, seed=1), tmp_path / "pairs.json")
+    selector = OptimizedPairSelector(str(config), cache_dir=str(tmp_path / "cache"))
+    before = selector.ranking.state_file
+    write_config(generate_pairlist_config(40, seed=1), config)
+    selector.select('incremental', 5)
+    assert selector.ranking.state_file != before
+    assert selector.ranking.state_file.exists()
@@ -0,0 +1,28 @@
+"""PairManager market data over the whole universe"""
+
+import json
+
+import pytest
+
+from manage_pairs import PairAnalysisSession, PairManager
+from market_data_provider import FileMarketData
+from synthetic_universe import synthetic_market_coins
+
+
+@pytest.fixture
+def manager(config_file, pairs_config, tmp_path):
+    market_file = tmp_path / "markets.json"
+    market_file.write_text(json.dumps(synthetic_market_coins(pairs_config, seed=1)))
+    return PairManager(config_file=str(config_file), history_dir=None, provider=FileMarketData(market_file))
+
+
+def test_market_data_is_not_truncated(manager):
+    pairs = manager.get_all_pairs()
+    assert len(pairs) > 50
+    assert len(manager.get_market_data(pairs)) == len(pairs)
+    assert len(manager.get_market_data(pairs, limit=10)) == 10
+
+
+def test_analysis_session_covers_every_pair(manager):
+    session = PairAnalysisSession(manager)
+    assert len(session.analysis) == len(manager.get_all_pairs())
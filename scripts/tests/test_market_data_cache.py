@@ -0,0 +1,79 @@
+"""Selection caching of market-data-driven methods"""
+
+import json
+
+import numpy as np
+
+from market_data_provider import FileMarketData, SimulatedMarketData
+from optimized_pair_selector import OptimizedPairSelector
+from simple_pair_selector import SimplePairSelector
+from synthetic_universe import synthetic_market_coins
+
+CURATED = ['BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT', 'XRP/USDT:USDT']
+
+
+def test_simulated_snapshots_are_not_cached(config_file, tmp_path):
+    for seed in (None, 7):
+        selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / f"cache-{seed}"),
+                                         provider=SimulatedMarketData(seed))
+        first = selector.select('performance', 5)
+        second = selector.select('performance', 5)
+        assert first != second
+        assert selector.cache_stats['hits'] == 0
+
+
+def test_seeded_simulation_replays_its_sequence(config_file, tmp_path):
+    runs = []
+    for name in ('a', 'b'):
+        selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / name),
+                                         provider=SimulatedMarketData(3))
+        runs.append([selector.select('performance', 5) for _ in range(2)])
+    assert runs[0] == runs[1]
+
+
+def test_rewritten_market_file_is_not_served_from_cache(config_file, pairs_config, tmp_path):
+    market_file = tmp_path / "markets.json"
+    market_file.write_text(json.dumps(synthetic_market_coins(pairs_config, seed=1)))
+    selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"),
+                                     provider=FileMarketData(market_file))
+    before = selector.select('market_cap', 5)
+
+    market_file.write_text(json.dumps(synthetic_market_coins(pairs_config, seed=2)))
+    after = selector.select('market_cap', 5)
+    assert after != before
+    assert selector.cache_stats['hits'] == 0
+
+
+def test_unchanged_market_file_is_served_from_cache(config_file, pairs_config, tmp_path):
+    market_file = tmp_path / "markets.json"
+    market_file.write_text(json.dumps(synthetic_market_coins(pairs_config, seed=1)))
+    provider = FileMarketData(market_file)
+    selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"), provider=provider)
+    assert provider.cache_key is not None
+    first = selector.select('performance', 5)
+    assert selector.select('performance', 5) == first
+    assert selector.cache_stats['hits'] == 1
+
+    # A fresh selector reuses the cached snapshot instead of the file
+    fresh = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"), provider=provider)
+    snapshot = fresh.get_provider_snapshot()
+    assert fresh.cache_stats['hits'] == 1
+    expected = provider.get_snapshot(fresh.universe.pairs)
+    assert all(np.array_equal(snapshot[name], expected[name], equal_nan=True) for name in expected)
+
+
+def test_missing_market_file_has_no_cache_key(tmp_path):
+    assert FileMarketData(tmp_path / "missing.json").cache_key is None
+
+
+def test_methods_without_market_data_stay_cached(config_file, tmp_path):
+    selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"),
+                                     provider=SimulatedMarketData())
+    assert selector.select('category_weights', 5) == selector.select('category_weights', 5)
+    assert selector.cache_stats['hits'] == 1
+
+
+def test_curated_order_without_provider(config_file, tmp_path):
+    selector = OptimizedPairSelector(str(config_file), cache_dir=str(tmp_path / "cache"))
+    assert selector.select_by_market_cap_ranking(5) == CURATED
+    assert SimplePairSelector(str(config_file)).select_by_volume_priority(5) == CURATED
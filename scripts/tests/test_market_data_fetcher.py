@@ -0,0 +1,26 @@
+"""MarketDataFetcher retry policy against the market stub server"""
+
+import asyncio
+
+import pytest
+import requests
+
+from market_data_fetcher import MarketDataFetcher
+from market_stub_server import MarketStubServer
+
+
+def test_server_errors_are_retried():
+    with MarketStubServer(universe_size=5, failure_rate=1.0) as stub:
+        with MarketDataFetcher(base_url=stub.url, retries=2, backoff=0.0) as fetcher:
+            with pytest.raises(requests.HTTPError):
+                fetcher.fetch_coin_list()
+        assert stub.request_count == 3
+
+
+def test_client_errors_are_not_retried():
+    with MarketStubServer(universe_size=5) as stub:
+        with MarketDataFetcher(base_url=stub.url, retries=2, backoff=0.0) as fetcher:
+            with pytest.raises(requests.HTTPError) as error:
+                asyncio.run(fetcher._get_with_retries(asyncio.Semaphore(1), '/coins/unknown', {}))
+        assert error.value.response.status_code == 404
+        assert stub.request_count == 1
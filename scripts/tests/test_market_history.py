@@ -0,0 +1,81 @@
+"""MarketHistoryStore chunk compaction"""
+
+import threading
+import time
+
+import market_history
+from market_history import MarketHistoryStore
+
+COINS = [{'symbol': 'btc', 'current_price': 60_000.0, 'total_volume': 1e9, 'market_cap': 1e12,
+          'market_cap_rank': 1},
+         {'symbol': 'eth', 'current_price': 3_000.0, 'total_volume': 5e8, 'market_cap': 4e11,
+          'market_cap_rank': 2}]
+
+DAY = 86400
+
+
+def test_append_compacts_old_chunks_past_the_threshold(tmp_path):
+    store = MarketHistoryStore(tmp_path / "history", compact_threshold=8)
+    old_day = (int(time.time()) // DAY - 3) * DAY
+    for i in range(8):
+        store.append(COINS, timestamp=old_day + i * 1800)
+    assert len(store.chunks()) == 8
+
+    store.append(COINS, timestamp=int(time.time()))
+    assert len(store.chunks()) == 2
+    rows = store.read()
+    assert len(rows) == 18
+    assert (rows['timestamp'][:16] == sorted(rows['timestamp'][:16])).all()
+
+
+def test_recent_chunks_are_left_alone(tmp_path):
+    store = MarketHistoryStore(tmp_path / "history", compact_threshold=2)
+    now = int(time.time())
+    for i in range(4):
+        store.append(COINS, timestamp=now - i * 60)
+    assert len(store.chunks()) == 4
+
+
+def test_threshold_none_never_compacts(tmp_path):
+    store = MarketHistoryStore(tmp_path / "history", compact_threshold=None)
+    old_day = (int(time.time()) // DAY - 3) * DAY
+    for i in range(5):
+        store.append(COINS, timestamp=old_day + i)
+    assert len(store.chunks()) == 5
+
+
+def test_read_during_compaction_sees_each_row_once(tmp_path, monkeypatch):
+    store = MarketHistoryStore(tmp_path / "history", compact_threshold=None)
+    old_day = (int(time.time()) // DAY - 3) * DAY
+    for i in range(8):
+        store.append(COINS, timestamp=old_day + i * 1800)
+
+    results = []
+    reader = threading.Thread(target=lambda: results.append(store.read()))
+    write_chunk = store._write_chunk
+
+    def write_then_read(rows):
+        # Read while the merged chunk and its originals are both on disk
+        path = write_chunk(rows)
+        reader.start()
+        time.sleep(0.2)
+        return path
+
+    monkeypatch.setattr(store, '_write_chunk', write_then_read)
+    assert store.compact() == 8
+    reader.join(timeout=5)
+
+    rows = results[0]
+    assert len(rows) == 16
+    assert len(set(zip(rows['timestamp'].tolist(), rows['symbol_id'].tolist()))) == 16
+
+
+def test_cli_compact(tmp_path, capsys):
+    root = tmp_path / "history"
+    store = MarketHistoryStore(root, compact_threshold=None)
+    old_day = (int(time.time()) // DAY - 3) * DAY
+    for i in range(3):
+        store.append(COINS, timestamp=old_day + i)
+    market_history.main(['--root', str(root), '--compact'])
+    assert len(store.chunks()) == 1
+    assert "Merged 3 chunks into 1" in capsys.readouterr().out
@@ -0,0 +1,40 @@
+"""Selection cache lifetime of the pairlist daemon"""
+
+import argparse
+from datetime import timedelta
+
+import pytest
+
+import pairlist_daemon
+from pairlist_daemon import build_selector_callable
+
+
+def make_args(config_file, **overrides):
+    values = dict(config=str(config_file), source='optimized', method='category_weights', max_pairs=5,
+                  market_data=None, seed=None, no_cache=False)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+@pytest.fixture
+def selectors(monkeypatch):
+    created = []
+    original = pairlist_daemon.OptimizedPairSelector
+
+    def record(*args, **kwargs):
+        created.append(original(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(pairlist_daemon, 'OptimizedPairSelector', record)
+    return created
+
+
+def test_cache_expires_before_next_refresh(config_file, selectors):
+    select = build_selector_callable(make_args(config_file, refresh_period=600))
+    assert len(select()) == 5
+    assert selectors[0].cache.ttl < timedelta(seconds=600)
+
+
+def test_args_without_refresh_period(config_file, selectors):
+    build_selector_callable(make_args(config_file))
+    assert selectors[0].cache.ttl < timedelta(seconds=1800)
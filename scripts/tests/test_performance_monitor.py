@@ -0,0 +1,40 @@
+"""PerformanceMonitor: uncached timings and round validation"""
+
+import pytest
+
+from performance_monitor import PerformanceMonitor, _t_critical
+from synthetic_universe import write_config
+
+
+@pytest.fixture
+def monitor(pairs_config, workdir):
+    write_config(pairs_config, workdir / "user_data" / "pairlists" / "top_50_pairs.json")
+    return PerformanceMonitor(seed=1)
+
+
+def test_rounds_must_be_positive(monitor):
+    with pytest.raises(ValueError):
+        monitor.benchmark('noop', lambda: [], rounds=0)
+
+
+def test_benchmark_single_round(monitor):
+    result = monitor.benchmark('noop', lambda: [1], rounds=1, warmup_time=0.0)
+    assert result.rounds == 1
+    assert result.min_time == result.max_time
+
+
+def test_optimized_timings_are_recomputations(monitor):
+    assert monitor.optimized_selector.cache is None
+    metrics = monitor.benchmark_optimized_selector(iterations=2)
+    uncached = [m for m in metrics if not m.method_name.endswith('(cached)')]
+    cached = [m for m in metrics if m.method_name.endswith('(cached)')]
+    assert all(m.cache_hits == m.cache_misses == 0 for m in uncached)
+    assert sum(m.cache_hits for m in cached) >= 2
+
+
+def test_t_critical_never_narrows_the_interval():
+    assert _t_critical(10) == 2.228
+    # df=11 is not tabulated: df=10's wider value, not df=12's
+    assert _t_critical(11) == 2.228
+    assert _t_critical(29) == 2.060
+    assert _t_critical(31) == 1.96
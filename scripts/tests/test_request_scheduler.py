@@ -0,0 +1,53 @@
+"""RequestScheduler caching and rate-limit handling against the market stub server"""
+
+import pytest
+import requests
+
+from market_stub_server import MarketStubServer
+from request_scheduler import CacheEntry, HTTPCache, RateLimitedError, RequestScheduler
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as session:
+        yield session
+
+
+def test_etag_revalidation(session, tmp_path):
+    with MarketStubServer(universe_size=5) as stub:
+        scheduler = RequestScheduler(cache=HTTPCache(tmp_path / "http"))
+        first = scheduler.get(session, f"{stub.url}/coins/list")
+        second = scheduler.get(session, f"{stub.url}/coins/list")
+        assert stub.not_modified_count == 1
+        assert second.json() == first.json()
+
+
+def test_fresh_entries_cost_no_request(session, tmp_path):
+    with MarketStubServer(universe_size=5, max_age=60) as stub:
+        scheduler = RequestScheduler(cache=HTTPCache(tmp_path / "http"))
+        scheduler.get(session, f"{stub.url}/coins/list")
+        requests_made = stub.request_count
+        scheduler.get(session, f"{stub.url}/coins/list")
+        assert stub.request_count == requests_made
+
+
+def test_throttled_request_serves_the_stale_entry(session, tmp_path):
+    with MarketStubServer(universe_size=5, rate_limit=0.001, burst=1) as stub:
+        scheduler = RequestScheduler(cache=HTTPCache(tmp_path / "http"), max_retries=0)
+        first = scheduler.get(session, f"{stub.url}/coins/list")
+        assert scheduler.get(session, f"{stub.url}/coins/list").json() == first.json()
+        assert stub.throttled_count == 1
+        with pytest.raises(RateLimitedError):
+            RequestScheduler(max_retries=0).get(session, f"{stub.url}/coins/list")
+
+
+def test_cache_evicts_the_least_recently_used_entry(tmp_path):
+    cache = HTTPCache(tmp_path / "http", max_entries=2)
+    for key in ('a', 'b'):
+        assert cache.store(key, CacheEntry(f"http://x/{key}", 200, {'etag': key}, 0.0, key.encode()))
+    assert cache.load('a').body == b'a'
+
+    cache.store('c', CacheEntry("http://x/c", 200, {'etag': 'c'}, 0.0, b'c'))
+    assert cache.load('b') is None
+    assert [cache.load(key).body for key in ('a', 'c')] == [b'a', b'c']
+    assert len(list((tmp_path / "http").glob('*.http'))) == 2
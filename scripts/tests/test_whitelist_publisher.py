@@ -0,0 +1,61 @@
+"""WhitelistPublisher against the bot stub server"""
+
+import json
+import os
+import stat
+
+import pytest
+
+from bot_stub_server import BotStubServer
+from whitelist_publisher import BotAPI, WhitelistPublisher
+
+PAIRS = ['BTC/USDT:USDT', 'ETH/USDT:USDT']
+
+
+@pytest.fixture
+def bot_config(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({'exchange': {'name': 'binance', 'pair_whitelist': PAIRS}}))
+    os.chmod(path, 0o600)
+    return path
+
+
+@pytest.fixture
+def bot(bot_config):
+    with BotStubServer(bot_config, username='u', password='p') as server:
+        yield server
+
+
+def test_unchanged_selection_leaves_the_bot_alone(bot, bot_config, tmp_path):
+    publisher = WhitelistPublisher(bot_config, BotAPI(bot.url, 'u', 'p'), changelog=tmp_path / "changes.jsonl")
+    change = publisher.publish(list(reversed(PAIRS)))
+    assert not change.changed and not change.written
+    assert bot.reload_count == 0
+    assert not (tmp_path / "changes.jsonl").exists()
+
+
+def test_change_is_written_and_reloaded(bot, bot_config, tmp_path):
+    seen = []
+    publisher = WhitelistPublisher(bot_config, BotAPI(bot.url, 'u', 'p'), changelog=tmp_path / "changes.jsonl",
+                                   before_publish=seen.append)
+    change = publisher.publish(['BTC/USDT:USDT', 'SOL/USDT:USDT'])
+    assert (change.added, change.removed) == (['SOL/USDT:USDT'], ['ETH/USDT:USDT'])
+    assert change.written and change.reloaded
+    assert seen == [change]
+    assert bot.reloaded == [['BTC/USDT:USDT', 'SOL/USDT:USDT']]
+    assert stat.S_IMODE(bot_config.stat().st_mode) == 0o600
+    entry = json.loads((tmp_path / "changes.jsonl").read_text())
+    assert entry['added'] == ['SOL/USDT:USDT']
+
+
+def test_rejected_reload_still_writes(bot, bot_config):
+    publisher = WhitelistPublisher(bot_config, BotAPI(bot.url, 'u', 'wrong'), changelog=None)
+    change = publisher.publish(['SOL/USDT:USDT'])
+    assert change.written and not change.reloaded
+    assert publisher.current() == ['SOL/USDT:USDT']
+
+
+def test_empty_selection_keeps_the_whitelist(bot_config):
+    change = WhitelistPublisher(bot_config, changelog=None).publish([])
+    assert not change.written
+    assert WhitelistPublisher(bot_config, changelog=None).current() == PAIRS
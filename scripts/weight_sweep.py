@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Category Weight Sweep for Freqtrade Strategy
+Evaluates thousands of category weight vectors in one bulk call and reports
+the distinct allocations they produce
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+from lazy_imports import lazy_import
+from optimized_pair_selector import OptimizedPairSelector
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+def load_weight_matrix(path: Path) -> 'np.ndarray':
+    """Load weight vectors from .npy or CSV (one vector per row)"""
+    if path.suffix == '.npy':
+        return np.load(path)
+    return np.loadtxt(path, delimiter=',', ndmin=2)
+
+
+def random_weight_matrix(n_samples: int, n_categories: int, seed: int = 0) -> 'np.ndarray':
+    """Sample weight vectors uniformly from the simplex (each row sums to 1)"""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(n_categories), size=n_samples)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Sweep category weight vectors"""
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Evaluate many category weight vectors at once")
+    parser.add_argument('--weights', type=Path, help="Weight matrix (.npy or CSV); random if omitted")
+    parser.add_argument('--samples', type=int, default=10_000, help="Random weight vectors to sample")
+    parser.add_argument('--categories', nargs='+', help="Column order (default: configured weight categories)")
+    parser.add_argument('--max-pairs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10, help="Allocations to print")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('-o', '--output', type=Path, help="Write all distinct allocations as JSON")
+    args = parser.parse_args(argv)
+
+    selector = OptimizedPairSelector(config_file=args.config, use_cache=False)
+    categories = args.categories or list(selector.default_category_weights())
+    if args.weights:
+        weights = load_weight_matrix(args.weights)
+    else:
+        weights = random_weight_matrix(args.samples, len(categories), args.seed)
+
+    start = time.perf_counter()
+    sweep = selector.select_by_category_weights_bulk(weights, args.max_pairs, categories)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    frequencies = sweep.frequencies()
+    order = np.argsort(-frequencies, kind='stable')
+    print(f"⚖️  {len(sweep)} weight vectors -> {len(sweep.allocations)} distinct allocations "
+          f"in {elapsed_ms:.1f} ms")
+    print(f"\n{'Vectors':>8}  " + '  '.join(f"{c[:12]:>12}" for c in categories))
+    for i in order[:args.top]:
+        print(f"{frequencies[i]:>8}  " + '  '.join(f"{n:>12}" for n in sweep.allocations[i]))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        document = {
+            'timestamp': datetime.now().isoformat(),
+            'max_pairs': args.max_pairs,
+            'categories': categories,
+            'vectors': len(sweep),
+            'allocations': [
+                {
+                    'vectors': int(frequencies[i]),
+                    'counts': sweep.allocations[i].tolist(),
+                    'pairs': sweep.selections[i]
+                }
+                for i in order
+            ]
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n✅ Allocations written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Whitelist Publisher for Freqtrade
+Writes a new selection into the bot's config.json only when it changed, then
+hot-reloads the bot through its REST API instead of restarting it
+
+Usage:
+    python scripts/whitelist_publisher.py --bot-config config.json \
+        --api-url http://127.0.0.1:8080 --username freqtrader --password ...
+"""
+
+import argparse
+import json
+import os
+import stat
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+from instrumentation import metrics
+from lazy_imports import lazy_import
+from selection_cache import file_lock
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WhitelistChange:
+    """Outcome of one publish"""
+    previous: List[str]
+    pairs: List[str]
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    written: bool = False
+    reloaded: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def diff_whitelists(previous: Sequence[str], pairs: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Pairs added and removed by a new whitelist (order changes are not a change)"""
+    previous_set, pairs_set = set(previous), set(pairs)
+    return [p for p in pairs if p not in previous_set], [p for p in previous if p not in pairs_set]
+
+
+def read_whitelist(config: Dict) -> List[str]:
+    """pair_whitelist of a Freqtrade config"""
+    return list((config.get('exchange') or {}).get('pair_whitelist') or [])
+
+
+class BotAPI:
+    """
+    Minimal client of the Freqtrade REST API (HTTP basic auth)
+
+    Args:
+        url: API server URL, e.g. http://127.0.0.1:8080
+        username: api_server.username of the bot
+        password: api_server.password of the bot
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(self, url: str, username: Optional[str] = None, password: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.url = url.rstrip('/')
+        self.auth = (username, password) if username else None
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str) -> Dict:
+        response = requests.request(method, f"{self.url}/api/v1/{path}", auth=self.auth, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def reload_config(self) -> Dict:
+        """Ask the bot to reload config.json (it keeps running, open trades are untouched)"""
+        return self._request('POST', 'reload_config')
+
+    def whitelist(self) -> List[str]:
+        """Whitelist the bot is currently trading"""
+        return list(self._request('GET', 'whitelist').get('whitelist', []))
+
+
+class WhitelistPublisher:
+    """
+    Publishes selections to a Freqtrade config
+
+    Every publish diffs the selection against the config's pair_whitelist. An
+    unchanged set of pairs touches nothing, so the bot never reloads (and
+    never downloads startup candles) for a no-op. A change is written
+    atomically (temp file + rename, original permissions kept) under an
+    inter-process lock, the bot is asked to reload through its REST API, and
+    the change is appended to a JSON-lines change log.
+
+    Args:
+        config_path: The bot's config.json
+        bot: BotAPI to reload through (None: only write the config)
+        changelog: JSON-lines file recording every change (None disables it)
+        before_publish: Called with each change before it is written, e.g.
+            CandlePrefetcher.before_publish to download the added pairs' candles
+    """
+
+    def __init__(self, config_path: Union[str, Path] = "config.json", bot: Optional[BotAPI] = None,
+                 changelog: Optional[Union[str, Path]] = "user_data/whitelist_changes.jsonl",
+                 before_publish: Optional[Callable[[WhitelistChange], None]] = None):
+        self.config_path = Path(config_path)
+        self.bot = bot
+        self.changelog = Path(changelog) if changelog else None
+        self.before_publish = before_publish
+        self._lock_file = self.config_path.with_name(self.config_path.name + '.lock')
+
+    def _read(self) -> Dict:
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def current(self) -> List[str]:
+        """pair_whitelist currently in the config"""
+        return read_whitelist(self._read())
+
+    def _write(self, config: Dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.config_path.parent, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=4)
+                f.write('\n')
+                f.flush()
+                os.fsync(f.fileno())
+            # The config holds exchange keys; keep its permissions
+            os.chmod(tmp_path, stat.S_IMODE(self.config_path.stat().st_mode))
+            os.replace(tmp_path, self.config_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _reload(self) -> bool:
+        if self.bot is None:
+            return False
+        try:
+            self.bot.reload_config()
+        except Exception as e:
+            logger.error(f"Bot reload failed, the new whitelist applies on its next restart: {e}")
+            metrics.count('bot_reload_errors')
+            return False
+        metrics.count('bot_reloads')
+        return True
+
+    def _record(self, change: WhitelistChange) -> None:
+        if self.changelog is None:
+            return
+        entry = dict(asdict(change), timestamp=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        self.changelog.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.changelog, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    @metrics.timed('whitelist_publish')
+    def publish(self, pairs: Sequence[str]) -> WhitelistChange:
+        """
+        Make pairs the bot's whitelist if they differ from the current one
+
+        An empty selection is never published (it would stop the bot from
+        trading); the current whitelist is kept instead.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        with file_lock(self._lock_file):
+            config = self._read()
+            previous = read_whitelist(config)
+            if not pairs:
+                logger.warning("Empty selection, keeping the current whitelist")
+                return WhitelistChange(previous=previous, pairs=previous)
+            added, removed = diff_whitelists(previous, pairs)
+            change = WhitelistChange(previous=previous, pairs=pairs, added=added, removed=removed)
+            if not change.changed:
+                metrics.count('whitelist_unchanged')
+                return change
+            if self.before_publish is not None:
+                try:
+                    self.before_publish(change)
+                except Exception as e:
+                    logger.error(f"Pre-publish hook failed, publishing anyway: {e}")
+            config.setdefault('exchange', {})['pair_whitelist'] = pairs
+            self._write(config)
+            change.written = True
+
+        logger.info(f"Whitelist published: +{len(added)} -{len(removed)} ({len(pairs)} pairs)")
+        change.reloaded = self._reload()
+        self._record(change)
+        return change
+
+
+def main(argv: Optional[List[str]] = None):
+    """Select pairs and publish them to a bot"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from optimized_pair_selector import SELECTION_METHODS
+    from pairlist_daemon import build_selector_callable
+
+    parser = argparse.ArgumentParser(description="Publish a pair selection to a Freqtrade bot")
+    parser.add_argument('--config', default="user_data/pairlists/top_50_pairs.json")
+    parser.add_argument('--source', choices=['optimized', 'manager'], default='optimized',
+                        help="OptimizedPairSelector or CoinGecko-backed PairManager")
+    parser.add_argument('--method', choices=SELECTION_METHODS, default='category_weights')
+    parser.add_argument('--max-pairs', type=int, default=10)
+    parser.add_argument('--market-data', help="Market data source: simulated[:seed], coingecko[:url], "
+                                              "file:<path> or replay:<history dir> (default per source)")
+    parser.add_argument('--seed', type=int, help="Seed of the simulated market data")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the selection cache")
+    parser.add_argument('--bot-config', default="config.json", help="The bot's config.json")
+    parser.add_argument('--api-url', help="Bot REST API URL (omit to only write the config)")
+    parser.add_argument('--username', default=os.environ.get('FREQTRADE__API_SERVER__USERNAME'))
+    parser.add_argument('--password', default=os.environ.get('FREQTRADE__API_SERVER__PASSWORD'))
+    parser.add_argument('--changelog', default="user_data/whitelist_changes.jsonl")
+    parser.add_argument('--dry-run', action='store_true', help="Show the diff without writing")
+    parser.add_argument('--prefetch', action='store_true', help="Download candles of added pairs first")
+    parser.add_argument('--datadir', default="user_data/data", help="Bot data directory for --prefetch")
+    parser.add_argument('--exchange', default="binance")
+    parser.add_argument('--exchange-source', default="ccxt", help="'ccxt' or 'simulated[:seed]'")
+    parser.add_argument('--timeframe', default="30m")
+    parser.add_argument('--startup-candles', type=int, default=210)
+    args = parser.parse_args(argv)
+
+    pairs = build_selector_callable(args)()
+    bot = BotAPI(args.api_url, args.username, args.password) if args.api_url else None
+    before_publish = None
+    if args.prefetch:
+        from candle_prefetch import CandlePrefetcher, make_exchange
+        prefetcher = CandlePrefetcher(make_exchange(args.exchange_source, args.exchange), args.datadir,
+                                      args.exchange, args.timeframe, startup_candles=args.startup_candles)
+        before_publish = prefetcher.before_publish
+    publisher = WhitelistPublisher(args.bot_config, bot=bot, changelog=args.changelog,
+                                   before_publish=before_publish)
+
+    if args.dry_run:
+        previous = publisher.current()
+        added, removed = diff_whitelists(previous, pairs)
+        change = WhitelistChange(previous=previous, pairs=pairs, added=added, removed=removed)
+    else:
+        change = publisher.publish(pairs)
+
+    if not change.changed:
+        print(f"\n✅ Whitelist unchanged ({len(change.previous)} pairs), bot left alone")
+        return
+    print(f"\n📋 WHITELIST CHANGE ({len(change.pairs)} pairs):")
+    for pair in change.added:
+        print(f"   + {pair}")
+    for pair in change.removed:
+        print(f"   - {pair}")
+    if args.dry_run:
+        print("\n🔍 Dry run, nothing written")
+    elif change.reloaded:
+        print(f"\n🔄 Written to {args.bot_config}, bot reloaded")
+    else:
+        print(f"\n✅ Written to {args.bot_config}")
+
+
+if __name__ == "__main__":
+    main()